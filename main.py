@@ -72,15 +72,17 @@ def main():
         ################################################################
         import matplotlib
 
+        from PySide6.QtCore import QTimer
+
         from utils.system.core import global_vars
         from utils.system.core.app_control import init_settings
         from utils.system.config.logging_config import setup_logger
         from utils.system.core.app_initialization import initialize_app, setup_initial_app_state
         from utils.database.database import create_database
-        from utils.robot.robot_control import update_database_from_usb
         from utils.ui.ui_setup import (initialize_main_window, setup_input_validation, connect_signal_handlers,
                                   setup_password_handling, setup_components, start_background_tasks,
                                   setup_window_handling)
+        from utils.ui.ui_helpers import start_usb_database_sync
 
         # Configure matplotlib backend for 3d view of palettes
         matplotlib.use('qtagg', force=True)
@@ -121,16 +123,9 @@ def main():
         app.processEvents()
         
         init_settings()
-        from utils.audio.audio import start_safety_monitor_thread
-        start_safety_monitor_thread()
+        from utils.audio.audio import start_safety_monitor
+        start_safety_monitor()
         setup_initial_app_state()
-        
-        # update database
-        progress.setValue(60)
-        loading_label.setText("Updating database...")
-        app.processEvents()
-        
-        update_database_from_usb()
 
         # Setup UI components
         progress.setValue(75)
@@ -158,6 +153,9 @@ def main():
         # Hide splash and show main window
         splash.finish(global_vars.main_window)
         global_vars.main_window.show()
+
+        # Sync plans from the USB stick in the background once the window is up
+        QTimer.singleShot(0, start_usb_database_sync)
         
         return app.exec()
 
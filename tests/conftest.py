@@ -0,0 +1,67 @@
+"""Helpers and fixtures shared by the tests.
+
+The fixtures start local servers on ephemeral ports and stop them at teardown.
+"""
+
+import threading
+import time
+from contextlib import ExitStack
+
+import pytest
+
+from utils.robot.dashboard_client import DashboardSession
+from utils.robot.dashboard_standin import DashboardStandIn
+from utils.server.rpc_server import PooledXMLRPCServer
+
+def wait_until(condition, timeout):
+    """Poll `condition` until it holds or `timeout` seconds have passed, and return its last value."""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+def transitions(states):
+    """The states with consecutive repeats dropped, i.e. what a status publisher announces."""
+    expected = []
+    for state in states:
+        if not expected or expected[-1] != state:
+            expected.append(state)
+    return expected
+
+@pytest.fixture
+def cleanup():
+    with ExitStack() as stack:
+        yield stack
+
+@pytest.fixture
+def standin(cleanup):
+    def start(**kwargs):
+        server = DashboardStandIn(**kwargs)
+        server.start()
+        cleanup.callback(server.stop)
+        return server
+
+    return start
+
+@pytest.fixture
+def session(cleanup):
+    def connect(server, timeout=0.5):
+        client = DashboardSession("127.0.0.1", server.port, timeout=timeout)
+        cleanup.callback(client.close)
+        return client
+
+    return connect
+
+@pytest.fixture
+def serve(cleanup):
+    def start(workers, request_deadline=5.0):
+        server = PooledXMLRPCServer(("127.0.0.1", 0), workers=workers, request_deadline=request_deadline, allow_none=True)
+        server.register_function(lambda a, b: a + b, "add")
+        server.register_function(lambda seconds: time.sleep(seconds) or seconds, "sleep")
+        server.register_multicall_functions()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        cleanup.callback(server.server_close)
+        cleanup.callback(server.shutdown)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    return start
@@ -0,0 +1,127 @@
+"""Status monitor and dashboard session against the local dashboard server stand-in."""
+
+import threading
+import time
+from dataclasses import replace
+
+import pytest
+
+from conftest import transitions, wait_until
+from utils.robot.dashboard_client import NotInRemoteControl
+from utils.robot.dashboard_standin import DEMO_SCRIPT, StandInState
+from utils.robot.polling_policy import PollingPolicy
+from utils.robot.robot_enums import ProgramState, SafetyStatus
+from utils.robot.robot_status_monitor import RobotStatusMonitor, get_status_publisher
+
+FAST_POLLING = PollingPolicy(active_interval=0.02, idle_interval=0.02, initial_backoff=0.05, max_backoff=0.2, jitter=0.0)
+
+def expected_transitions(script):
+    state, states = StandInState(), []
+    for step in script:
+        state = replace(state, **step.changes)
+        states.append((state.robotmode, state.safetystatus, state.programstate))
+    return transitions(states)
+
+def test_monitor_publishes_every_scripted_transition(standin):
+    server = standin(latency=0.002, script=DEMO_SCRIPT)
+    expected = expected_transitions(DEMO_SCRIPT)
+    seen, lock = [], threading.Lock()
+
+    def on_status(status):
+        if status.is_connected:
+            with lock:
+                seen.append((status.robot_mode.name, status.safety_status.name, status.program_state.name))
+
+    publisher = get_status_publisher()
+    monitor = RobotStatusMonitor(source="dashboard", policy=FAST_POLLING, ip="127.0.0.1", port=server.port)
+    publisher.subscribe(on_status, replay=False)
+    monitor.start_monitoring()
+    try:
+        wait_until(lambda: len(seen) >= len(expected), DEMO_SCRIPT[-1].at + 2)
+    finally:
+        monitor.stop_monitoring()
+        publisher.unsubscribe(on_status)
+
+    assert seen == expected
+    assert monitor.poll_reason == "program playing"
+
+def test_monitor_reports_an_unreachable_robot(standin):
+    server = standin()
+    port = server.port
+    server.stop()
+    monitor = RobotStatusMonitor(source="dashboard", policy=FAST_POLLING, ip="127.0.0.1", port=port)
+    monitor.start_monitoring()
+    try:
+        assert wait_until(lambda: monitor.poll_reason == "disconnected", 2)
+    finally:
+        monitor.stop_monitoring()
+    assert not monitor.get_current_status().is_connected
+
+def test_local_mode_refuses_program_commands(standin, session):
+    server = standin(state=StandInState(robotmode="RUNNING", remote_control=False))
+    client = session(server)
+
+    with pytest.raises(NotInRemoteControl):
+        client.submit_remote("play").result()
+    assert server.state.programstate == "STOPPED"
+
+def test_play_pause_stop_in_remote_control(standin, session):
+    server = standin(state=StandInState(robotmode="RUNNING"))
+    client = session(server)
+
+    assert client.remote_control(max_age=0).result()
+    assert [client.submit_remote(command).result() for command in ("play", "pause", "stop")] == \
+        ["Starting program", "Pausing program", "Stopped"]
+    assert ProgramState.from_string(client.send("programstate")) == ProgramState.STOPPED
+    assert client.send("PolyscopeVersion").startswith("URSoftware")
+    assert client.send("get serial number").isdigit()
+
+def test_dropped_answer_times_out_and_next_command_reconnects(standin, session):
+    server = standin()
+    client = session(server)
+    client.send("robotmode")
+
+    server.drop_rate = 1.0
+    with pytest.raises(OSError):
+        client.send("robotmode")
+    server.drop_rate = 0.0
+
+    assert SafetyStatus.from_string(client.send("safetystatus")) == SafetyStatus.NORMAL
+
+def test_session_recovers_from_a_closed_connection(standin, session):
+    server = standin()
+    client = session(server)
+    client.send("robotmode")
+
+    server.close_connections()
+    time.sleep(0.05)
+
+    assert client.send("robotmode").startswith("Robotmode")
+
+def test_pipelining_hides_the_latency(standin, session):
+    server = standin(latency=0.01)
+    client = session(server, timeout=2)
+    client.send("robotmode")
+
+    start = time.perf_counter()
+    for _ in range(20):
+        client.send("robotmode")
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    futures = [client.submit("robotmode") for _ in range(100)]
+    answers = [future.result() for future in futures]
+    pipelined = time.perf_counter() - start
+
+    assert all(answer.startswith("Robotmode") for answer in answers)
+    assert pipelined < sequential
+
+def test_per_call_timeout_leaves_the_session_timeout_alone(standin, session):
+    server = standin(latency=0.1)
+    client = session(server, timeout=2)
+
+    with pytest.raises(OSError):
+        client.send("robotmode", timeout=0.02)
+
+    assert client.timeout == 2
+    assert client.send("robotmode").startswith("Robotmode")
@@ -0,0 +1,47 @@
+"""Round trip of the golden .rob corpus: parse -> store -> export must be byte-identical."""
+
+import os
+
+import pytest
+
+from utils.database.database import save_to_database
+from utils.database.rob_export import export_rob_file, serialize_rob, verify_roundtrip
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "data", "rob_corpus")
+CORPUS = sorted(f for f in os.listdir(CORPUS_DIR) if f.endswith(".rob"))
+
+def read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def test_corpus_covers_line_formats():
+    contents = [read_bytes(os.path.join(CORPUS_DIR, file_name)) for file_name in CORPUS]
+    assert any(b'\r\n' in content for content in contents)
+    assert any(b'\n' in content and b'\r\n' not in content for content in contents)
+    assert any(content.endswith(b'\n') for content in contents)
+    assert any(not content.endswith(b'\n') for content in contents)
+
+@pytest.mark.parametrize("file_name", CORPUS)
+def test_export_is_byte_identical(file_name, tmp_path):
+    db_path = str(tmp_path / "roundtrip.db")
+    assert save_to_database(file_name, db_path, os.path.join(CORPUS_DIR, ''))
+
+    exported = export_rob_file(file_name, str(tmp_path), db_path)
+
+    assert exported is not None
+    assert read_bytes(exported) == read_bytes(os.path.join(CORPUS_DIR, file_name))
+
+def test_verify_roundtrip_reports_every_file():
+    assert verify_roundtrip(CORPUS_DIR) == {file_name: True for file_name in CORPUS}
+
+def test_export_of_unknown_plan(tmp_path):
+    assert export_rob_file("missing.rob", str(tmp_path), str(tmp_path / "empty.db")) is None
+
+@pytest.mark.parametrize("line_ending, final_newline, expected", [
+    ('\n', True, b'1\t2\n3\n'),
+    ('\n', False, b'1\t2\n3'),
+    ('\r\n', True, b'1\t2\r\n3\r\n'),
+    ('\r\n', False, b'1\t2\r\n3'),
+])
+def test_serialize_rob(line_ending, final_newline, expected):
+    assert serialize_rob([[1, 2], [3]], line_ending, final_newline) == expected
@@ -0,0 +1,95 @@
+"""Robot status publishing and the adaptive poll interval."""
+
+import threading
+
+from utils.robot.polling_policy import PollingPolicy
+from utils.robot.robot_enums import ProgramState, RobotMode, SafetyStatus
+from utils.robot.robot_status_monitor import RobotStatus, RobotStatusPublisher
+
+def connected(program_state=ProgramState.STOPPED):
+    return RobotStatus(RobotMode.RUNNING, SafetyStatus.NORMAL, program_state, is_connected=True)
+
+def disconnected(error):
+    return RobotStatus(is_connected=False, connection_error=error)
+
+def test_only_transitions_are_delivered():
+    publisher = RobotStatusPublisher()
+    received = []
+    publisher.subscribe(received.append, replay=False)
+
+    assert publisher.publish(connected())
+    assert not publisher.publish(connected())
+    assert publisher.publish(connected(ProgramState.PLAYING))
+
+    assert [status.program_state for status in received] == [ProgramState.STOPPED, ProgramState.PLAYING]
+    assert publisher.transitions == 2
+
+def test_changing_error_text_while_disconnected_is_no_transition():
+    publisher = RobotStatusPublisher()
+    publisher.publish(connected())
+    received = []
+    publisher.subscribe(received.append, replay=False)
+
+    assert publisher.publish(disconnected("Robot at 10.0.0.1:29999 unreachable, retrying in 6.0 s"))
+    for seconds in (5.5, 5.0, 4.5):
+        assert not publisher.publish(disconnected(f"Robot at 10.0.0.1:29999 unreachable, retrying in {seconds} s"))
+    assert publisher.publish(connected())
+
+    assert [status.is_connected for status in received] == [False, True]
+    assert publisher.transitions == 3
+
+def test_listeners_get_a_copy():
+    publisher = RobotStatusPublisher()
+    status = connected()
+    publisher.publish(status)
+    status.program_state = ProgramState.PLAYING
+
+    assert publisher.current.program_state == ProgramState.STOPPED
+
+def test_replay_is_delivered_before_a_concurrent_transition():
+    publisher = RobotStatusPublisher()
+    publisher.publish(connected())
+    received, replaying = [], threading.Event()
+    release = threading.Event()
+
+    def slow_subscriber(status):
+        received.append(status.program_state)
+        if len(received) == 1:
+            replaying.set()
+            release.wait(2)
+
+    subscriber = threading.Thread(target=publisher.subscribe, args=(slow_subscriber,))
+    subscriber.start()
+    replaying.wait(2)
+    monitor = threading.Thread(target=publisher.publish, args=(connected(ProgramState.PLAYING),))
+    monitor.start()
+    monitor.join(0.1)
+    still_waiting = monitor.is_alive()
+    release.set()
+    subscriber.join()
+    monitor.join()
+
+    assert still_waiting
+    assert received == [ProgramState.STOPPED, ProgramState.PLAYING]
+
+def test_backoff_after_a_night_without_robot():
+    policy = PollingPolicy(active_interval=0.5, initial_backoff=1.0, max_backoff=30.0, jitter=0.2)
+    for failures in (1, 2, 5, 1025, 10 ** 6):
+        interval, reason = policy.next_interval(disconnected("unreachable"), failures)
+        assert reason == "disconnected"
+        assert 0.5 <= interval <= 30.0
+
+def test_jitter_stays_within_max_backoff():
+    policy = PollingPolicy(initial_backoff=1.0, max_backoff=30.0, jitter=0.2)
+    intervals = [policy.next_interval(disconnected("unreachable"), 50)[0] for _ in range(500)]
+    assert max(intervals) <= 30.0
+    assert min(intervals) >= 24.0
+
+def test_backoff_doubles_from_the_first_failure():
+    policy = PollingPolicy(initial_backoff=1.0, max_backoff=30.0, jitter=0.0)
+    assert [policy.next_interval(disconnected("unreachable"), failures)[0] for failures in range(1, 7)] == [1, 2, 4, 8, 16, 30]
+
+def test_connected_intervals():
+    policy = PollingPolicy(active_interval=0.5, idle_interval=5.0)
+    assert policy.next_interval(connected(ProgramState.PLAYING), 0) == (0.5, "program playing")
+    assert policy.next_interval(connected(), 0) == (5.0, "idle")
@@ -0,0 +1,46 @@
+"""Pooled XMLRPC server: concurrency, deadlines and system.multicall."""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from xmlrpc.client import Fault, MultiCall, ServerProxy
+
+import pytest
+
+from utils.server.rpc_server import FAULT_DEADLINE_EXCEEDED
+
+def multicall(url, n):
+    with ServerProxy(url) as proxy:
+        calls = MultiCall(proxy)
+        calls.add(n, 1)
+        calls.add(n, 2)
+        return list(calls())
+
+def test_multicall_on_a_single_worker(serve):
+    url = serve(workers=1, request_deadline=2.0)
+    assert multicall(url, 10) == [11, 12]
+
+@pytest.mark.parametrize("workers", [1, 2, 4])
+def test_more_concurrent_multicall_clients_than_workers(serve, workers):
+    url = serve(workers=workers, request_deadline=2.0)
+    clients = workers * 3
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(lambda n: multicall(url, n), range(clients)))
+    assert results == [[n + 1, n + 2] for n in range(clients)]
+    assert time.perf_counter() - start < 2.0
+
+def test_slow_call_does_not_block_other_clients(serve):
+    url = serve(workers=2)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        slow = pool.submit(lambda: ServerProxy(url).sleep(0.5))
+        time.sleep(0.05)
+        start = time.perf_counter()
+        assert ServerProxy(url).add(1, 2) == 3
+        assert time.perf_counter() - start < 0.4
+        assert slow.result() == 0.5
+
+def test_deadline_fault(serve):
+    url = serve(workers=1, request_deadline=0.2)
+    with pytest.raises(Fault) as excinfo:
+        ServerProxy(url).sleep(0.5)
+    assert excinfo.value.faultCode == FAULT_DEADLINE_EXCEEDED
@@ -0,0 +1,48 @@
+"""RTDE status stream against the local RTDE stand-in."""
+
+from conftest import transitions, wait_until
+from utils.robot.robot_enums import ProgramState, RobotMode, SafetyStatus
+from utils.robot.robot_status_monitor import RobotStatus, RobotStatusPublisher
+from utils.robot.rtde_client import DEMO_FRAMES, RtdeStandIn, RtdeStatusStream
+
+FREQUENCY = 50.0
+
+def decoded(frame):
+    return (RobotMode.from_rtde(frame["robot_mode"]), SafetyStatus.from_rtde(frame["safety_mode"]),
+            ProgramState.from_rtde(frame["runtime_state"]))
+
+def test_stream_publishes_every_transition_in_order():
+    standin = RtdeStandIn(DEMO_FRAMES, loop=False)
+    port = standin.start()
+    publisher = RobotStatusPublisher()
+    seen = []
+    publisher.subscribe(lambda status: seen.append((status.robot_mode, status.safety_status, status.program_state)), replay=False)
+    stream = RtdeStatusStream(RobotStatus(), "127.0.0.1", port, FREQUENCY, on_change=publisher.publish)
+    stream.start()
+    try:
+        wait_until(lambda: stream.packages >= len(DEMO_FRAMES), len(DEMO_FRAMES) / FREQUENCY + 5)
+    finally:
+        stream.stop()
+        standin.shutdown()
+        standin.server_close()
+
+    assert seen == transitions([decoded(frame) for frame in DEMO_FRAMES])
+    assert publisher.current.is_connected
+
+def test_stream_reports_an_unreachable_robot():
+    standin = RtdeStandIn(DEMO_FRAMES)
+    port = standin.start()
+    standin.shutdown()
+    standin.server_close()
+    publisher = RobotStatusPublisher()
+    publisher.publish(RobotStatus(RobotMode.RUNNING, SafetyStatus.NORMAL, ProgramState.PLAYING, is_connected=True))
+    status = RobotStatus(RobotMode.RUNNING, SafetyStatus.NORMAL, ProgramState.PLAYING, is_connected=True)
+    stream = RtdeStatusStream(status, "127.0.0.1", port, FREQUENCY, on_change=publisher.publish)
+    stream.start()
+    try:
+        assert wait_until(lambda: not publisher.current.is_connected, 5)
+    finally:
+        stream.stop()
+
+    assert publisher.current.connection_error.startswith("RTDE:")
+    assert publisher.current.robot_mode == RobotMode.UNKNOWN
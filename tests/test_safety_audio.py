@@ -0,0 +1,45 @@
+"""The REDUCED mode warning sound."""
+
+import threading
+import time
+
+import pytest
+
+from utils.audio import audio
+from utils.robot.robot_enums import SafetyStatus
+from utils.robot.robot_status_monitor import RobotStatus
+
+@pytest.fixture
+def played(monkeypatch):
+    played = []
+    monkeypatch.setattr(audio, "add_audio_to_queue", lambda audio_id, sound_file, count: played.append(sound_file))
+    monkeypatch.setattr(audio, "stop_audio", lambda audio_id: None)
+    return played
+
+def status(safety_status):
+    return RobotStatus(safety_status=safety_status, is_connected=True)
+
+def test_warns_while_in_reduced_mode(played):
+    warning = audio.SafetyAudioWarning("warning.wav", interval=0.05)
+    warning.on_status(status(SafetyStatus.REDUCED))
+    time.sleep(0.18)
+    warning.on_status(status(SafetyStatus.NORMAL))
+    count = len(played)
+    time.sleep(0.1)
+
+    assert 2 <= count <= 4
+    assert len(played) == count
+
+def test_a_stale_timer_neither_plays_nor_reschedules(played):
+    warning = audio.SafetyAudioWarning("warning.wav", interval=60)
+    warning.on_status(status(SafetyStatus.REDUCED))
+    current = warning._timer
+
+    # A timer that fired while REDUCED was left and entered again
+    stale = threading.Thread(target=warning._warn)
+    stale.start()
+    stale.join()
+
+    assert played == []
+    assert warning._timer is current
+    warning.on_status(status(SafetyStatus.NORMAL))
@@ -0,0 +1,186 @@
+"""Robot state history: bucketed durations, the crash checkpoint, OEE and pruning."""
+
+import random
+import sqlite3
+import time
+
+import pytest
+
+from utils.database.state_history import DAY, HOUR, MINUTE, Run, StateHistory, StateKey
+
+PLAYING = StateKey("RUNNING", "NORMAL", "PLAYING", True)
+REDUCED = StateKey("RUNNING", "REDUCED", "PLAYING", True)
+STOPPED = StateKey("RUNNING", "PROTECTIVE_STOP", "PAUSED", True)
+IDLE = StateKey("IDLE", "NORMAL", "STOPPED", True)
+POWER_OFF = StateKey("POWER_OFF", "NORMAL", "STOPPED", True)
+DISCONNECTED = StateKey("UNKNOWN", "UNKNOWN", "UNKNOWN", False)
+
+@pytest.fixture
+def history(tmp_path):
+    history = StateHistory(str(tmp_path / "history.db"))
+    yield history
+    history.close()
+
+def record(history, start, steps):
+    """Record (state, seconds) steps from `start`; return the closed runs and the time the last one ends."""
+    runs, t = [], start
+    for state, seconds in steps:
+        history.record_state(state, t)
+        runs.append(Run(t, t + seconds, state))
+        t += seconds
+    # Leave a different state open, so the last step is a closed run
+    history.record_state(DISCONNECTED if runs[-1].state != DISCONNECTED else IDLE, t)
+    return runs, t
+
+def brute_force(runs, start, end):
+    result = {}
+    for run in runs:
+        seconds = max(0.0, min(run.end, end) - max(run.start, start))
+        if seconds:
+            result[run.state] = result.get(run.state, 0.0) + seconds
+    return result
+
+def minutes_ago(minutes):
+    """A minute aligned time; ranges starting there are not prorated."""
+    return (int(time.time() // MINUTE) - minutes) * MINUTE
+
+def assert_durations(actual, expected, tolerance=1e-6):
+    for state in set(actual) | set(expected):
+        assert actual.get(state, 0.0) == pytest.approx(expected.get(state, 0.0), abs=tolerance), state
+
+def test_durations_match_the_runs_across_minute_and_hour_edges(history):
+    rng = random.Random(7)
+    states = [PLAYING, REDUCED, STOPPED, IDLE, POWER_OFF, DISCONNECTED]
+    steps = [(rng.choice(states), rng.choice([0.5, 7.25, 59.9, 61.0, 300.0, 1800.0, 4000.0]))
+             for _ in range(60)]
+    base = int((time.time() - sum(seconds for _, seconds in steps)) // HOUR) * HOUR - HOUR
+    runs, end = record(history, base + 12.5, steps)
+    assert end < time.time()
+    history.flush()
+
+    for _ in range(50):
+        # Minute aligned ranges are exact, hour buckets included
+        start = base + rng.randrange(0, int(end - base) // MINUTE) * MINUTE
+        stop = start + rng.randrange(1, int(end - start) // MINUTE + 2) * MINUTE
+        assert_durations(history.durations(start, stop), brute_force(runs, start, stop))
+
+    for _ in range(50):
+        # Unaligned edges are prorated within their minute
+        start = rng.uniform(base, end)
+        stop = rng.uniform(start, end)
+        actual, expected = history.durations(start, stop), brute_force(runs, start, stop)
+        assert sum(abs(actual.get(state, 0.0) - expected.get(state, 0.0))
+                   for state in set(actual) | set(expected)) <= 2 * MINUTE
+        assert sum(actual.values()) == pytest.approx(stop - start)
+
+def test_unflushed_runs_are_counted_once(history):
+    base = minutes_ago(60)
+    runs, end = record(history, base, [(PLAYING, 300.0), (REDUCED, 90.0), (IDLE, 90.0)])
+    before = history.durations(base, end)
+    history.flush()
+
+    assert_durations(before, brute_force(runs, base, end))
+    assert_durations(history.durations(base, end), before)
+
+def test_open_run_is_closed_at_its_checkpoint_after_a_crash(tmp_path):
+    path = str(tmp_path / "history.db")
+    base = minutes_ago(20)
+    crashed = StateHistory(path)
+    crashed.record_state(IDLE, base)
+    crashed.record_state(PLAYING, base + 100)
+    crashed.flush()
+    with sqlite3.connect(path) as conn:
+        start, checkpoint = conn.execute("SELECT start, checkpoint FROM state_open").fetchone()
+    # No close(): the process died here
+
+    reopened = StateHistory(path)
+    try:
+        with sqlite3.connect(path) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM state_open").fetchone()[0] == 0
+        assert start == base + 100
+        assert_durations(reopened.durations(base, checkpoint + 60),
+                         {IDLE: 100.0, PLAYING: checkpoint - start})
+    finally:
+        reopened.close()
+
+def test_oee_without_counts_uses_the_reduced_speed(history):
+    base = minutes_ago(120)
+    record(history, base, [(PLAYING, 600.0), (REDUCED, 200.0), (STOPPED, 100.0), (IDLE, 100.0),
+                           (DISCONNECTED, 100.0), (POWER_OFF, 300.0)])
+    history.flush()
+    end = base + 24 * MINUTE
+
+    report = history.oee(base, end)
+
+    assert report.planned_seconds == pytest.approx(1000.0)
+    assert report.running_seconds == pytest.approx(800.0)
+    assert report.reduced_seconds == pytest.approx(200.0)
+    assert report.availability == pytest.approx(0.8)
+    assert report.performance == pytest.approx((800 - 200 * 0.5) / 800)
+    assert report.quality == 1.0
+    assert report.oee == pytest.approx(0.8 * 0.875)
+    assert history.availability(base, end) == pytest.approx(0.8)
+    assert history.time_in(base, end, safety_status="REDUCED") == pytest.approx(200.0)
+
+def test_oee_with_counts(history):
+    base = minutes_ago(120)
+    record(history, base, [(PLAYING, 600.0), (REDUCED, 200.0), (IDLE, 200.0)])
+    history.flush()
+    # The range ends on a minute; the rest of it is disconnected and not planned
+    end = base + 17 * MINUTE
+
+    report = history.oee(base, end, ideal_cycle_time=10.0, total_count=70, good_count=63)
+
+    assert report.availability == pytest.approx(0.8)
+    assert report.performance == pytest.approx(700 / 800)
+    assert report.quality == pytest.approx(0.9)
+    assert report.oee == pytest.approx(0.8 * 0.875 * 0.9)
+    assert history.oee(base, end, ideal_cycle_time=20.0, total_count=70).performance == 1.0
+
+def test_no_planned_time_has_no_availability(history):
+    base = time.time() - HOUR
+    _, end = record(history, base, [(POWER_OFF, 600.0)])
+
+    assert history.availability(base, end) is None
+    assert history.oee(base, end).oee == 0.0
+
+def test_runs_are_bucketed_by_minute_and_hour(history):
+    base = int(time.time() // HOUR) * HOUR - 2 * HOUR
+    # 10:59:30 to 11:01:15
+    record(history, base + HOUR - 30, [(PLAYING, 105.0)])
+    history.flush()
+
+    with sqlite3.connect(history.db_path) as conn:
+        minutes = conn.execute("SELECT bucket, seconds FROM state_minutes WHERE program_state = 'PLAYING' "
+                               "ORDER BY bucket").fetchall()
+        hours = conn.execute("SELECT bucket, seconds FROM state_hours WHERE program_state = 'PLAYING' "
+                             "ORDER BY bucket").fetchall()
+        runs = conn.execute("SELECT start, end FROM state_runs").fetchall()
+
+    assert minutes == [(base + HOUR - 60, 30.0), (base + HOUR, 60.0), (base + HOUR + 60, 15.0)]
+    assert hours == [(base, 30.0), (base + HOUR, 75.0)]
+    assert runs == [(base + HOUR - 30, base + HOUR + 75)]
+
+def test_old_minutes_and_runs_are_pruned_but_hours_kept(history):
+    now = time.time()
+    old = int((now - 8 * DAY) // HOUR) * HOUR
+    ancient = int((now - 31 * DAY) // HOUR) * HOUR
+    record(history, ancient, [(PLAYING, HOUR)])
+    record(history, old, [(REDUCED, 2 * HOUR + 30 * MINUTE)])
+    recent = now - HOUR
+    record(history, recent, [(IDLE, 600.0)])
+    history.flush()
+
+    with sqlite3.connect(history.db_path) as conn:
+        oldest_minute = conn.execute("SELECT MIN(bucket) FROM state_minutes").fetchone()[0]
+        run_starts = [row[0] for row in conn.execute("SELECT start FROM state_runs ORDER BY start")]
+        hour_buckets = {row[0] for row in conn.execute("SELECT bucket FROM state_hours")}
+
+    assert oldest_minute >= now - 7 * DAY
+    assert ancient not in run_starts and old in run_starts and recent in run_starts
+    assert {ancient, old, old + HOUR, old + 2 * HOUR} <= hour_buckets
+    # Old history is still answered from the hour buckets, prorated within the edge hours
+    assert history.time_in(ancient, ancient + HOUR, program_state="PLAYING") == pytest.approx(HOUR)
+    assert history.time_in(old, old + 3 * HOUR, safety_status="REDUCED") == pytest.approx(2 * HOUR + 30 * MINUTE)
+    assert history.time_in(old + 2 * HOUR, old + 2 * HOUR + 15 * MINUTE, safety_status="REDUCED") == \
+        pytest.approx(15 * MINUTE * 30 / 60)
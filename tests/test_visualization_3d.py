@@ -0,0 +1,97 @@
+"""Hidden face culling of the 3D pallet view, checked against point sampling."""
+
+import importlib.util
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from utils.database.pallet_data import Box, Layer, Pallet, Rectangle
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+# ui_files/__init__.py needs the compiled Qt resources, so load the module by path
+_spec = importlib.util.spec_from_file_location(
+    "visualization_3d", Path(__file__).resolve().parent.parent / "ui_files" / "visualization_3d.py")
+vis = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(vis)
+
+TOLERANCE = vis.CONTACT_TOLERANCE
+
+def grid_layer(nx, ny, size_x, size_y, gap=0.0, offset_x=0.0, height=150):
+    return [Box(1, None, 0, Rectangle(width=size_y, length=size_x, x=offset_x + size_x / 2 + i * (size_x + gap),
+                                      y=size_y / 2 + j * (size_y + gap)), height=height)
+            for i in range(nx) for j in range(ny)]
+
+def solid_boxes(pallet):
+    """Every box as (x0, x1, y0, y1, z0, z1), in the order of build_pallet_mesh."""
+    boxes = []
+    for layer_num in reversed(range(len(pallet.layers))):
+        for x, y, half_width, half_length, height, _ in vis._layer_arrays(pallet.layers[layer_num].boxes).T:
+            boxes.append((x - half_width, x + half_width, y - half_length, y + half_length,
+                          layer_num * height, (layer_num + 1) * height))
+    return np.array(boxes)
+
+def sampled_hidden(pallet, samples=6):
+    """Whether each face is hidden: every sample point has solid on both sides, within TOLERANCE."""
+    faces, _, _ = vis.build_pallet_mesh(pallet)
+    boxes = solid_boxes(pallet)
+    low, high = boxes[:, 0::2] - TOLERANCE, boxes[:, 1::2] + TOLERANCE
+    steps = np.linspace(0.05, 0.95, samples)
+    hidden = []
+    for face in faces:
+        normal = np.cross(face[1] - face[0], face[3] - face[0])
+        normal /= np.linalg.norm(normal)
+        points = np.array([face[0] + a * (face[1] - face[0]) + b * (face[3] - face[0]) for a in steps for b in steps])
+        solid = []
+        for side in (1, -1):
+            probe = points + side * (TOLERANCE + 1) * normal
+            solid.append(((low <= probe[:, None]) & (probe[:, None] <= high)).all(axis=-1).any(axis=-1))
+        hidden.append(bool((solid[0] & solid[1]).all()))
+    return np.array(hidden)
+
+def check(pallet):
+    faces, _, _ = vis.build_pallet_mesh(pallet)
+    mask = vis.hidden_face_mask(pallet)
+    assert mask.shape == (len(faces),)
+    hidden = sampled_hidden(pallet).reshape(-1, 6)
+    # Bottom faces are culled without looking; the view is fixed above the pallet
+    hidden[:, 0] = True
+    culled_visible = mask.reshape(-1, 6) & ~hidden
+    assert not culled_visible.any(), np.argwhere(culled_visible)
+    return mask.reshape(-1, 6)
+
+def test_column_stack_keeps_only_the_outside():
+    pallet = Pallet([Layer(1, grid_layer(3, 2, 400, 400))] * 3, 1200, 800)
+    mask = check(pallet)
+
+    # Tops of the top layer and the 10 outer side faces of each layer
+    assert (~mask).sum() == 6 + 3 * 10
+
+def test_interlocked_layers():
+    pallet = Pallet([Layer(1, grid_layer(3, 2, 400, 400)), Layer(2, grid_layer(2, 3, 600, 800 / 3))] * 4, 1200, 800)
+    mask = check(pallet)
+
+    # Only the tops of the top layer are visible
+    assert (~mask[:, 1]).sum() == 6
+
+def test_partially_covered_top_layer():
+    bottom = Layer(1, grid_layer(3, 2, 400, 400))
+    pallet = Pallet([bottom, bottom, Layer(2, grid_layer(3, 1, 400, 400))], 1200, 800)
+    mask = check(pallet)
+
+    # The top layer (first in the mesh) and the three uncovered boxes below it show their tops
+    assert (~mask[:, 1]).sum() == 3 + 3
+
+def test_shifted_layer_leaves_the_tops_below_uncovered():
+    pallet = Pallet([Layer(1, grid_layer(3, 2, 400, 400)), Layer(2, grid_layer(3, 2, 400, 400, offset_x=100))] * 2,
+                    1200, 800)
+    check(pallet)
+
+@pytest.mark.parametrize("gap", [TOLERANCE + 1, 10.0, 50.0])
+def test_gaps_wider_than_the_tolerance_keep_the_sides(gap):
+    pallet = Pallet([Layer(1, grid_layer(4, 3, 290, 260, gap=gap))] * 3, 1200, 800)
+    mask = check(pallet)
+
+    assert not mask[:, 2:].any()
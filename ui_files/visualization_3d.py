@@ -1,12 +1,14 @@
 import os
 import sys
-from typing import Union, List
+from typing import Dict, Union, List
 from enum import Enum
 import matplotlib
+import numpy as np
 
 from utils.database.database import load_from_database
 matplotlib.use('qtagg', force=True)
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.colors import to_rgba_array
 from matplotlib.figure import Figure
 from mpl_toolkits.mplot3d.art3d import Poly3DCollection
 from PySide6.QtWidgets import QVBoxLayout, QProgressDialog, QHBoxLayout, QListWidget, QSplitter, QWidget
@@ -188,6 +190,222 @@ def parse_rob_file(file_path) -> Tuple[Pallet, int]:
     logger.info(f"Parse time: {parse_time:.3f} seconds")
     return pallet, einlauf_richtung
 
+# Box corners as multiples of the half width, half length and the height above the layer
+BOX_CORNERS = np.array([
+    (-1, -1, 0), (1, -1, 0), (1, 1, 0), (-1, 1, 0),
+    (-1, -1, 1), (1, -1, 1), (1, 1, 1), (-1, 1, 1),
+], dtype=float)
+# Corner indices of the faces: bottom, top, front, back, right, left
+BOX_FACES = np.array([
+    (0, 1, 2, 3), (4, 5, 6, 7), (0, 1, 5, 4), (2, 3, 7, 6), (0, 3, 7, 4), (1, 2, 6, 5),
+])
+# Face colours: the label side is white, the opposite side red, the sides blue
+FACE_PALETTE = to_rgba_array(['green', 'white', 'red', 'blue'])
+GREEN, WHITE, RED, BLUE = range(4)
+# Palette index per face (as in BOX_FACES) for rotation 0, 90, 180 and 270
+ROTATION_FACE_COLORS = np.array([
+    (GREEN, GREEN, WHITE, RED, BLUE, BLUE),
+    (GREEN, GREEN, BLUE, BLUE, RED, WHITE),
+    (GREEN, GREEN, RED, WHITE, BLUE, BLUE),
+    (GREEN, GREEN, BLUE, BLUE, WHITE, RED),
+])
+# Progress callbacks per mesh build
+PROGRESS_STEPS = 10
+# Boxes closer than this (mm) count as touching when hidden faces are culled
+CONTACT_TOLERANCE = 5.0
+# Side faces as in BOX_FACES: (axis of the face normal, side) with side 0 at the low and 1 at the high coordinate
+SIDE_FACES = ((2, 1, 0), (3, 1, 1), (4, 0, 0), (5, 0, 1))
+
+def _layer_arrays(boxes) -> np.ndarray:
+    """Get x, y, half extents, height and rotation index of every box as one array per column."""
+    rows = np.array([(box.rect.x, box.rect.y, box.rect.width, box.rect.length, box.height, box.rotation) for box in boxes],
+                    dtype=float).reshape(-1, 6)
+    x, y, rect_width, rect_length, height, rotation = rows.T
+    turned = (rotation == 90) | (rotation == 270)
+    half_width = np.where(turned, rect_width, rect_length) / 2
+    half_length = np.where(turned, rect_length, rect_width) / 2
+    # Anything that is not 0, 90 or 180 is drawn like 270
+    rotation_index = np.select([rotation == 0, rotation == 90, rotation == 180], [0, 1, 2], 3)
+    return np.stack([x, y, half_width, half_length, height, rotation_index])
+
+def _footprints(arrays: np.ndarray) -> np.ndarray:
+    """Get the footprint of every box as (boxes, 2 axes, low/high)."""
+    x, y, half_width, half_length = arrays[:4]
+    return np.stack([np.stack([x - half_width, x + half_width], axis=-1),
+                     np.stack([y - half_length, y + half_length], axis=-1)], axis=1)
+
+def _grid_index(footprints: np.ndarray, cell: float) -> Dict[Tuple[int, int], List[int]]:
+    """Map grid cells to the boxes whose footprint touches them."""
+    grid = {}
+    for number, ((x0, x1), (y0, y1)) in enumerate(footprints):
+        for cx in range(int(x0 // cell), int(x1 // cell) + 1):
+            for cy in range(int(y0 // cell), int(y1 // cell) + 1):
+                grid.setdefault((cx, cy), []).append(number)
+    return grid
+
+def _grid_query(grid: Dict[Tuple[int, int], List[int]], cell: float, footprint: np.ndarray) -> List[int]:
+    """Get the boxes in the grid cells touched by a footprint, each once."""
+    (x0, x1), (y0, y1) = footprint
+    found = set()
+    for cx in range(int(x0 // cell), int(x1 // cell) + 1):
+        for cy in range(int(y0 // cell), int(y1 // cell) + 1):
+            found.update(grid.get((cx, cy), ()))
+    return sorted(found)
+
+def _covered(target: np.ndarray, others: np.ndarray) -> bool:
+    """Whether the axis-aligned box target (axes, 2) lies inside the union of others (n, axes, 2).
+
+    The coordinates of all box edges split the target into cells; the target is
+    covered if the centre of every cell lies inside one of the others.
+    """
+    if not len(others):
+        return False
+    centres = []
+    for axis, (low, high) in enumerate(target):
+        edges = np.unique(np.concatenate(([low, high], np.clip(others[:, axis].ravel(), low, high))))
+        centres.append((edges[:-1] + edges[1:]) / 2)
+    points = np.stack(np.meshgrid(*centres, indexing='ij'), axis=-1).reshape(-1, len(target))
+    inside = (others[None, :, :, 0] <= points[:, None, :]) & (points[:, None, :] <= others[None, :, :, 1])
+    return bool(inside.all(axis=-1).any(axis=-1).all())
+
+def _grid_cell(footprints: np.ndarray) -> float:
+    """Get a grid cell size so every footprint touches at most 2 x 2 cells."""
+    return max(float((footprints[:, :, 1] - footprints[:, :, 0]).max()) + 2 * CONTACT_TOLERANCE, 1.0)
+
+def _hidden_sides(arrays: np.ndarray) -> np.ndarray:
+    """Find the side faces that touch a neighbour of the same height across their whole width.
+
+    Args:
+        arrays (np.ndarray): The layer as returned by _layer_arrays.
+
+    Returns:
+        np.ndarray: Boolean mask (boxes, 6), True for hidden faces.
+    """
+    hidden = np.zeros((arrays.shape[1], 6), dtype=bool)
+    if not arrays.shape[1]:
+        return hidden
+    height = arrays[4]
+    footprints = _footprints(arrays)
+    cell = _grid_cell(footprints)
+    grid = _grid_index(footprints, cell)
+    for number, footprint in enumerate(footprints):
+        neighbours = [other for other in _grid_query(grid, cell, footprint + [-CONTACT_TOLERANCE, CONTACT_TOLERANCE])
+                      if other != number and abs(height[other] - height[number]) <= CONTACT_TOLERANCE]
+        if not neighbours:
+            continue
+        near = footprints[neighbours]
+        for face, axis, side in SIDE_FACES:
+            # A neighbour touches with its opposite face; the face spans the other axis
+            touching = near[np.abs(near[:, axis, 1 - side] - footprint[axis, side]) <= CONTACT_TOLERANCE]
+            span = 1 - axis
+            hidden[number, face] = _covered(footprint[[span]],
+                                            touching[:, [span]] + [-CONTACT_TOLERANCE, CONTACT_TOLERANCE])
+    return hidden
+
+def _hidden_tops(arrays: np.ndarray, above: np.ndarray) -> np.ndarray:
+    """Find the top faces that the boxes of the layer above cover completely.
+
+    Boxes of the layer above only rest on boxes of the same height, as the
+    mesh stacks every layer at layer number times box height.
+
+    Args:
+        arrays (np.ndarray): The layer as returned by _layer_arrays.
+        above (np.ndarray): The layer above.
+
+    Returns:
+        np.ndarray: Boolean mask (boxes,), True for hidden top faces.
+    """
+    hidden = np.zeros(arrays.shape[1], dtype=bool)
+    if not arrays.shape[1] or not above.shape[1]:
+        return hidden
+    footprints, above_footprints = _footprints(arrays), _footprints(above)
+    cell = _grid_cell(above_footprints)
+    grid = _grid_index(above_footprints, cell)
+    for number, footprint in enumerate(footprints):
+        resting = [other for other in _grid_query(grid, cell, footprint)
+                   if abs(above[4, other] - arrays[4, number]) <= CONTACT_TOLERANCE]
+        hidden[number] = _covered(footprint, above_footprints[resting] + [-CONTACT_TOLERANCE, CONTACT_TOLERANCE])
+    return hidden
+
+def hidden_face_mask(pallet: Pallet) -> np.ndarray:
+    """Find the box faces that cannot be seen, in the order of build_pallet_mesh.
+
+    Bottom faces always rest on the layer below or the pallet and the view is
+    fixed above the pallet. Side faces are hidden by a touching neighbour in the
+    same layer, top faces by the boxes of the layer above. Neighbours are looked
+    up in a grid index over the box footprints. Layers that repeat a unique
+    layer, or a pair of unique layers, reuse the result.
+
+    Args:
+        pallet (Pallet): The parsed pallet.
+
+    Returns:
+        np.ndarray: Boolean mask (boxes * 6,), True for hidden faces.
+    """
+    layer_arrays, sides, tops = {}, {}, {}
+    masks = []
+    for layer_num in reversed(range(len(pallet.layers))):
+        boxes = pallet.layers[layer_num].boxes
+        if id(boxes) not in layer_arrays:
+            layer_arrays[id(boxes)] = _layer_arrays(boxes)
+            sides[id(boxes)] = _hidden_sides(layer_arrays[id(boxes)])
+        mask = sides[id(boxes)].copy()
+        mask[:, 0] = True
+        if layer_num + 1 < len(pallet.layers):
+            above = pallet.layers[layer_num + 1].boxes
+            key = (id(boxes), id(above))
+            if key not in tops:
+                tops[key] = _hidden_tops(layer_arrays[id(boxes)], layer_arrays[id(above)])
+            mask[:, 1] = tops[key]
+        masks.append(mask.ravel())
+    return np.concatenate(masks) if masks else np.empty(0, dtype=bool)
+
+def build_pallet_mesh(pallet: Pallet, progress=None) -> Tuple[np.ndarray, np.ndarray, float]:
+    """Build the faces of all boxes, top layer first, in one vectorized pass per distinct layer.
+
+    Layers that repeat a unique layer share its box list, so its box arrays are
+    built once and only moved up for every occurrence.
+
+    Args:
+        pallet (Pallet): The parsed pallet.
+        progress (Callable[[float], None], optional): Called with the finished fraction a few times. Defaults to None.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, float]: Faces (boxes * 6, 4, 3), RGBA face colours (boxes * 6, 4) and the pallet height.
+    """
+    layer_arrays = {}
+    columns = []
+    for layer_idx, layer in enumerate(reversed(pallet.layers)):
+        layer_num = len(pallet.layers) - layer_idx - 1
+        arrays = layer_arrays.get(id(layer.boxes))
+        if arrays is None:
+            arrays = layer_arrays[id(layer.boxes)] = _layer_arrays(layer.boxes)
+        columns.append((arrays, layer_num))
+    if not columns or not sum(arrays.shape[1] for arrays, _ in columns):
+        return np.empty((0, 4, 3)), np.empty((0, 4)), 0.0
+
+    chunks, colors = [], []
+    max_z = 0.0
+    step = max(1, len(columns) // PROGRESS_STEPS)
+    for number, (arrays, layer_num) in enumerate(columns):
+        x, y, half_width, half_length, height, rotation_index = arrays
+        if not len(x):
+            continue
+        z = layer_num * height
+        max_z = max(max_z, float((z + height).max()))
+        # (boxes, 8 corners, 3 coordinates)
+        verts = np.empty((len(x), 8, 3))
+        verts[:, :, 0] = x[:, None] + BOX_CORNERS[:, 0] * half_width[:, None]
+        verts[:, :, 1] = y[:, None] + BOX_CORNERS[:, 1] * half_length[:, None]
+        verts[:, :, 2] = z[:, None] + BOX_CORNERS[:, 2] * height[:, None]
+        chunks.append(verts[:, BOX_FACES].reshape(-1, 4, 3))
+        colors.append(FACE_PALETTE[ROTATION_FACE_COLORS[rotation_index.astype(int)]].reshape(-1, 4))
+        if progress is not None and number % step == 0:
+            progress(number / len(columns))
+    if progress is not None:
+        progress(1.0)
+    return np.concatenate(chunks), np.concatenate(colors), max_z
+
 def display_pallet_3d(canvas, pallet_name):
     """Display a 3D visualization of the pallet.
 
@@ -221,7 +439,6 @@ def display_pallet_3d(canvas, pallet_name):
     # Track min/max coordinates to set proper view limits
     min_x, max_x = 0, pallet.length
     min_y, max_y = 0, pallet.width
-    min_z, max_z = 0, 0
 
     progress.setValue(30)
     progress.setLabelText("Creating boxes...")
@@ -236,94 +453,13 @@ def display_pallet_3d(canvas, pallet_name):
         package_height = first_box.height
     
     # Reverse layer order to draw from top to bottom
-    allfaces = []
-    allfacecolors = []
     total_boxes = sum(len(layer.boxes) for layer in pallet.layers)
-    boxes_processed = 0
-    
-    for layer_idx, layer in enumerate(reversed(pallet.layers)):
-        layer_num = len(pallet.layers) - layer_idx - 1  # Calculate actual layer number
-        for box in layer.boxes:
-            width, length = (box.rect.length, box.rect.width)
-
-            if box.rotation == 90 or box.rotation == 270:
-                width, length = (box.rect.width, box.rect.length)
-
-            z = layer_num * box.height
-            height = box.height
-
-            # Update min/max coordinates
-            max_z = max(max_z, z + height)
-
-            verts = [
-                (box.rect.x - width / 2, box.rect.y - length / 2, z),
-                (box.rect.x + width / 2, box.rect.y - length / 2, z),
-                (box.rect.x + width / 2, box.rect.y + length / 2, z),
-                (box.rect.x - width / 2, box.rect.y + length / 2, z),
-                (box.rect.x - width / 2, box.rect.y - length / 2, z + height),
-                (box.rect.x + width / 2, box.rect.y - length / 2, z + height),
-                (box.rect.x + width / 2, box.rect.y + length / 2, z + height),
-                (box.rect.x - width / 2, box.rect.y + length / 2, z + height)
-            ]
-
-            faces = [
-                [verts[0], verts[1], verts[2], verts[3]],  # Bottom face
-                [verts[4], verts[5], verts[6], verts[7]],  # Top face
-                [verts[0], verts[1], verts[5], verts[4]],  # Front face
-                [verts[2], verts[3], verts[7], verts[6]],  # Back face
-                [verts[0], verts[3], verts[7], verts[4]],  # Right face
-                [verts[1], verts[2], verts[6], verts[5]]   # Left face
-            ]
-
-            box_top_color = 'green'
-            box_bottom_color = box_top_color
-            box_label_color = 'white'
-            box_back_color = 'red'
-            box_left_color = 'blue'
-            box_right_color = box_left_color
-            
-            if box.rotation == 0:
-                face_colors = [
-                    box_bottom_color,
-                    box_top_color,
-                    box_label_color,
-                    box_back_color,
-                    box_right_color,
-                    box_left_color,
-                ]
-            elif box.rotation == 90:
-                face_colors = [
-                    box_bottom_color,
-                    box_top_color,
-                    box_right_color,
-                    box_left_color,
-                    box_back_color,
-                    box_label_color,
-                ]
-            elif box.rotation == 180:
-                face_colors = [
-                    box_bottom_color,
-                    box_top_color,
-                    box_back_color,
-                    box_label_color,
-                    box_left_color,
-                    box_right_color,
-                ]
-            else:  # 270
-                face_colors = [
-                    box_bottom_color,
-                    box_top_color,
-                    box_left_color,
-                    box_right_color,
-                    box_label_color,
-                    box_back_color,
-                ]
-
-            allfaces.extend(faces)
-            allfacecolors.extend(face_colors)
-            
-            boxes_processed += 1
-            progress.setValue(30 + int((boxes_processed / total_boxes) * 40))
+    allfaces, allfacecolors, max_z = build_pallet_mesh(
+        pallet, lambda fraction: progress.setValue(30 + int(fraction * 40)))
+    visible = ~hidden_face_mask(pallet)
+    allfaces, allfacecolors = allfaces[visible], allfacecolors[visible]
+
+    mesh_time = time.time() - box_creation_start
 
     progress.setValue(70)
     progress.setLabelText("Creating 3D collection...")
@@ -385,6 +521,7 @@ def display_pallet_3d(canvas, pallet_name):
     progress.close()
     
     logger.info(f"\nPerformance Metrics:\n"
+    f"Mesh build time: {mesh_time:.3f} seconds ({len(allfaces)} of {total_boxes * 6} faces visible)\n"
     f"Box creation time: {box_creation_time:.3f} seconds\n"
     f"Render time: {render_time:.3f} seconds\n"
     f"Total time: {total_time:.3f} seconds\n"
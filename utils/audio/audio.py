@@ -2,7 +2,6 @@ import logging
 import os
 import threading
 import time
-from datetime import datetime
 from PySide6.QtGui import QIcon
 from collections import deque
 from dataclasses import dataclass
@@ -188,65 +187,63 @@ def set_audio_volume() -> None:
     except Exception as e:
         logger.error(f"Failed to set audio volume: {e}")
 
-def start_safety_monitor_thread():
-    """Start the safety status monitor in a daemon thread (call after settings are initialized)."""
-    logger.info("Initializing safety monitor thread...")
-    thread = threading.Thread(target=monitor_safety_status, daemon=True)
-    thread.start()
-    logger.info("Safety monitor thread started")
-    return thread
-
-def monitor_safety_status():
-    """Monitor robot safety status and play warning sound once every 30 seconds when in REDUCED mode."""
-    logger.info("Starting safety status monitor thread")
-    while not hasattr(global_vars, 'settings') or global_vars.settings is None:
-        logger.warning("Settings not available, waiting...")
-        time.sleep(1)
-    WARNING_SOUND = global_vars.settings.settings['admin']['alarm_sound_file']
-    WARNING_SOUND_ID = "safety_warning"
-    logger.debug(f"Warning sound path: {WARNING_SOUND}")
-    reduced_start_time = None
-    last_warning_time = None
-    while True:
-        try:
-            if not hasattr(global_vars, 'current_safety_status'):
-                logger.warning("Safety status not available, waiting...")
-                time.sleep(1)
-                continue
-            current_status = global_vars.current_safety_status
-            logger.debug(f"Current safety status: {current_status}")
-            if current_status == SafetyStatus.REDUCED:
-                if reduced_start_time is None:
-                    reduced_start_time = datetime.now()
-                
-                # Check if we should play the warning sound (every 30 seconds)
-                current_time = datetime.now()
-                should_play_warning = False
-                
-                if last_warning_time is None:
-                    # First time in reduced mode, wait 30 seconds before first warning
-                    if (current_time - reduced_start_time).total_seconds() >= 30:
-                        should_play_warning = True
-                else:
-                    # Check if 30 seconds have passed since last warning
-                    if (current_time - last_warning_time).total_seconds() >= 30:
-                        should_play_warning = True
-                
-                if should_play_warning:
-                    logger.info("Robot in REDUCED mode, playing warning sound (once every 30 seconds)")
-                    # Always add to queue with 1 play count - it will be re-added every 30 seconds while in REDUCED mode
-                    add_audio_to_queue(WARNING_SOUND_ID, WARNING_SOUND, 1)
-                    last_warning_time = current_time
-            else:
-                reduced_start_time = None
-                last_warning_time = None
-                # Stop warning sound if robot is not in REDUCED mode
-                logger.debug(f"Robot not in REDUCED mode ({current_status}), stopping warning sound if playing")
-                stop_audio(WARNING_SOUND_ID)
-            time.sleep(1)  # Check every second
-        except AttributeError as e:
-            logger.error(f"Missing required attribute: {e}")
-            time.sleep(1)
-        except Exception as e:
-            logger.error(f"Error in safety status monitor: {e}")
-            time.sleep(1)  # Wait before retrying
\ No newline at end of file
+# Seconds in REDUCED mode before the first and between the following safety warnings
+SAFETY_WARNING_INTERVAL = 30
+SAFETY_WARNING_ID = "safety_warning"
+
+class SafetyAudioWarning:
+    """Plays the warning sound once every SAFETY_WARNING_INTERVAL seconds while the robot is in REDUCED mode.
+
+    Subscribed to the robot status publisher, so it only runs when the safety
+    status changes; while in REDUCED mode a timer thread plays the reminders.
+    """
+
+    def __init__(self, sound_file: str, interval: float = SAFETY_WARNING_INTERVAL):
+        self.sound_file = sound_file
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def on_status(self, status) -> None:
+        """Start or stop the warnings for a new robot status.
+
+        Args:
+            status (RobotStatus): The published robot status.
+        """
+        reduced = status.safety_status == SafetyStatus.REDUCED
+        with self._lock:
+            if reduced and self._timer is None:
+                logger.info(f"Robot entered REDUCED mode, warning every {self.interval} s")
+                self._schedule()
+            elif not reduced and self._timer is not None:
+                logger.debug(f"Robot left REDUCED mode ({status.safety_status}), stopping warning sound")
+                self._timer.cancel()
+                self._timer = None
+                stop_audio(SAFETY_WARNING_ID)
+
+    def _schedule(self) -> None:
+        self._timer = threading.Timer(self.interval, self._warn)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _warn(self) -> None:
+        with self._lock:
+            # A timer cancelled while it was waiting for the lock must not play or reschedule
+            if self._timer is not threading.current_thread():
+                return
+            logger.info(f"Robot in REDUCED mode, playing warning sound (once every {self.interval} seconds)")
+            add_audio_to_queue(SAFETY_WARNING_ID, self.sound_file, 1)
+            self._schedule()
+
+def start_safety_monitor() -> SafetyAudioWarning:
+    """Subscribe the safety warning sound to robot status changes (call after settings are initialized).
+
+    Returns:
+        SafetyAudioWarning: The subscribed warning.
+    """
+    from utils.robot.robot_status_monitor import get_status_publisher
+    warning = SafetyAudioWarning(global_vars.settings.settings['admin']['alarm_sound_file'])
+    logger.debug(f"Warning sound path: {warning.sound_file}")
+    get_status_publisher().subscribe(warning.on_status)
+    logger.info("Safety monitor subscribed to robot status")
+    return warning
@@ -46,6 +46,11 @@ def create_database(db_path="paletten.db"):
     )
     ''')
     
+    # Index the raw data by plan, it is read back in full when loading or exporting a plan
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_daten_metadata_id ON daten(metadata_id)
+    ''')
+    
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS paletten_dim (
         id INTEGER PRIMARY KEY,
@@ -83,6 +88,16 @@ def create_database(db_path="paletten.db"):
     except sqlite3.OperationalError:
         pass  # Column already exists
     
+    # Add line format columns so plans can be exported byte-identical (migration for existing databases)
+    try:
+        cursor.execute("ALTER TABLE paletten_metadata ADD COLUMN line_ending TEXT")
+    except sqlite3.OperationalError:
+        pass  # Column already exists
+    try:
+        cursor.execute("ALTER TABLE paletten_metadata ADD COLUMN final_newline INTEGER")
+    except sqlite3.OperationalError:
+        pass  # Column already exists
+    
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS lage_zuordnung (
         id INTEGER PRIMARY KEY,
@@ -269,13 +284,32 @@ def UR_ReadDataFromUsbStick(filename: str, path_usb_stick: str) -> Union[Literal
         logger.error(f"Error reading file {filename}: {e}")
         return None, None, None, None, None, None, None, None, None, None, None, None, None, None
 
-def save_to_database(file_name, db_path="paletten.db") -> bool:
+def detect_line_format(file_path: str) -> Tuple[str, bool]:
+    """Detect the line ending of a .rob file and whether it ends with a newline.
+    
+    Args:
+        file_path (str): Path to the .rob file
+        
+    Returns:
+        Tuple[str, bool]: The line ending ("\\n", "\\r\\n" or "\\r") and True if the last line is terminated
+    """
+    with open(file_path, 'rb') as f:
+        raw = f.read()
+    if b'\r\n' in raw:
+        line_ending = '\r\n'
+    elif b'\r' in raw:
+        line_ending = '\r'
+    else:
+        line_ending = '\n'
+    return line_ending, raw.endswith(line_ending.encode('ascii'))
+
+def save_to_database(file_name, db_path="paletten.db", path_usb_stick: Optional[str] = None) -> bool:
     """Save all global data to the database.
     
     Args:
+        file_name (str): Name of the .rob file to parse and save
         db_path (str): Path to the database
-        file_path (str): Path to the source .rob file that was parsed
-        file_timestamp (float): Timestamp of when the source file was last modified
+        path_usb_stick (Optional[str]): Directory of the .rob file. Defaults to global_vars.PATH_USB_STICK
         
     Returns:
         bool: True if data was saved, False if skipped due to older timestamp
@@ -283,7 +317,9 @@ def save_to_database(file_name, db_path="paletten.db") -> bool:
     # Create database tables if they don't exist
     create_database(db_path)
     logger.info(f"Handling file: {file_name}")
-    _, file_timestamp, g_Daten, g_LageZuordnung, g_PaketPos, g_PaketeZuordnung, g_Zwischenlagen, g_paket_quer, g_CenterOfGravity, g_PalettenDim, g_PaketDim, g_LageArten, g_AnzLagen, g_AnzahlPakete = UR_ReadDataFromUsbStick(file_name, global_vars.PATH_USB_STICK)
+    if path_usb_stick is None:
+        path_usb_stick = global_vars.PATH_USB_STICK
+    file_path, file_timestamp, g_Daten, g_LageZuordnung, g_PaketPos, g_PaketeZuordnung, g_Zwischenlagen, g_paket_quer, g_CenterOfGravity, g_PalettenDim, g_PaketDim, g_LageArten, g_AnzLagen, g_AnzahlPakete = UR_ReadDataFromUsbStick(file_name, path_usb_stick)
     
     # If parsing failed, skip updating the database
     if (
@@ -296,6 +332,8 @@ def save_to_database(file_name, db_path="paletten.db") -> bool:
         logger.error(f"Skipping database update for '{file_name}' due to parse failure or missing data")
         return False
     
+    line_ending, final_newline = detect_line_format(file_path)
+    
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
@@ -334,11 +372,13 @@ def save_to_database(file_name, db_path="paletten.db") -> bool:
     cursor.execute('''
     INSERT INTO paletten_metadata (
         paket_quer, center_of_gravity_x, center_of_gravity_y, center_of_gravity_z, 
-        lage_arten, anz_lagen, anzahl_pakete, file_timestamp, file_name
-    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        lage_arten, anz_lagen, anzahl_pakete, file_timestamp, file_name,
+        line_ending, final_newline
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     ''', (g_paket_quer, g_CenterOfGravity[0], g_CenterOfGravity[1], 
           g_CenterOfGravity[2], g_LageArten, g_AnzLagen, 
-          g_AnzahlPakete, file_timestamp, file_name))
+          g_AnzahlPakete, file_timestamp, file_name,
+          line_ending, int(final_newline)))
     
     # Get ID of new metadata record for linking related data
     metadata_id = cursor.lastrowid
@@ -0,0 +1,281 @@
+"""
+Export of stored palette plans back to .rob files.
+
+The database keeps the raw value grid of every plan (table `daten`) together
+with the line format of the source file, so a stored plan can be written back
+byte-identical to the file it was parsed from. This module provides the
+serializer, a golden corpus check (parse -> store -> export -> compare) and a
+benchmark for parse, store and export throughput.
+
+Usage:
+    python -m utils.database.rob_export verify <corpus_dir>
+    python -m utils.database.rob_export benchmark <corpus_dir> [--repeat N]
+    python -m utils.database.rob_export benchmark --synthetic 200
+    python -m utils.database.rob_export export <file_name> <output_dir> [--db paletten.db]
+"""
+
+import argparse
+import logging
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+from utils.database.database import UR_ReadDataFromUsbStick, save_to_database
+
+logger = logging.getLogger(__name__)
+
+# Line format assumed for plans stored before the line format was recorded
+DEFAULT_LINE_ENDING = '\n'
+DEFAULT_FINAL_NEWLINE = True
+
+def serialize_rob(rows: List[List[int]], line_ending: str = DEFAULT_LINE_ENDING, final_newline: bool = DEFAULT_FINAL_NEWLINE) -> bytes:
+    """Serialize a .rob value grid to the tab-separated file format.
+
+    Args:
+        rows (List[List[int]]): The rows of the plan as read from the .rob file.
+        line_ending (str, optional): The line ending to use. Defaults to DEFAULT_LINE_ENDING.
+        final_newline (bool, optional): Terminate the last line. Defaults to DEFAULT_FINAL_NEWLINE.
+
+    Returns:
+        bytes: The file content.
+    """
+    content = line_ending.join('\t'.join(str(value) for value in row) for row in rows)
+    if final_newline and rows:
+        content += line_ending
+    return content.encode('ascii')
+
+def load_rob_rows(file_name: str, db_path: str = "paletten.db") -> Optional[Tuple[List[List[int]], str, bool]]:
+    """Load the raw value grid and line format of a stored plan.
+
+    Args:
+        file_name (str): Exact .rob file name of the plan.
+        db_path (str, optional): Path to the database. Defaults to "paletten.db".
+
+    Returns:
+        Optional[Tuple[List[List[int]], str, bool]]: The rows, line ending and final newline flag,
+            or None if the plan is not in the database.
+    """
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT id, line_ending, final_newline FROM paletten_metadata
+        WHERE file_name = ?
+        ''', (file_name,))
+        result = cursor.fetchone()
+        if not result:
+            conn.close()
+            return None
+        metadata_id, line_ending, final_newline = result
+
+        cursor.execute('''
+        SELECT row_index, value FROM daten
+        WHERE metadata_id = ?
+        ORDER BY row_index, col_index
+        ''', (metadata_id,))
+        rows: List[List[int]] = []
+        for row_index, value in cursor.fetchall():
+            while len(rows) <= row_index:
+                rows.append([])
+            rows[row_index].append(value)
+        conn.close()
+    except sqlite3.Error as e:
+        logger.error(f"Error loading '{file_name}' from database: {e}")
+        return None
+
+    if line_ending is None:
+        line_ending = DEFAULT_LINE_ENDING
+    final_newline = DEFAULT_FINAL_NEWLINE if final_newline is None else bool(final_newline)
+    return rows, line_ending, final_newline
+
+def export_rob_file(file_name: str, output_dir: str, db_path: str = "paletten.db") -> Optional[str]:
+    """Write a stored plan back to a .rob file.
+
+    Args:
+        file_name (str): Exact .rob file name of the plan.
+        output_dir (str): Directory to write the file to.
+        db_path (str, optional): Path to the database. Defaults to "paletten.db".
+
+    Returns:
+        Optional[str]: Path of the written file, or None if the plan is not in the database.
+    """
+    stored = load_rob_rows(file_name, db_path)
+    if stored is None:
+        logger.error(f"File '{file_name}' not found in database")
+        return None
+    rows, line_ending, final_newline = stored
+    output_path = os.path.join(output_dir, file_name)
+    with open(output_path, 'wb') as f:
+        f.write(serialize_rob(rows, line_ending, final_newline))
+    return output_path
+
+def verify_roundtrip(corpus_dir: str, db_path: Optional[str] = None) -> Dict[str, bool]:
+    """Check that every .rob file in a directory survives parse -> store -> export unchanged.
+
+    Args:
+        corpus_dir (str): Directory with the golden .rob files.
+        db_path (Optional[str], optional): Database to store into. Defaults to a temporary database.
+
+    Returns:
+        Dict[str, bool]: Mapping of file name to True if the export is byte-identical.
+    """
+    corpus_dir = os.path.join(corpus_dir, '')
+    results: Dict[str, bool] = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if db_path is None:
+            db_path = os.path.join(tmp_dir, "roundtrip.db")
+        for file_name in sorted(f for f in os.listdir(corpus_dir) if f.endswith(".rob")):
+            if not save_to_database(file_name, db_path, corpus_dir) and load_rob_rows(file_name, db_path) is None:
+                logger.error(f"{file_name}: could not be parsed and stored")
+                results[file_name] = False
+                continue
+            exported = export_rob_file(file_name, tmp_dir, db_path)
+            with open(os.path.join(corpus_dir, file_name), 'rb') as f:
+                original = f.read()
+            with open(exported, 'rb') as f:
+                roundtrip = f.read()
+            results[file_name] = original == roundtrip
+            if original != roundtrip:
+                _log_first_difference(file_name, original, roundtrip)
+    return results
+
+def _log_first_difference(file_name: str, original: bytes, roundtrip: bytes) -> None:
+    """Log the first line where the exported file differs from the original."""
+    original_lines = original.splitlines(keepends=True)
+    roundtrip_lines = roundtrip.splitlines(keepends=True)
+    for line_number, (a, b) in enumerate(zip(original_lines, roundtrip_lines), start=1):
+        if a != b:
+            logger.error(f"{file_name}: line {line_number} differs: {a!r} != {b!r}")
+            return
+    logger.error(f"{file_name}: line count differs: {len(original_lines)} != {len(roundtrip_lines)}")
+
+def benchmark(corpus_dir: str, repeat: int = 1) -> Dict[str, Dict[str, float]]:
+    """Measure parse, store and export throughput over a corpus of .rob files.
+
+    Every repetition stores into a fresh temporary database so no file is skipped
+    as already up to date.
+
+    Args:
+        corpus_dir (str): Directory with the .rob files.
+        repeat (int, optional): Number of passes over the corpus. Defaults to 1.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Per phase the total seconds, files/s and MB/s.
+    """
+    corpus_dir = os.path.join(corpus_dir, '')
+    file_names = sorted(f for f in os.listdir(corpus_dir) if f.endswith(".rob"))
+    total_bytes = sum(os.path.getsize(os.path.join(corpus_dir, f)) for f in file_names)
+    timings = {"parse": 0.0, "store": 0.0, "export": 0.0}
+
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "benchmark.db")
+
+            start = time.perf_counter()
+            for file_name in file_names:
+                UR_ReadDataFromUsbStick(file_name, corpus_dir)
+            parse_seconds = time.perf_counter() - start
+            timings["parse"] += parse_seconds
+
+            # Store includes parsing, subtract the parse time to get the database part
+            start = time.perf_counter()
+            for file_name in file_names:
+                save_to_database(file_name, db_path, corpus_dir)
+            timings["store"] += max(time.perf_counter() - start - parse_seconds, 0.0)
+
+            start = time.perf_counter()
+            for file_name in file_names:
+                export_rob_file(file_name, tmp_dir, db_path)
+            timings["export"] += time.perf_counter() - start
+
+    results = {}
+    for phase, seconds in timings.items():
+        results[phase] = {
+            "seconds": seconds,
+            "files_per_s": len(file_names) * repeat / seconds if seconds else 0.0,
+            "mb_per_s": total_bytes * repeat / seconds / 1e6 if seconds else 0.0,
+        }
+    return results
+
+def generate_synthetic_corpus(output_dir: str, count: int, seed: int = 0) -> None:
+    """Write randomly generated but structurally valid .rob files.
+
+    Args:
+        output_dir (str): Directory to write the files to.
+        count (int): Number of files to generate.
+        seed (int, optional): Random seed. Defaults to 0.
+    """
+    rng = random.Random(seed)
+    for n in range(count):
+        layer_types = rng.randint(1, 3)
+        layers = rng.randint(2, 12)
+        rows = [[1200, 800, 144], [rng.randint(150, 600), rng.randint(100, 400), rng.randint(100, 400), 0],
+                [layer_types], [layers], [0]]
+        rows += [[rng.randint(1, layer_types), rng.randint(0, 1)] for _ in range(layers)]
+        for _ in range(layer_types):
+            packages = rng.randint(4, 30)
+            rows.append([packages])
+            rows += [[rng.randint(-600, 600) for _ in range(9)] for _ in range(packages)]
+        line_ending = rng.choice(['\n', '\r\n'])
+        with open(os.path.join(output_dir, f"synthetic_{n:05d}.rob"), 'wb') as f:
+            f.write(serialize_rob(rows, line_ending, True))
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point.
+
+    Returns:
+        int: 0 on success, 1 if a round trip failed or a plan was not found.
+    """
+    parser = argparse.ArgumentParser(description="Export, round-trip check and benchmark for .rob files")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    verify_parser = subparsers.add_parser("verify", help="parse -> store -> export -> compare a golden corpus")
+    verify_parser.add_argument("corpus_dir")
+
+    benchmark_parser = subparsers.add_parser("benchmark", help="measure parse, store and export throughput")
+    benchmark_parser.add_argument("corpus_dir", nargs="?")
+    benchmark_parser.add_argument("--repeat", type=int, default=1)
+    benchmark_parser.add_argument("--synthetic", type=int, default=0, help="benchmark N generated plans instead of a corpus")
+
+    export_parser = subparsers.add_parser("export", help="write a stored plan back to a .rob file")
+    export_parser.add_argument("file_name")
+    export_parser.add_argument("output_dir")
+    export_parser.add_argument("--db", default="paletten.db")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.command == "verify":
+        results = verify_roundtrip(args.corpus_dir)
+        for file_name, identical in results.items():
+            print(f"{'OK  ' if identical else 'FAIL'} {file_name}")
+        failed = sum(1 for identical in results.values() if not identical)
+        print(f"{len(results) - failed}/{len(results)} files byte-identical")
+        return 1 if failed else 0
+
+    if args.command == "benchmark":
+        if args.synthetic:
+            with tempfile.TemporaryDirectory() as corpus_dir:
+                generate_synthetic_corpus(corpus_dir, args.synthetic)
+                results = benchmark(corpus_dir, args.repeat)
+        elif args.corpus_dir:
+            results = benchmark(args.corpus_dir, args.repeat)
+        else:
+            parser.error("benchmark needs a corpus directory or --synthetic N")
+        for phase, result in results.items():
+            print(f"{phase:<7} {result['seconds']:8.3f} s  {result['files_per_s']:10.1f} files/s  {result['mb_per_s']:8.2f} MB/s")
+        return 0
+
+    file_name = args.file_name if args.file_name.endswith(".rob") else args.file_name + ".rob"
+    output_path = export_rob_file(file_name, args.output_dir, args.db)
+    if output_path is None:
+        return 1
+    print(output_path)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
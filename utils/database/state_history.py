@@ -0,0 +1,526 @@
+"""
+Persisted history of robot state transitions for availability and OEE analysis.
+
+The history subscribes to the robot status publisher and keeps the current
+state as one open run (start time and state) in memory. On a transition the
+run is closed and queued; a background thread writes the queued runs in one
+transaction every FLUSH_INTERVAL seconds. The same transaction adds each run's
+duration to per-minute and per-hour buckets, so queries read pre-aggregated
+rows instead of every transition:
+
+    state_runs     closed runs, kept RUN_RETENTION_DAYS
+    state_minutes  seconds per minute and state, kept MINUTE_RETENTION_DAYS
+    state_hours    seconds per hour and state, kept forever
+    state_open     the open run as of the last flush, closed there after a crash
+
+A query reads whole hours from state_hours and the partial hours at the edges
+of the range from state_minutes (prorated within the edge minute), plus the
+runs still in memory. Months of history are a few thousand hour rows.
+
+    python -m utils.database.state_history report [--db robot_state.db] [--days 1]
+    python -m utils.database.state_history benchmark [--days 90]
+"""
+
+import argparse
+import logging
+import math
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from utils.system.core import global_vars
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = "robot_state.db"
+# Seconds between writes of the queued runs
+FLUSH_INTERVAL = 30.0
+RUN_RETENTION_DAYS = 30
+MINUTE_RETENTION_DAYS = 7
+MINUTE = 60
+HOUR = 3600
+DAY = 86400
+
+class StateKey(NamedTuple):
+    """The part of the robot status the history records."""
+    robot_mode: str
+    safety_status: str
+    program_state: str
+    connected: bool
+
+    @classmethod
+    def from_status(cls, status) -> "StateKey":
+        """Get the key of a RobotStatus."""
+        return cls(status.robot_mode.name, status.safety_status.name, status.program_state.name, bool(status.is_connected))
+
+    @property
+    def planned(self) -> bool:
+        """Whether the cell counts as scheduled for production: connected and powered on."""
+        return self.connected and self.robot_mode != "POWER_OFF"
+
+    @property
+    def running(self) -> bool:
+        """Whether a program is running: playing without a safety stop."""
+        return self.planned and self.program_state == "PLAYING" and self.safety_status in ("NORMAL", "REDUCED")
+
+class Run(NamedTuple):
+    """A time span in one state."""
+    start: float
+    end: float
+    state: StateKey
+
+@dataclass(frozen=True)
+class OeeReport:
+    """Overall equipment effectiveness of a time range.
+
+    Attributes:
+        planned_seconds (float): Time connected and powered on.
+        running_seconds (float): Time a program was playing without a safety stop.
+        reduced_seconds (float): Running time in REDUCED mode.
+        availability (float): running / planned.
+        performance (float): Ideal cycle time * count / running time, or the speed lost to REDUCED mode.
+        quality (float): Good / total count, 1.0 if not known.
+        oee (float): availability * performance * quality.
+    """
+    planned_seconds: float
+    running_seconds: float
+    reduced_seconds: float
+    availability: float
+    performance: float
+    quality: float
+    oee: float
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS state_runs (
+    start REAL, end REAL, robot_mode TEXT, safety_status TEXT, program_state TEXT, connected INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_state_runs_start ON state_runs(start);
+CREATE TABLE IF NOT EXISTS state_minutes (
+    bucket INTEGER, robot_mode TEXT, safety_status TEXT, program_state TEXT, connected INTEGER, seconds REAL,
+    PRIMARY KEY (bucket, robot_mode, safety_status, program_state, connected)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS state_hours (
+    bucket INTEGER, robot_mode TEXT, safety_status TEXT, program_state TEXT, connected INTEGER, seconds REAL,
+    PRIMARY KEY (bucket, robot_mode, safety_status, program_state, connected)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS state_open (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    start REAL, checkpoint REAL, robot_mode TEXT, safety_status TEXT, program_state TEXT, connected INTEGER
+);
+"""
+
+def _split(start: float, end: float, size: int) -> Iterator[Tuple[int, float]]:
+    """Split a time span into (bucket start, seconds in the bucket)."""
+    bucket = int(math.floor(start / size) * size)
+    while bucket < end:
+        seconds = min(end, bucket + size) - max(start, bucket)
+        if seconds > 0:
+            yield bucket, seconds
+        bucket += size
+
+def _clip(run: Run, start: float, end: float) -> float:
+    return max(0.0, min(run.end, end) - max(run.start, start))
+
+class StateHistory:
+    """Run-length encoded robot state history with batched SQLite persistence."""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, flush_interval: float = FLUSH_INTERVAL):
+        """Open the history database; an open run left by a crash is closed at its last checkpoint.
+
+        Args:
+            db_path (str, optional): Path to the history database. Defaults to DEFAULT_DB_PATH.
+            flush_interval (float, optional): Seconds between writes. Defaults to FLUSH_INTERVAL.
+        """
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.flushed_runs = 0
+        self._lock = threading.Lock()
+        # Held while runs move from memory to the database, so queries count each run once
+        self._flush_lock = threading.Lock()
+        self._open: Optional[Tuple[float, StateKey]] = None
+        self._pending: List[Run] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_prune = 0.0
+        conn = self._connect()
+        try:
+            conn.executescript(_SCHEMA)
+            row = conn.execute("SELECT start, checkpoint, robot_mode, safety_status, program_state, connected "
+                               "FROM state_open WHERE id = 1").fetchone()
+            if row is not None:
+                start, checkpoint = row[0], row[1]
+                if checkpoint > start:
+                    self._write(conn, [Run(start, checkpoint, StateKey(row[2], row[3], row[4], bool(row[5])))])
+                conn.execute("DELETE FROM state_open")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def start(self) -> None:
+        """Start the background writer."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._flush_loop, name="state-history", daemon=True)
+            self._thread.start()
+
+    def close(self) -> None:
+        """Stop the writer and persist everything, the open run up to now."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+        now = time.time()
+        with self._lock:
+            if self._open is not None:
+                start, state = self._open
+                if now > start:
+                    self._pending.append(Run(start, now, state))
+                self._open = (now, state)
+        self.flush(checkpoint=False)
+
+    def record(self, status, timestamp: Optional[float] = None) -> None:
+        """Record a published robot status. Never blocks on the database.
+
+        Args:
+            status (RobotStatus): The new status.
+            timestamp (Optional[float], optional): Time of the status. Defaults to now.
+        """
+        self.record_state(StateKey.from_status(status), timestamp)
+
+    def record_state(self, state: StateKey, timestamp: Optional[float] = None) -> None:
+        """Start a new run if the state differs from the open run.
+
+        Args:
+            state (StateKey): The new state.
+            timestamp (Optional[float], optional): Time of the change. Defaults to now.
+        """
+        now = time.time() if timestamp is None else timestamp
+        with self._lock:
+            if self._open is not None:
+                start, open_state = self._open
+                if open_state == state:
+                    return
+                if now > start:
+                    self._pending.append(Run(start, now, open_state))
+            self._open = (now, state)
+
+    def flush(self, checkpoint: bool = True) -> int:
+        """Write the queued runs and update the buckets in one transaction.
+
+        Args:
+            checkpoint (bool, optional): Also store the open run so a crash loses at most one interval. Defaults to True.
+
+        Returns:
+            int: The number of runs written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                runs = list(self._pending)
+                open_run = self._open
+            now = time.time()
+            conn = self._connect()
+            try:
+                with conn:
+                    self._write(conn, runs)
+                    if checkpoint and open_run is not None:
+                        start, state = open_run
+                        conn.execute("INSERT OR REPLACE INTO state_open VALUES (1, ?, ?, ?, ?, ?, ?)",
+                                     (start, now, state.robot_mode, state.safety_status, state.program_state, int(state.connected)))
+                    else:
+                        conn.execute("DELETE FROM state_open")
+                    if now - self._last_prune >= HOUR:
+                        self._prune(conn, now)
+                        self._last_prune = now
+            finally:
+                conn.close()
+            with self._lock:
+                del self._pending[:len(runs)]
+            self.flushed_runs += len(runs)
+            return len(runs)
+
+    def _write(self, conn: sqlite3.Connection, runs: Iterable[Run]) -> None:
+        minutes: Dict[Tuple, float] = defaultdict(float)
+        hours: Dict[Tuple, float] = defaultdict(float)
+        rows = []
+        for run in runs:
+            state = (run.state.robot_mode, run.state.safety_status, run.state.program_state, int(run.state.connected))
+            rows.append((run.start, run.end) + state)
+            for bucket, seconds in _split(run.start, run.end, MINUTE):
+                minutes[(bucket,) + state] += seconds
+            for bucket, seconds in _split(run.start, run.end, HOUR):
+                hours[(bucket,) + state] += seconds
+        conn.executemany("INSERT INTO state_runs VALUES (?, ?, ?, ?, ?, ?)", rows)
+        for table, buckets in (("state_minutes", minutes), ("state_hours", hours)):
+            conn.executemany(f"INSERT INTO {table} VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT DO UPDATE "
+                             f"SET seconds = seconds + excluded.seconds",
+                             [key + (seconds,) for key, seconds in buckets.items()])
+
+    def _prune(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM state_runs WHERE end < ?", (now - RUN_RETENTION_DAYS * DAY,))
+        conn.execute("DELETE FROM state_minutes WHERE bucket < ?", (now - MINUTE_RETENTION_DAYS * DAY,))
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                logger.error(f"Writing the robot state history failed: {e}")
+
+    def durations(self, start: float, end: Optional[float] = None) -> Dict[StateKey, float]:
+        """Get the seconds spent in each state within a time range.
+
+        Whole hours come from the hour buckets, the partial hours at the edges
+        from the minute buckets, prorated within the edge minutes. Edges older
+        than the minute retention are prorated within their hour.
+
+        Args:
+            start (float): Range start, seconds since the epoch.
+            end (Optional[float], optional): Range end. Defaults to now.
+
+        Returns:
+            Dict[StateKey, float]: Seconds per state.
+        """
+        end = time.time() if end is None else end
+        result: Dict[StateKey, float] = defaultdict(float)
+        if end <= start:
+            return result
+        with self._flush_lock:
+            conn = self._connect()
+            try:
+                first_hour = int(math.ceil(start / HOUR) * HOUR)
+                last_hour = int(math.floor(end / HOUR) * HOUR)
+                if first_hour < last_hour:
+                    for row in conn.execute("SELECT robot_mode, safety_status, program_state, connected, SUM(seconds) "
+                                            "FROM state_hours WHERE bucket >= ? AND bucket < ? "
+                                            "GROUP BY robot_mode, safety_status, program_state, connected",
+                                            (first_hour, last_hour)):
+                        result[StateKey(row[0], row[1], row[2], bool(row[3]))] += row[4]
+                    edges = [(start, first_hour), (last_hour, end)]
+                else:
+                    edges = [(start, end)]
+                minute_cutoff = time.time() - MINUTE_RETENTION_DAYS * DAY
+                for edge_start, edge_end in edges:
+                    if edge_end > edge_start:
+                        if edge_start >= minute_cutoff:
+                            self._add_prorated(conn, "state_minutes", MINUTE, edge_start, edge_end, result)
+                        else:
+                            self._add_prorated(conn, "state_hours", HOUR, edge_start, edge_end, result)
+            finally:
+                conn.close()
+            with self._lock:
+                runs = list(self._pending)
+                if self._open is not None:
+                    runs.append(Run(self._open[0], max(time.time(), self._open[0]), self._open[1]))
+        for run in runs:
+            seconds = _clip(run, start, end)
+            if seconds:
+                result[run.state] += seconds
+        return dict(result)
+
+    @staticmethod
+    def _add_prorated(conn: sqlite3.Connection, table: str, size: int, start: float, end: float,
+                      result: Dict[StateKey, float]) -> None:
+        for row in conn.execute(f"SELECT bucket, robot_mode, safety_status, program_state, connected, seconds "
+                                f"FROM {table} WHERE bucket > ? AND bucket < ?", (start - size, end)):
+            overlap = min(end, row[0] + size) - max(start, row[0])
+            if overlap > 0:
+                result[StateKey(row[1], row[2], row[3], bool(row[4]))] += row[5] * overlap / size
+
+    def time_in(self, start: float, end: Optional[float] = None, **match) -> float:
+        """Get the seconds spent in matching states, e.g. time_in(t0, safety_status="REDUCED").
+
+        Args:
+            start (float): Range start, seconds since the epoch.
+            end (Optional[float], optional): Range end. Defaults to now.
+            **match: StateKey fields and the values they must have.
+
+        Returns:
+            float: The seconds.
+        """
+        return sum(seconds for state, seconds in self.durations(start, end).items()
+                   if all(getattr(state, name) == value for name, value in match.items()))
+
+    def availability(self, start: float, end: Optional[float] = None) -> Optional[float]:
+        """Get running time / planned time, None if the cell was never planned in the range."""
+        report = self.oee(start, end)
+        return report.availability if report.planned_seconds else None
+
+    def oee(self, start: float, end: Optional[float] = None, ideal_cycle_time: Optional[float] = None,
+            total_count: Optional[int] = None, good_count: Optional[int] = None,
+            reduced_speed: float = 0.5) -> OeeReport:
+        """Compute the OEE of a time range.
+
+        Without counts, performance only reflects the time run in REDUCED mode
+        at `reduced_speed` of the normal speed.
+
+        Args:
+            start (float): Range start, seconds since the epoch.
+            end (Optional[float], optional): Range end. Defaults to now.
+            ideal_cycle_time (Optional[float], optional): Seconds per package at full speed. Defaults to None.
+            total_count (Optional[int], optional): Packages placed in the range. Defaults to None.
+            good_count (Optional[int], optional): Packages placed correctly. Defaults to total_count.
+            reduced_speed (float, optional): Speed in REDUCED mode relative to NORMAL. Defaults to 0.5.
+
+        Returns:
+            OeeReport: The OEE factors.
+        """
+        durations = self.durations(start, end)
+        planned = sum(seconds for state, seconds in durations.items() if state.planned)
+        running = sum(seconds for state, seconds in durations.items() if state.running)
+        reduced = sum(seconds for state, seconds in durations.items() if state.running and state.safety_status == "REDUCED")
+        availability = running / planned if planned else 0.0
+        if ideal_cycle_time is not None and total_count is not None:
+            performance = min(1.0, ideal_cycle_time * total_count / running) if running else 0.0
+        else:
+            performance = (running - reduced * (1 - reduced_speed)) / running if running else 0.0
+        quality = good_count / total_count if total_count and good_count is not None else 1.0
+        return OeeReport(planned, running, reduced, availability, performance, quality,
+                         availability * performance * quality)
+
+_history: Optional[StateHistory] = None
+
+def get_state_history() -> Optional[StateHistory]:
+    """Get the running state history, None if it is not started."""
+    return _history
+
+def start_state_history(db_path: Optional[str] = None) -> Optional[StateHistory]:
+    """Record robot status transitions into the history database.
+
+    Args:
+        db_path (Optional[str], optional): Database path. Defaults to the robot state_history_db setting.
+
+    Returns:
+        Optional[StateHistory]: The history, None if disabled in the settings or the database cannot be opened.
+    """
+    global _history
+    if _history is not None:
+        return _history
+    try:
+        robot_settings = global_vars.settings.settings['robot']
+    except (AttributeError, KeyError, TypeError):
+        robot_settings = {}
+    if not robot_settings.get('state_history', True):
+        return None
+    from utils.robot.robot_status_monitor import get_status_publisher
+    try:
+        _history = StateHistory(db_path or robot_settings.get('state_history_db') or DEFAULT_DB_PATH)
+    except sqlite3.Error as e:
+        logger.error(f"Robot state history disabled, cannot open the database: {e}")
+        return None
+    _history.start()
+    get_status_publisher().subscribe(_history.record)
+    logger.info(f"Recording robot state history in {_history.db_path}")
+    return _history
+
+def stop_state_history() -> None:
+    """Stop recording and write the remaining runs."""
+    global _history
+    if _history is None:
+        return
+    from utils.robot.robot_status_monitor import get_status_publisher
+    get_status_publisher().unsubscribe(_history.record)
+    _history.close()
+    _history = None
+
+def _format_seconds(seconds: float) -> str:
+    return f"{int(seconds // HOUR)}:{int(seconds % HOUR // MINUTE):02d}:{int(seconds % MINUTE):02d}"
+
+def _print_report(history: StateHistory, start: float, end: float) -> None:
+    began = time.perf_counter()
+    durations = history.durations(start, end)
+    report = history.oee(start, end)
+    elapsed = time.perf_counter() - began
+    for state, seconds in sorted(durations.items(), key=lambda item: -item[1]):
+        connection = "" if state.connected else " (disconnected)"
+        print(f"{_format_seconds(seconds):>12}  {state.robot_mode} / {state.safety_status} / {state.program_state}{connection}")
+    print(f"Planned {_format_seconds(report.planned_seconds)}, running {_format_seconds(report.running_seconds)}, "
+          f"in REDUCED {_format_seconds(history.time_in(start, end, safety_status='REDUCED'))}")
+    print(f"Availability {report.availability:.1%}, performance {report.performance:.1%}, "
+          f"quality {report.quality:.1%}, OEE {report.oee:.1%} ({elapsed * 1000:.1f} ms)")
+
+# Synthetic shift pattern for the benchmark: state and mean duration in seconds
+_BENCHMARK_STATES = [
+    (StateKey("RUNNING", "NORMAL", "PLAYING", True), 900),
+    (StateKey("RUNNING", "REDUCED", "PLAYING", True), 120),
+    (StateKey("RUNNING", "PROTECTIVE_STOP", "PAUSED", True), 60),
+    (StateKey("RUNNING", "NORMAL", "STOPPED", True), 300),
+    (StateKey("IDLE", "NORMAL", "STOPPED", True), 600),
+    (StateKey("POWER_OFF", "NORMAL", "STOPPED", True), 3600),
+    (StateKey("UNKNOWN", "UNKNOWN", "UNKNOWN", False), 120),
+]
+
+def benchmark(days: int = 90) -> int:
+    """Fill a temporary history with synthetic transitions and time the queries.
+
+    Returns:
+        int: 0.
+    """
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as directory:
+        history = StateHistory(os.path.join(directory, "history.db"))
+        now = time.time()
+        t = now - days * DAY
+        runs = 0
+        began = time.perf_counter()
+        while t < now:
+            state, mean = rng.choice(_BENCHMARK_STATES)
+            history.record_state(state, t)
+            t += rng.expovariate(1 / mean)
+            runs += 1
+            if runs % 5000 == 0:
+                history.flush()
+        history.flush()
+        print(f"{runs} transitions over {days} days written in {time.perf_counter() - began:.1f} s, "
+              f"database {os.path.getsize(history.db_path) / 1e6:.1f} MB")
+        for label, start in (("last hour", now - HOUR), ("today", now - DAY), ("last week", now - 7 * DAY),
+                             (f"last {days} days", now - days * DAY)):
+            timings = []
+            for _ in range(20):
+                began = time.perf_counter()
+                report = history.oee(start + rng.uniform(0, 60), now)
+                timings.append(time.perf_counter() - began)
+            timings.sort()
+            print(f"OEE {label:>16}: median {timings[10] * 1000:6.2f} ms, max {timings[-1] * 1000:6.2f} ms, "
+                  f"availability {report.availability:.1%}, OEE {report.oee:.1%}")
+    return 0
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point: print a report of the history or run the benchmark.
+
+    Returns:
+        int: 0 on success.
+    """
+    parser = argparse.ArgumentParser(description="Robot state history")
+    commands = parser.add_subparsers(dest="command", required=True)
+    report_parser = commands.add_parser("report", help="time per state, availability and OEE")
+    report_parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    report_parser.add_argument("--days", type=float, default=1.0, help="length of the range ending now")
+    benchmark_parser = commands.add_parser("benchmark", help="time queries over synthetic history")
+    benchmark_parser.add_argument("--days", type=int, default=90)
+    args = parser.parse_args(argv)
+
+    if args.command == "benchmark":
+        return benchmark(args.days)
+    if not os.path.exists(args.db):
+        print(f"{args.db} does not exist")
+        return 1
+    history = StateHistory(args.db)
+    now = time.time()
+    _print_report(history, now - args.days * DAY, now)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,284 @@
+"""
+Synchronisation of palette plans from the USB stick into the database.
+
+The USB stick directory is watched with a QFileSystemWatcher. Bursts of
+directory events (e.g. copying hundreds of plans onto the stick) are coalesced
+over a quiet period, the directory is compared against the last known snapshot
+and only new or modified .rob files are ingested into the database. The
+ingest runs in a worker thread so the GUI thread never parses plans. Every
+scan, including the startup full sync, looks at the directory twice a quiet
+period apart and leaves files that are still growing for the next scan.
+
+At startup a full sync is started in the background once the main window is
+shown, so plans already in the database can be used right away and startup
+time does not depend on the number of plans on the stick.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from PySide6.QtCore import QObject, QTimer, QFileSystemWatcher, Signal
+
+from utils.system.core import global_vars
+from utils.database.database import save_to_database, find_file_in_database
+
+logger = logging.getLogger(__name__)
+
+# Time without further directory events before a rescan is started
+QUIET_PERIOD_MS = 1500
+
+# Snapshot of a directory: file name -> (modification time, size)
+Snapshot = Dict[str, Tuple[float, int]]
+
+# Serializes the check-and-save of a plan between the background sync and on-demand loads
+_ingest_lock = threading.Lock()
+
+def scan_rob_files(path: str) -> Snapshot:
+    """Take a snapshot of all .rob files in the given directory.
+
+    Args:
+        path (str): Path to the USB stick directory.
+
+    Returns:
+        Snapshot: Mapping of file name to (modification time, size).
+    """
+    snapshot: Snapshot = {}
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.name.endswith(".rob") and entry.is_file():
+                    stat = entry.stat()
+                    snapshot[entry.name] = (stat.st_mtime, stat.st_size)
+    except OSError as e:
+        logger.error(f"Error scanning USB stick path {path}: {e}")
+    return snapshot
+
+def diff_snapshots(old: Snapshot, new: Snapshot) -> Tuple[List[str], List[str]]:
+    """Compare two directory snapshots.
+
+    Args:
+        old (Snapshot): The previous snapshot.
+        new (Snapshot): The current snapshot.
+
+    Returns:
+        Tuple[List[str], List[str]]: Sorted lists of new/modified and removed file names.
+    """
+    changed = sorted(name for name, signature in new.items() if old.get(name) != signature)
+    removed = sorted(name for name in old if name not in new)
+    return changed, removed
+
+def ingest_rob_files(file_names: List[str], path: str, progress_callback: Optional[Callable[[int, int], None]] = None) -> List[str]:
+    """Save new or modified .rob files to the database.
+
+    Files that are already up to date in the database are skipped, as are files
+    that failed to parse earlier in this session.
+
+    Args:
+        file_names (List[str]): The .rob file names to ingest.
+        path (str): Path to the USB stick directory.
+        progress_callback (Optional[Callable[[int, int], None]], optional): Called with
+            (processed, total) after each file. Defaults to None.
+
+    Returns:
+        List[str]: The file names that were added to or updated in the database.
+    """
+    # Session cache of failed files to avoid retry loops
+    if not hasattr(global_vars, 'failed_rob_files') or global_vars.failed_rob_files is None:
+        global_vars.failed_rob_files = set()
+
+    updated_files = []
+    for index, file in enumerate(file_names, start=1):
+        if _ingest_file(file, path):
+            updated_files.append(file)
+        if progress_callback:
+            progress_callback(index, len(file_names))
+    return updated_files
+
+def _ingest_file(file: str, path: str) -> bool:
+    """Save a single .rob file to the database if it is new or modified.
+
+    Returns:
+        bool: True if the file was added to or updated in the database.
+    """
+    # Skip files previously detected as broken in this session
+    if file in global_vars.failed_rob_files:
+        logger.debug(f"Skipping previously failed file: {file}")
+        return False
+    with _ingest_lock:
+        file_path = os.path.join(path, file)
+        try:
+            file_timestamp = os.path.getmtime(file_path)
+        except OSError as e:
+            logger.warning(f"File {file} disappeared before it could be processed: {e}")
+            return False
+
+        # Check if file exists in database and compare timestamps
+        db_file = find_file_in_database(file)
+        if db_file and file_timestamp <= db_file.get('timestamp', 0):
+            logger.debug(f"File {file} is up to date in database")
+            return False
+
+        logger.info(f"Processing file: {file}")
+        try:
+            if save_to_database(file, path_usb_stick=path):
+                return True
+            # Mark as failed to avoid repeated attempts within this session
+            global_vars.failed_rob_files.add(file)
+            logger.warning(f"File '{file}' not saved (parse/validation failed). Will be skipped for this session.")
+        except Exception as e:
+            logger.error(f"Error processing {file}: {e}")
+            global_vars.failed_rob_files.add(file)
+        return False
+
+class UsbPlanWatcher(QObject):
+    """Watches the USB stick directory and ingests changed plans in the background.
+
+    Signals:
+        plans_changed (list, list, list): Emitted in the GUI thread after a rescan with
+            the plan names (without .rob) that appeared, the plan names that
+            disappeared and the .rob file names that were written to the database.
+        sync_progress (int, int): Emitted during a full sync with (processed, total) files.
+        sync_finished (list): Emitted when a full sync is done with the .rob file names
+            that were written to the database; the database is fresh from then on.
+    """
+    plans_changed = Signal(list, list, list)
+    sync_progress = Signal(int, int)
+    sync_finished = Signal(list)
+    _scan_finished = Signal(object, list, list, list, bool)
+
+    def __init__(self, path: str, parent: Optional[QObject] = None, quiet_period_ms: int = QUIET_PERIOD_MS):
+        """Initialize the watcher.
+
+        Args:
+            path (str): Path to the USB stick directory.
+            parent (Optional[QObject], optional): The Qt parent. Defaults to None.
+            quiet_period_ms (int, optional): Quiet period before a rescan starts. Defaults to QUIET_PERIOD_MS.
+        """
+        super().__init__(parent)
+        self._path = path
+        self._quiet_period_ms = quiet_period_ms
+        self._snapshot: Snapshot = {}
+        self._scan_thread: Optional[threading.Thread] = None
+        self._rescan_pending = False
+        self._full_sync_requested = False
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self.schedule_rescan)
+
+        self._debounce_timer = QTimer(self)
+        self._debounce_timer.setSingleShot(True)
+        self._debounce_timer.timeout.connect(self._start_scan)
+
+        self._scan_finished.connect(self._on_scan_finished)
+        self.set_path(path)
+
+    @property
+    def snapshot(self) -> Snapshot:
+        """The last known state of the USB stick directory."""
+        return dict(self._snapshot)
+
+    def set_path(self, path: str, take_snapshot: bool = True) -> None:
+        """Watch a different directory.
+
+        Args:
+            path (str): Path to the USB stick directory.
+            take_snapshot (bool, optional): Use the current directory contents as the
+                baseline so only later changes are ingested. Defaults to True.
+        """
+        watched = self._watcher.directories()
+        if watched:
+            self._watcher.removePaths(watched)
+        self._path = path
+        if os.path.isdir(path):
+            self._watcher.addPath(path)
+        else:
+            logger.error(f"USB stick path {path} does not exist, not watching it")
+        self._snapshot = scan_rob_files(path) if take_snapshot else {}
+
+    def schedule_rescan(self, *_args) -> None:
+        """Restart the quiet period timer; the rescan runs once events stop arriving."""
+        self._debounce_timer.start(self._quiet_period_ms)
+
+    def start_full_sync(self) -> None:
+        """Check every plan on the USB stick against the database in the background."""
+        self._full_sync_requested = True
+        self._debounce_timer.stop()
+        self._start_scan()
+
+    def _start_scan(self) -> None:
+        """Start a rescan in a worker thread, or retry after another quiet period if one is running."""
+        if self._scan_thread is not None and self._scan_thread.is_alive():
+            self.schedule_rescan()
+            return
+        full_sync = self._full_sync_requested
+        self._full_sync_requested = False
+        self._rescan_pending = False
+        # A full sync compares against an empty snapshot so every file is checked
+        known_snapshot = dict(self._snapshot)
+        old_snapshot = {} if full_sync else known_snapshot
+        self._scan_thread = threading.Thread(target=self._scan_worker,
+                                             args=(self._path, old_snapshot, known_snapshot, full_sync),
+                                             daemon=True)
+        self._scan_thread.start()
+
+    def _scan_worker(self, path: str, old_snapshot: Snapshot, known_snapshot: Snapshot, full_sync: bool) -> None:
+        """Diff the directory against the old snapshot and ingest the changed files.
+
+        Runs in a worker thread; results are handed back to the GUI thread via a signal.
+        """
+        try:
+            # A copy that keeps the source modification time only shows by its growing size, and a
+            # full sync is not preceded by a quiet period of directory events, so look twice
+            first_snapshot = scan_rob_files(path)
+            time.sleep(self._quiet_period_ms / 1000)
+            new_snapshot = scan_rob_files(path)
+            growing = {name for name, signature in new_snapshot.items() if first_snapshot.get(name) != signature}
+
+            # Files modified within the quiet period may still be copied, leave them for the next scan
+            cutoff = time.time() - self._quiet_period_ms / 1000
+            still_writing = [name for name, (mtime, _) in new_snapshot.items()
+                             if name in growing or (mtime > cutoff and old_snapshot.get(name) != new_snapshot[name])]
+            for name in still_writing:
+                if name in known_snapshot:
+                    new_snapshot[name] = known_snapshot[name]
+                else:
+                    del new_snapshot[name]
+
+            changed, removed = diff_snapshots(old_snapshot, new_snapshot)
+            # Against the empty snapshot of a full sync the kept old signature still counts as a change
+            changed = [name for name in changed if name not in still_writing]
+            logger.info(f"USB rescan: {len(changed)} new/modified, {len(removed)} removed, {len(still_writing)} still being written")
+
+            # A modified file gets a new chance even if an older version failed to parse
+            failed = getattr(global_vars, 'failed_rob_files', None)
+            if failed and not full_sync:
+                failed.difference_update(changed)
+
+            progress_callback = self.sync_progress.emit if full_sync else None
+            updated_files = ingest_rob_files(changed, path, progress_callback) if changed else []
+            if still_writing:
+                self._rescan_pending = True
+            self._scan_finished.emit(new_snapshot, changed, removed, updated_files, full_sync)
+        except Exception as e:
+            logger.error(f"Error during USB rescan: {e}")
+            self._scan_finished.emit(None, [], [], [], full_sync)
+
+    def _on_scan_finished(self, new_snapshot: Optional[Snapshot], changed: List[str], removed: List[str], updated_files: List[str], full_sync: bool) -> None:
+        """Apply the scan result in the GUI thread."""
+        if new_snapshot is not None:
+            added_plans = [name[:-4] for name in changed if name not in self._snapshot]
+            removed_plans = [name[:-4] for name in self._snapshot if name not in new_snapshot]
+            self._snapshot = new_snapshot
+            if hasattr(global_vars, 'settings') and global_vars.settings:
+                global_vars.settings.settings['info']['number_of_plans'] = len(new_snapshot)
+            # The result of a full sync is reported through sync_finished instead
+            reported_files = [] if full_sync else updated_files
+            if added_plans or removed_plans or reported_files:
+                self.plans_changed.emit(added_plans, removed_plans, reported_files)
+        if full_sync:
+            self.sync_finished.emit(updated_files)
+        if self._rescan_pending:
+            self.schedule_rescan()
@@ -0,0 +1,331 @@
+"""
+Persistent, pipelined connection to the UR Dashboard Server (port 29999).
+
+The dashboard server greets every new connection with a banner line and then
+answers each command with one line, in the order the commands arrived.
+`DashboardSession` keeps one connection open on an asyncio event loop running
+in its own daemon thread. Commands are written as soon as they are submitted,
+without waiting for earlier answers, and each answer line is matched to the
+oldest outstanding command. A connection that turns out to be dead is
+replaced on the next command.
+
+`submit` returns a concurrent.futures.Future right away, so the GUI thread
+never waits for the robot; `send` is the blocking variant for worker threads.
+The remote control state is cached for REMOTE_CONTROL_TTL seconds, so the
+play/pause/stop buttons do not each add a round trip.
+
+While the robot is unreachable, connection attempts are spaced out with
+exponential backoff. Commands issued in between fail immediately with
+`DashboardUnavailable`, so a status poll does not block for a full timeout per
+command while the robot is switched off.
+"""
+
+import asyncio
+import logging
+import socket
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Deque, Dict, Optional, Tuple
+
+from utils.system.core import global_vars
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_PORT = 29999
+TIMEOUT_SECONDS = 5
+# Reconnect backoff in seconds, doubled after every failed attempt
+INITIAL_BACKOFF = 0.5
+MAX_BACKOFF = 30.0
+# Seconds the "is in remote control" answer is reused
+REMOTE_CONTROL_TTL = 2.0
+# Commands after which the dashboard server closes the connection
+CLOSING_COMMANDS = frozenset({"quit", "shutdown"})
+
+class DashboardUnavailable(OSError):
+    """Raised while reconnecting is suspended after a failed connection attempt."""
+
+class NotInRemoteControl(RuntimeError):
+    """Raised when a command needs remote control mode and the robot is in local mode."""
+
+class DashboardSession:
+    """One persistent dashboard server connection shared by all callers."""
+
+    def __init__(self, ip: Optional[str] = None, port: int = DASHBOARD_PORT, timeout: float = TIMEOUT_SECONDS):
+        """Initialize the session; the connection is opened by the first command.
+
+        Args:
+            ip (Optional[str], optional): Robot IP address. Defaults to global_vars.robot_ip at connect time.
+            port (int, optional): Dashboard server port. Defaults to DASHBOARD_PORT.
+            timeout (float, optional): Connect and response timeout in seconds. Defaults to TIMEOUT_SECONDS.
+        """
+        self._ip = ip
+        self.port = port
+        self.timeout = timeout
+        self.banner: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+        # Only touched on the event loop
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._pending: Deque[asyncio.Future] = deque()
+        self._address: Optional[Tuple[str, int]] = None
+        self._backoff = 0.0
+        self._next_attempt = 0.0
+        self._remote_control: Optional[Tuple[float, bool]] = None
+        self._remote_control_query: Optional[asyncio.Future] = None
+
+    @property
+    def ip(self) -> str:
+        """The robot IP address commands are sent to."""
+        return self._ip or global_vars.robot_ip
+
+    @property
+    def connected(self) -> bool:
+        """Whether a connection is open; it may still turn out to be dead."""
+        return self._writer is not None
+
+    def submit(self, command: str, timeout: Optional[float] = None) -> "Future[str]":
+        """Send a command without waiting for the answer.
+
+        Args:
+            command (str): The dashboard command without newline.
+            timeout (Optional[float], optional): Connect and response timeout in seconds for this
+                command. Defaults to the session timeout.
+
+        Returns:
+            Future[str]: Resolves to the response line, or fails with DashboardUnavailable
+                or another OSError if the robot cannot be reached or does not answer in time.
+        """
+        return asyncio.run_coroutine_threadsafe(self._send(command, timeout), self._ensure_loop())
+
+    def send(self, command: str, timeout: Optional[float] = None) -> str:
+        """Send a command and wait for its response line. Do not call from the GUI thread.
+
+        Args:
+            command (str): The dashboard command without newline.
+            timeout (Optional[float], optional): Connect and response timeout in seconds for this
+                command. Defaults to the session timeout.
+
+        Raises:
+            DashboardUnavailable: While waiting to reconnect after a failed attempt.
+            OSError: If the robot cannot be reached or does not answer in time.
+
+        Returns:
+            str: The response without the line ending.
+        """
+        return self.submit(command, timeout).result()
+
+    def remote_control(self, max_age: float = REMOTE_CONTROL_TTL) -> "Future[bool]":
+        """Get whether the robot is in remote control mode, from the cache if the answer is recent.
+
+        Concurrent queries share one request.
+
+        Args:
+            max_age (float, optional): Seconds a cached answer is reused. Defaults to REMOTE_CONTROL_TTL.
+
+        Returns:
+            Future[bool]: Resolves to True in remote control mode, False otherwise or if unreachable.
+        """
+        return asyncio.run_coroutine_threadsafe(self._is_in_remote_control(max_age), self._ensure_loop())
+
+    def submit_remote(self, command: str) -> "Future[str]":
+        """Send a command that needs remote control mode.
+
+        Args:
+            command (str): The dashboard command without newline.
+
+        Returns:
+            Future[str]: Resolves to the response line, or fails with NotInRemoteControl if
+                the robot is in local mode, or with an OSError like `submit`.
+        """
+        return asyncio.run_coroutine_threadsafe(self._send_remote(command), self._ensure_loop())
+
+    def close(self) -> None:
+        """Close the connection; the next command opens a new one."""
+        loop = self._loop
+        if loop is not None and loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._close(), loop).result(timeout=self.timeout)
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="dashboard-io", daemon=True).start()
+            return self._loop
+
+    async def _send(self, command: str, timeout: Optional[float] = None) -> str:
+        if timeout is None:
+            timeout = self.timeout
+        reused = self._writer is not None and self._address == (self.ip, self.port)
+        try:
+            response = await self._exchange(command, timeout)
+        except DashboardUnavailable:
+            raise
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            if not reused:
+                self.last_error = str(e)
+                raise
+            # The kept connection was dead (robot rebooted, cable replugged); try a fresh one once
+            logger.info(f"Dashboard connection lost ({e}), reconnecting")
+            try:
+                response = await self._exchange(command, timeout)
+            except OSError as retry_error:
+                self.last_error = str(retry_error)
+                raise
+        except OSError as e:
+            self.last_error = str(e)
+            raise
+        self.last_error = None
+        if command.strip().lower() in CLOSING_COMMANDS:
+            await self._close()
+        return response
+
+    async def _exchange(self, command: str, timeout: float) -> str:
+        if self._writer is None or self._address != (self.ip, self.port):
+            await self._connect(timeout)
+        writer = self._writer
+        answer = asyncio.get_running_loop().create_future()
+        self._pending.append(answer)
+        try:
+            writer.write((command + "\n").encode("utf-8"))
+            await writer.drain()
+            return await asyncio.wait_for(asyncio.shield(answer), timeout)
+        except asyncio.TimeoutError:
+            # A late answer would be matched to the next command; start over on a new connection
+            error = socket.timeout(f"No answer to {command!r} within {timeout} s")
+            answer.cancel()
+            if self._writer is writer:
+                await self._close(error)
+            raise error
+        except OSError as e:
+            if self._writer is writer:
+                await self._close(e)
+            raise
+
+    async def _connect(self, timeout: float) -> None:
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self._writer is not None and self._address == (self.ip, self.port):
+                return
+            await self._close()
+            now = time.monotonic()
+            if now < self._next_attempt:
+                raise DashboardUnavailable(f"Robot at {self.ip}:{self.port} unreachable, "
+                                           f"retrying in {self._next_attempt - now:.1f} s")
+            address = (self.ip, self.port)
+            try:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(*address), timeout)
+                self.banner = (await asyncio.wait_for(reader.readline(), timeout)).decode("utf-8", errors="replace").strip()
+            except asyncio.TimeoutError:
+                self._back_off()
+                raise socket.timeout(f"Connection timeout to robot at {address[0]}:{address[1]}")
+            except OSError:
+                self._back_off()
+                raise
+            sock = writer.get_extra_info("socket")
+            if sock is not None:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._reader, self._writer, self._address = reader, writer, address
+            self._reader_task = asyncio.get_running_loop().create_task(self._read_answers(reader))
+            self._backoff = 0.0
+            self._next_attempt = 0.0
+            logger.info(f"Connected to dashboard server at {address[0]}:{address[1]}: {self.banner}")
+
+    def _back_off(self) -> None:
+        self._backoff = min(MAX_BACKOFF, self._backoff * 2 if self._backoff else INITIAL_BACKOFF)
+        self._next_attempt = time.monotonic() + self._backoff
+
+    async def _read_answers(self, reader: asyncio.StreamReader) -> None:
+        """Resolve the outstanding commands in order with the answer lines."""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    raise ConnectionResetError("Dashboard server closed the connection")
+                if not self._pending:
+                    logger.warning(f"Unexpected dashboard answer: {line!r}")
+                    continue
+                answer = self._pending.popleft()
+                if not answer.done():
+                    answer.set_result(line.decode("utf-8", errors="replace").strip())
+        except asyncio.CancelledError:
+            raise
+        except OSError as e:
+            if self._reader is reader:
+                await self._close(e)
+
+    async def _close(self, error: Optional[BaseException] = None) -> None:
+        """Close the connection and fail the outstanding commands."""
+        writer, task = self._writer, self._reader_task
+        self._reader = self._writer = self._reader_task = None
+        pending, self._pending = self._pending, deque()
+        for answer in pending:
+            if not answer.done():
+                answer.set_exception(error or ConnectionResetError("Dashboard connection closed"))
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def _is_in_remote_control(self, max_age: float) -> bool:
+        cached = self._remote_control
+        if cached is not None and time.monotonic() - cached[0] < max_age:
+            return cached[1]
+        if self._remote_control_query is None:
+            self._remote_control_query = asyncio.ensure_future(self._query_remote_control())
+        query = self._remote_control_query
+        try:
+            return await asyncio.shield(query)
+        finally:
+            if query.done() and self._remote_control_query is query:
+                self._remote_control_query = None
+
+    async def _query_remote_control(self) -> bool:
+        try:
+            remote = (await self._send("is in remote control")).lower() == "true"
+        except OSError as e:
+            logger.error(f"Error checking remote control status: {e}")
+            return False
+        self._remote_control = (time.monotonic(), remote)
+        return remote
+
+    async def _send_remote(self, command: str) -> str:
+        if not await self._is_in_remote_control(REMOTE_CONTROL_TTL):
+            raise NotInRemoteControl("Robot not in remote control mode")
+        return await self._send(command)
+
+_sessions: Dict[Tuple[Optional[str], int], DashboardSession] = {}
+_sessions_lock = threading.Lock()
+
+def get_dashboard_session(ip: Optional[str] = None, port: int = DASHBOARD_PORT) -> DashboardSession:
+    """Get the shared session for a dashboard server.
+
+    Args:
+        ip (Optional[str], optional): Robot IP address. Defaults to global_vars.robot_ip.
+        port (int, optional): Dashboard server port. Defaults to DASHBOARD_PORT.
+
+    Returns:
+        DashboardSession: The session, created on first use.
+    """
+    with _sessions_lock:
+        session = _sessions.get((ip, port))
+        if session is None:
+            session = _sessions[(ip, port)] = DashboardSession(ip, port)
+        return session
+
+def close_dashboard_sessions() -> None:
+    """Close all dashboard connections."""
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+    for session in sessions:
+        session.close()
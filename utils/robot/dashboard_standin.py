@@ -0,0 +1,304 @@
+"""
+Local stand-in for the UR Dashboard Server, for integration checks and benchmarks.
+
+The stand-in greets every connection with the controller's welcome banner and
+answers the commands the application sends (robotmode, safetystatus,
+programstate, play/pause/stop, is in remote control, PolyscopeVersion, get
+serial number, ...) with the controller's answer lines. Answers are delayed by
+a configurable latency, counted from when the command was received, so
+pipelined commands overlap like on a real network. A fraction of commands can
+be dropped (never answered), and a script of timed state changes plays a
+palletizing cycle.
+
+    python -m utils.robot.dashboard_standin --port 29999 --latency 0.02 --drop-rate 0.01 --script cycle.jsonl
+
+tests/test_dashboard_standin.py runs the status monitor and a dashboard
+session against the stand-in.
+"""
+
+import argparse
+import json
+import queue
+import random
+import socket
+import socketserver
+import sys
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .dashboard_client import DASHBOARD_PORT
+
+BANNER = "Connected: Universal Robots Dashboard Server"
+
+@dataclass
+class StandInState:
+    """The simulated controller state, as the dashboard server reports it."""
+    robotmode: str = "IDLE"
+    safetystatus: str = "NORMAL"
+    programstate: str = "STOPPED"
+    program: str = "/programs/multipack.urp"
+    remote_control: bool = True
+    serial_number: str = "20205500001"
+    polyscope_version: str = "URSoftware 5.11.1.108318 (Nov 05 2021)"
+
+@dataclass(frozen=True)
+class ScriptStep:
+    """A state change `at` seconds after the script started.
+
+    Attributes:
+        at (float): Seconds after start.
+        changes (Dict[str, object]): StandInState fields to set.
+    """
+    at: float
+    changes: Dict[str, object] = field(default_factory=dict)
+
+# A palletizing cycle: idle, running, safety zone entered (REDUCED), protective stop, recovered
+DEMO_SCRIPT: List[ScriptStep] = [
+    ScriptStep(0.0, {"robotmode": "IDLE", "safetystatus": "NORMAL", "programstate": "STOPPED"}),
+    ScriptStep(0.3, {"robotmode": "RUNNING"}),
+    ScriptStep(0.6, {"programstate": "PLAYING"}),
+    ScriptStep(0.9, {"safetystatus": "REDUCED"}),
+    ScriptStep(1.2, {"safetystatus": "PROTECTIVE_STOP", "programstate": "PAUSED"}),
+    ScriptStep(1.5, {"safetystatus": "NORMAL", "programstate": "PLAYING"}),
+]
+
+def load_script(path: str) -> List[ScriptStep]:
+    """Read a script, one JSON object per line, e.g. {"at": 1.5, "safetystatus": "REDUCED"}."""
+    steps = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                changes = json.loads(line)
+                steps.append(ScriptStep(float(changes.pop("at")), changes))
+    return steps
+
+class _StandInHandler(socketserver.StreamRequestHandler):
+    """Answers one dashboard client; a writer thread sends each answer when its latency has passed."""
+    disable_nagle_algorithm = True
+
+    def handle(self) -> None:
+        self.server._connections.add(self)
+        answers: "queue.Queue[Optional[Tuple[float, str]]]" = queue.Queue()
+        writer = threading.Thread(target=self._write_answers, args=(answers,), daemon=True)
+        writer.start()
+        answers.put((0.0, BANNER))
+        try:
+            for line in self.rfile:
+                command = line.decode("utf-8", errors="replace").strip()
+                if not command:
+                    continue
+                answer = self.server.answer(command)
+                if answer is not None:
+                    answers.put((time.monotonic() + self.server.next_latency(), answer))
+                if command.lower() in ("quit", "shutdown"):
+                    break
+        except OSError:
+            pass
+        finally:
+            answers.put(None)
+            writer.join(timeout=1)
+            self.server._connections.discard(self)
+
+    def _write_answers(self, answers: "queue.Queue[Optional[Tuple[float, str]]]") -> None:
+        while True:
+            item = answers.get()
+            if item is None:
+                return
+            due, answer = item
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                self.wfile.write((answer + "\n").encode("utf-8"))
+            except OSError:
+                return
+
+class DashboardStandIn(socketserver.ThreadingTCPServer):
+    """Local dashboard server with scriptable state, latency and dropped answers."""
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, addr: Tuple[str, int] = ("127.0.0.1", 0), state: Optional[StandInState] = None,
+                 latency: float = 0.0, jitter: float = 0.0, drop_rate: float = 0.0,
+                 script: Sequence[ScriptStep] = ()):
+        """Initialize the stand-in.
+
+        Args:
+            addr (Tuple[str, int], optional): Address to listen on. Defaults to an ephemeral local port.
+            state (Optional[StandInState], optional): Initial controller state. Defaults to an idle robot.
+            latency (float, optional): Seconds until a command is answered. Defaults to 0.0.
+            jitter (float, optional): Random seconds added to the latency. Defaults to 0.0.
+            drop_rate (float, optional): Fraction of commands never answered. Defaults to 0.0.
+            script (Sequence[ScriptStep], optional): State changes played after `start`. Defaults to none.
+        """
+        super().__init__(addr, _StandInHandler)
+        self.state = state or StandInState()
+        self.latency = latency
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.script = list(script)
+        self.commands: Dict[str, int] = {}
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._connections: set = set()
+        self._stop = threading.Event()
+
+    @property
+    def port(self) -> int:
+        """The port the stand-in listens on."""
+        return self.server_address[1]
+
+    def start(self) -> int:
+        """Serve and play the script on daemon threads.
+
+        Returns:
+            int: The port.
+        """
+        threading.Thread(target=self.serve_forever, name="dashboard-standin", daemon=True).start()
+        if self.script:
+            threading.Thread(target=self._play_script, name="dashboard-standin-script", daemon=True).start()
+        return self.port
+
+    def stop(self) -> None:
+        """Stop serving and close all connections."""
+        self._stop.set()
+        self.shutdown()
+        self.close_connections()
+        self.server_close()
+
+    def set_state(self, **changes) -> None:
+        """Change the simulated controller state, e.g. set_state(safetystatus="REDUCED")."""
+        with self._lock:
+            self.state = replace(self.state, **changes)
+
+    def close_connections(self) -> None:
+        """Drop all client connections, like a cable pulled or the controller rebooting."""
+        for handler in list(self._connections):
+            try:
+                handler.connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def next_latency(self) -> float:
+        """Get the answer delay of the next command."""
+        return self.latency + (random.uniform(0.0, self.jitter) if self.jitter else 0.0)
+
+    def answer(self, command: str) -> Optional[str]:
+        """Get the controller's answer to a command.
+
+        Args:
+            command (str): The command line without newline.
+
+        Returns:
+            Optional[str]: The answer line, None if the command is dropped.
+        """
+        with self._lock:
+            key = "load" if command.lower().startswith("load ") else command.lower()
+            self.commands[key] = self.commands.get(key, 0) + 1
+            if self.drop_rate and random.random() < self.drop_rate:
+                self.dropped += 1
+                return None
+            return self._answer(command)
+
+    def _answer(self, command: str) -> str:
+        state = self.state
+        lower = command.lower()
+        if lower == "robotmode":
+            return f"Robotmode: {state.robotmode}"
+        if lower == "safetystatus":
+            return f"Safetystatus: {state.safetystatus}"
+        if lower == "programstate":
+            return f"{state.programstate} {state.program.rsplit('/', 1)[-1] if state.program else '<unnamed>'}"
+        if lower == "is in remote control":
+            return "true" if state.remote_control else "false"
+        if lower == "polyscopeversion":
+            return state.polyscope_version
+        if lower == "get serial number":
+            return state.serial_number
+        if lower == "get loaded program":
+            return f"Loaded program: {state.program}" if state.program else "No program loaded"
+        if lower in ("play", "pause", "stop"):
+            return self._program_command(lower)
+        if lower.startswith("load "):
+            if not state.remote_control:
+                return "Command is not allowed due to safety reasons"
+            self.state = replace(state, program=command[5:].strip(), programstate="STOPPED")
+            return f"Loading program: {command[5:].strip()}"
+        if lower == "power on":
+            self.state = replace(state, robotmode="IDLE")
+            return "Powering on"
+        if lower == "power off":
+            self.state = replace(state, robotmode="POWER_OFF", programstate="STOPPED")
+            return "Powering off"
+        if lower == "brake release":
+            self.state = replace(state, robotmode="RUNNING")
+            return "Brake releasing"
+        if lower == "unlock protective stop":
+            self.state = replace(state, safetystatus="NORMAL")
+            return "Protective stop releasing"
+        if lower == "close safety popup":
+            return "closing safety popup"
+        if lower in ("quit", "shutdown"):
+            return "Disconnected" if lower == "quit" else "Shutting down"
+        return f"could not understand: '{command}'"
+
+    def _program_command(self, command: str) -> str:
+        state = self.state
+        if not state.remote_control:
+            return "Command is not allowed due to safety reasons"
+        if command == "play":
+            if state.robotmode != "RUNNING" or state.safetystatus != "NORMAL" or not state.program:
+                return "Failed to execute: play"
+            self.state = replace(state, programstate="PLAYING")
+            return "Starting program"
+        if command == "pause":
+            if state.programstate != "PLAYING":
+                return "Failed to execute: pause"
+            self.state = replace(state, programstate="PAUSED")
+            return "Pausing program"
+        self.state = replace(state, programstate="STOPPED")
+        return "Stopped"
+
+    def _play_script(self) -> None:
+        start = time.monotonic()
+        for step in sorted(self.script, key=lambda s: s.at):
+            if self._stop.wait(max(0.0, start + step.at - time.monotonic())):
+                return
+            self.set_state(**step.changes)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point: serve the stand-in.
+
+    Returns:
+        int: 0 on success.
+    """
+    parser = argparse.ArgumentParser(description="UR dashboard server stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DASHBOARD_PORT)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds until a command is answered")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random seconds added to the latency")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="fraction of commands never answered")
+    parser.add_argument("--script", help="state changes, one JSON object per line; --demo plays a palletizing cycle")
+    parser.add_argument("--demo", action="store_true", help="play the demo palletizing cycle")
+    parser.add_argument("--local", action="store_true", help="start in local mode instead of remote control")
+    args = parser.parse_args(argv)
+
+    script = load_script(args.script) if args.script else DEMO_SCRIPT if args.demo else []
+    standin = DashboardStandIn((args.host, args.port), StandInState(remote_control=not args.local),
+                               args.latency, args.jitter, args.drop_rate, script)
+    print(f"Dashboard stand-in listening on {args.host}:{standin.port}")
+    standin.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        standin.stop()
+        print(f"Commands: {standin.commands}, dropped {standin.dropped}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+Adaptive poll interval for the dashboard status monitor.
+
+A robot running a program or in a non-normal safety state is polled fast, an
+idle robot slowly. While the robot is unreachable the interval grows
+exponentially with random jitter, so several panels that lost the same robot
+do not all retry at the same moment.
+"""
+
+import random
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Tuple
+
+from .robot_enums import ProgramState, SafetyStatus
+
+if TYPE_CHECKING:
+    from .robot_status_monitor import RobotStatus
+
+# Failed polls after which the retry interval stops doubling; far beyond any sensible max_backoff
+MAX_DOUBLINGS = 32
+
+@dataclass(frozen=True)
+class PollingPolicy:
+    """Poll intervals in seconds.
+
+    Attributes:
+        active_interval (float): While a program is playing or safety is not NORMAL.
+        idle_interval (float): While the robot is connected and idle.
+        initial_backoff (float): First retry interval after the robot became unreachable.
+        max_backoff (float): Upper limit of the retry interval.
+        jitter (float): Random fraction added to or removed from the retry interval, which
+            still stays within max_backoff.
+    """
+    active_interval: float = 0.5
+    idle_interval: float = 5.0
+    initial_backoff: float = 1.0
+    max_backoff: float = 30.0
+    jitter: float = 0.2
+
+    @classmethod
+    def from_settings(cls, robot_settings: dict) -> "PollingPolicy":
+        """Build a policy from the robot settings group, using the defaults for missing keys.
+
+        Args:
+            robot_settings (dict): The robot settings group.
+
+        Returns:
+            PollingPolicy: The policy.
+        """
+        default = cls()
+        return cls(
+            active_interval=float(robot_settings.get('poll_active_interval', default.active_interval)),
+            idle_interval=float(robot_settings.get('poll_idle_interval', default.idle_interval)),
+            initial_backoff=float(robot_settings.get('poll_initial_backoff', default.initial_backoff)),
+            max_backoff=float(robot_settings.get('poll_max_backoff', default.max_backoff)),
+            jitter=float(robot_settings.get('poll_jitter', default.jitter)),
+        )
+
+    def next_interval(self, status: 'RobotStatus', failures: int) -> Tuple[float, str]:
+        """Get the time until the next poll.
+
+        Args:
+            status (RobotStatus): The status of the last poll.
+            failures (int): Consecutive polls that reached no robot.
+
+        Returns:
+            Tuple[float, str]: The interval in seconds and the reason, for display.
+        """
+        if not status.is_connected:
+            # Bounded exponent: a robot switched off overnight reaches thousands of failures
+            backoff = self.initial_backoff * 2.0 ** min(max(0, failures - 1), MAX_DOUBLINGS)
+            backoff = min(self.max_backoff, backoff) * (1 + random.uniform(-self.jitter, self.jitter))
+            return max(self.active_interval, min(self.max_backoff, backoff)), "disconnected"
+        if status.program_state == ProgramState.PLAYING:
+            return self.active_interval, "program playing"
+        if status.safety_status != SafetyStatus.NORMAL:
+            return self.active_interval, f"safety {status.safety_status.name}"
+        return self.idle_interval, "idle"
@@ -1,167 +1,99 @@
-import socket
 import logging
 import os
+from concurrent.futures import Future
+from typing import Optional
 from utils.system.core import global_vars
-from utils.database.database import save_to_database, find_file_in_database, list_available_files
+from utils.database.database import list_available_files
+from utils.database.usb_sync import ingest_rob_files
+from utils.robot.dashboard_client import NotInRemoteControl, get_dashboard_session
 from utils.message.status_manager import update_status_label
-from PySide6.QtCore import Qt, QTimer
+from PySide6.QtCore import Qt, QTimer, QObject, Signal
 from PySide6.QtWidgets import QDialog, QVBoxLayout, QLabel, QListWidget, QPushButton
 
 logger = logging.getLogger(__name__)
 
+class DashboardSignals(QObject):
+    """Signals carrying dashboard command results to the GUI thread.
+
+    Args:
+        QObject (QObject): The parent class of the signals.
+    """
+    status_message = Signal(str, str)  # text, color
+
+dashboard_signals = DashboardSignals()
+dashboard_signals.status_message.connect(lambda text, color: update_status_label(text, color, True))
+
 def is_in_remote_control() -> bool:
-    """Check if the robot is in remote control mode.
+    """Check if the robot is in remote control mode. Blocks; not for the GUI thread.
     
     Returns:
         bool: True if robot is in remote control mode, False otherwise
     """
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    try:
-        # Connect to the dashboard server
-        server_address = (global_vars.robot_ip, 29999)
-        logger.debug('connecting to %s port %s' %(server_address))
-        sock.connect(server_address)
-        
-        # Send polyscope command to check remote control status
-        message = 'is in remote control\n'
-        logger.debug('sending %s' %(message))
-        sock.sendall(message.encode('utf-8'))
-        
-        # Get response
-        data = sock.recv(4096).decode('utf-8')
-        logger.debug('received %s' %(data))
-        
-        # Response will be "true" if in remote control
-        return data.strip().lower() == "true"
-        
-    except Exception as e:
-        logger.error(f"Error checking remote control status: {e}")
-        return False
-    finally:
-        logger.debug('closing socket')
-        sock.close()
+    return get_dashboard_session().remote_control().result()
+
+def _send_remote_command(command: str, success_text: Optional[str] = None) -> "Future[str]":
+    """Send a command that needs remote control mode without blocking the caller.
+
+    The result is reported on the status label through dashboard_signals, and the
+    status monitor polls right away to show the effect of the command.
+
+    Args:
+        command (str): The dashboard command.
+        success_text (Optional[str], optional): Shown if the answer contains "Successfully";
+            None reports only failures. Defaults to None.
+
+    Returns:
+        Future[str]: Resolves to the dashboard answer.
+    """
+    logger.debug('sending %s' % command)
 
-def send_remote_control_command() -> None:
+    def report(future: "Future[str]") -> None:
+        monitor = global_vars.robot_status_monitor
+        if monitor is not None:
+            monitor.request_poll()
+        try:
+            response = future.result()
+        except NotInRemoteControl:
+            logger.error("Cannot send command - robot not in remote control mode")
+            dashboard_signals.status_message.emit("Robot not in remote control mode", "red")
+            return
+        except OSError as e:
+            logger.error(f"Error sending dashboard command {command!r}: {e}")
+            dashboard_signals.status_message.emit("Error sending command", "red")
+            return
+        logger.debug('received %s' % response)
+        if success_text is None:
+            return
+        if "Successfully" in response:
+            dashboard_signals.status_message.emit(success_text, "green")
+        else:
+            dashboard_signals.status_message.emit("Error sending command", "red")
+
+    future = get_dashboard_session().submit_remote(command)
+    future.add_done_callback(report)
+    return future
+
+def send_remote_control_command() -> "Future[str]":
     """Send the selected remote control command to the robot.
     First checks if robot is in remote control mode.
     """
-    if not is_in_remote_control():
-        logger.error("Cannot send command - robot not in remote control mode")
-        update_status_label("Robot not in remote control mode", "red", True)
-        return
-        
     command = global_vars.ui.comboBoxCommandRemoteControl.currentText()
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    try:
-        # Connect to the dashboard server
-        server_address = (global_vars.robot_ip, 29999)
-        logger.debug('connecting to %s port %s' %(server_address))
-        sock.connect(server_address)
-        
-        # Send command
-        message = command + '\n'
-        logger.debug('sending %s' %(message))
-        sock.sendall(message.encode('utf-8'))
-        
-        # Get response
-        data = sock.recv(4096).decode('utf-8')
-        logger.debug('received %s' %(data))
-        
-        if "Successfully" in data:
-            update_status_label("Command sent successfully", "green", True)
-        else:
-            update_status_label("Error sending command", "red", True)
-            
-    except Exception as e:
-        logger.error(f"Error sending remote control command: {e}")
-        update_status_label("Error sending command", "red", True)
-    finally:
-        logger.debug('closing socket')
-        sock.close()
+    return _send_remote_command(command, "Command sent successfully")
 
-def send_cmd_play() -> None:
+def send_cmd_play() -> "Future[str]":
     """Send a command to the robot to start.
     """
-    if not is_in_remote_control():
-        logger.error("Cannot send command - robot not in remote control mode")
-        update_status_label("Robot not in remote control mode", "red", True)
-        return
-        
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    try:
-        # Connect the socket to the port where the server is listening
-        server_address = (global_vars.robot_ip, 29999)
-        logger.debug('connecting to %s port %s' %(server_address))
-        sock.connect(server_address)
-        
-        # Send data
-        message = 'play\n'
-        logger.debug('sending %s' %(message))
-        sock.sendall(message.encode('utf-8'))
-        
-        # Print any response
-        data = sock.recv(4096)
-        logger.debug('received %s' %(data))
-        
-    finally:
-        logger.debug('closing socket')
-        sock.close()
+    return _send_remote_command('play')
 
-def send_cmd_pause() -> None:
+def send_cmd_pause() -> "Future[str]":
     """Send a command to the robot to pause.
     """
-    if not is_in_remote_control():
-        logger.error("Cannot send command - robot not in remote control mode")
-        update_status_label("Robot not in remote control mode", "red", True)
-        return
-        
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    try:
-        # Connect the socket to the port where the server is listening
-        server_address = (global_vars.robot_ip, 29999)
-        logger.debug('connecting to %s port %s' %(server_address))
-        sock.connect(server_address)
-        
-        # Send data
-        message = 'pause\n'
-        logger.debug('sending %s' %(message))
-        sock.sendall(message.encode('utf-8'))
-        
-        # Print any response
-        data = sock.recv(4096)
-        logger.debug('received %s' %(data))
-        
-    finally:
-        logger.debug('closing socket')
-        sock.close()
+    return _send_remote_command('pause')
 
-def send_cmd_stop() -> None:
+def send_cmd_stop() -> "Future[str]":
     """Send a command to the robot to stop.
     """
-    if not is_in_remote_control():
-        logger.error("Cannot send command - robot not in remote control mode")
-        update_status_label("Robot not in remote control mode", "red", True)
-        return
-        
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    try:
-        # Connect the socket to the port where the server is listening
-        server_address = (global_vars.robot_ip, 29999)
-        logger.debug('connecting to %s port %s' %(server_address))
-        sock.connect(server_address)
-        
-        # Send data
-        message = 'stop\n'
-        logger.debug('sending %s' %(message))
-        sock.sendall(message.encode('utf-8'))
-        
-        # Print any response
-        data = sock.recv(4096)
-        logger.debug('received %s' %(data))
-        
-    finally:
-        logger.debug('closing socket')
-        sock.close()
+    return _send_remote_command('stop')
 
 def Check_Einzelpaket_längs_greifen(package_length: int) -> None:
     """Automatically check if package should be gripped lengthwise based on package length.
@@ -201,12 +133,18 @@ def load() -> None:
     
     # Check if the input exactly matches a valid palette plan
     available_files = list_available_files()
-    if not available_files:
+    valid_plans = [file['file_name'].replace('.rob', '') for file in available_files]
+
+    # The plan may be on the USB stick but not yet reached by the background sync
+    if Artikelnummer not in valid_plans and os.path.exists(os.path.join(global_vars.PATH_USB_STICK, Artikelnummer + ".rob")):
+        if ingest_rob_files([Artikelnummer + ".rob"], global_vars.PATH_USB_STICK):
+            valid_plans.append(Artikelnummer)
+
+    if not valid_plans:
         logger.error("No palette plans found in database")
         update_status_label("Keine Palettenpläne gefunden", "red", True)
         return
-        
-    valid_plans = [file['file_name'].replace('.rob', '') for file in available_files]
+
     if Artikelnummer not in valid_plans:
         logger.warning(f"Palette plan {Artikelnummer} not found in available plans")
         update_status_label("Kein Plan gefunden", "red", True)
@@ -377,93 +315,11 @@ def _schedule_db_update_popup(new_files) -> None:
     global_vars.db_update_timer.start(2000)
 
 
-def update_database_from_usb() -> None:
-    """Update the database with any new or modified palette plans from the USB stick.
-
-    Provides UI feedback when the main window is available:
-    - Shows a blinking orange status while updating
-    - Sets a wait cursor during the operation
-    - Shows a green status on completion or red on errors
-    """
-    # Determine if we can give UI feedback (only when main window exists and is visible)
-    ui_ready = bool(getattr(global_vars, 'main_window', None)) and global_vars.main_window.isVisible()
-
-    try:
-        if not os.path.exists(global_vars.PATH_USB_STICK):
-            logger.error(f"USB stick path {global_vars.PATH_USB_STICK} does not exist")
-            # Do not show status messages; silently return if no UI
-            return
-
-        # Start UI feedback
-        if ui_ready:
-            try:
-                global_vars.main_window.setCursor(Qt.CursorShape.WaitCursor)
-            except Exception:
-                pass
-
-        # Get all .rob files
-        rob_files = [f for f in os.listdir(global_vars.PATH_USB_STICK) if f.endswith(".rob")]
-        logger.info(f"Found {len(rob_files)} .rob files to process")
-        updated_files = []
-
-        # Session cache of failed files to avoid retry loops
-        if not hasattr(global_vars, 'failed_rob_files') or global_vars.failed_rob_files is None:
-            global_vars.failed_rob_files = set()
-
-        for file in rob_files:
-            # Skip files previously detected as broken in this session
-            if file in getattr(global_vars, 'failed_rob_files', set()):
-                logger.debug(f"Skipping previously failed file: {file}")
-                continue
-            file_path = os.path.join(global_vars.PATH_USB_STICK, file)
-            file_timestamp = os.path.getmtime(file_path)
-
-            # Check if file exists in database and compare timestamps
-            db_file = find_file_in_database(file)
-            should_update = True
-
-            if db_file:
-                db_timestamp = db_file.get('timestamp', 0)
-                if file_timestamp <= db_timestamp:
-                    logger.debug(f"File {file} is up to date in database")
-                    should_update = False
-
-            # Update if file is new or modified
-            if should_update:
-                logger.info(f"Processing file: {file}")
-                try:
-                    saved = save_to_database(file)
-                    if saved:
-                        updated_files.append(file)
-                    else:
-                        # Mark as failed to avoid repeated attempts within this session
-                        getattr(global_vars, 'failed_rob_files', set()).add(file)
-                        logger.warning(f"File '{file}' not saved (parse/validation failed). Will be skipped for this session.")
-                except Exception as e:
-                    logger.error(f"Error processing {file}: {e}")
-                    # Mark as failed to avoid repeated attempts within this session
-                    getattr(global_vars, 'failed_rob_files', set()).add(file)
-
-        # Update UI 3D list if needed
-        if hasattr(global_vars, 'ui') and global_vars.ui:
-            from ui_files.visualization_3d import load_rob_files
-            load_rob_files()
-
-        # After processing, batch filenames into the grouped popup flow (debounced)
-        if ui_ready and updated_files:
-            _schedule_db_update_popup(updated_files)
-
-    except Exception as e:
-        logger.error(f"Unexpected error while updating database: {e}")
-    finally:
-        if ui_ready:
-            try:
-                global_vars.main_window.setCursor(Qt.CursorShape.ArrowCursor)
-            except Exception:
-                pass
-
 def load_wordlist() -> list:
-    """Load the wordlist from the USB stick and update the database.
+    """Load the wordlist from the USB stick.
+
+    The database is brought up to date by the background USB sync, see
+    utils.database.usb_sync.
 
     Returns:
         list: A list of wordlist items.
@@ -471,10 +327,6 @@ def load_wordlist() -> list:
     wordlist = []
     count = 0
     
-    # First update the database with any new or modified files
-    update_database_from_usb()
-    
-    # Then load the wordlist
     for file in os.listdir(global_vars.PATH_USB_STICK):
         if file.endswith(".rob"):
             wordlist.append(file[:-4])
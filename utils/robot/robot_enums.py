@@ -25,6 +25,11 @@ class RobotMode(Enum):
             return cls.BACKDRIVE
         return cls.UNKNOWN
 
+    @classmethod
+    def from_rtde(cls, mode: int) -> 'RobotMode':
+        """Convert the RTDE robot_mode value to RobotMode enum"""
+        return _RTDE_ROBOT_MODES.get(mode, cls.UNKNOWN)
+
 class SafetyStatus(Enum):
     """Enum for robot safety status"""
     UNKNOWN = auto()
@@ -68,6 +73,11 @@ class SafetyStatus(Enum):
             return cls.FAULT
         return cls.UNKNOWN
 
+    @classmethod
+    def from_rtde(cls, mode: int) -> 'SafetyStatus':
+        """Convert the RTDE safety_mode value to SafetyStatus enum"""
+        return _RTDE_SAFETY_MODES.get(mode, cls.UNKNOWN)
+
 class ProgramState(Enum):
     """Enum for robot program state"""
     UNKNOWN = auto()
@@ -88,4 +98,42 @@ class ProgramState(Enum):
             return cls.PLAYING
         elif "paused" in state_str:
             return cls.PAUSED
-        return cls.UNKNOWN 
\ No newline at end of file
+        return cls.UNKNOWN
+
+    @classmethod
+    def from_rtde(cls, state: int) -> 'ProgramState':
+        """Convert the RTDE runtime_state value to ProgramState enum"""
+        return _RTDE_RUNTIME_STATES.get(state, cls.UNKNOWN)
+
+# RTDE robot_mode values (POWER_ON and BOOTING have no counterpart in the dashboard states)
+_RTDE_ROBOT_MODES = {
+    3: RobotMode.POWER_OFF,
+    5: RobotMode.IDLE,
+    6: RobotMode.BACKDRIVE,
+    7: RobotMode.RUNNING,
+}
+
+# RTDE safety_mode values
+_RTDE_SAFETY_MODES = {
+    1: SafetyStatus.NORMAL,
+    2: SafetyStatus.REDUCED,
+    3: SafetyStatus.PROTECTIVE_STOP,
+    4: SafetyStatus.RECOVERY,
+    5: SafetyStatus.SAFEGUARD_STOP,
+    6: SafetyStatus.SYSTEM_EMERGENCY_STOP,
+    7: SafetyStatus.ROBOT_EMERGENCY_STOP,
+    8: SafetyStatus.VIOLATION,
+    9: SafetyStatus.FAULT,
+    12: SafetyStatus.SAFEGUARD_STOP,  # automatic mode safeguard stop
+}
+
+# RTDE runtime_state values; the transitional states map to the state being entered
+_RTDE_RUNTIME_STATES = {
+    0: ProgramState.STOPPED,  # stopping
+    1: ProgramState.STOPPED,
+    2: ProgramState.PLAYING,
+    3: ProgramState.PAUSED,  # pausing
+    4: ProgramState.PAUSED,
+    5: ProgramState.PLAYING,  # resuming
+}
+ 
\ No newline at end of file
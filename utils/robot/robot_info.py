@@ -0,0 +1,130 @@
+"""
+Background fetching of the robot details shown on the Status tab.
+
+Polyscope version, serial number, loaded program and program list come from
+dashboard queries that can take seconds while the robot is unreachable. The
+Status tab asks `RobotInfoFetcher.request` on every tick; that only checks
+per-field cache ages and queues expired fields on a single worker thread. Each
+answer is cached for the field's TTL, a failure for its negative TTL, and
+delivered to the GUI thread through the `field_updated` signal.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+from PySide6.QtCore import QObject, Signal
+
+from utils.system.core import global_vars
+from .robot_status_monitor import get_polyscope_version, get_serial_number, get_loaded_program, list_available_programs
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class FieldPolicy:
+    """How a Status tab field is fetched and cached."""
+    fetch: Callable[[], Tuple[object, bool, Optional[str]]]
+    ttl: float
+    negative_ttl: float
+
+# Field -> fetch function and cache lifetimes in seconds
+FIELD_POLICIES: Dict[str, FieldPolicy] = {
+    "polyscope_version": FieldPolicy(get_polyscope_version, ttl=3600.0, negative_ttl=30.0),
+    "serial_number": FieldPolicy(get_serial_number, ttl=3600.0, negative_ttl=30.0),
+    "loaded_program": FieldPolicy(get_loaded_program, ttl=5.0, negative_ttl=15.0),
+    # The dashboard has no program listing, so this fetch is a permanent
+    # "unsupported" failure and gets a longer negative TTL than its TTL.
+    "programs": FieldPolicy(list_available_programs, ttl=60.0, negative_ttl=600.0),
+}
+
+@dataclass(frozen=True)
+class FieldValue:
+    """A fetched field value.
+
+    Attributes:
+        value: The answer; if the fetch failed, the last known value or None.
+        ok (bool): Whether the fetch succeeded.
+        error (Optional[str]): The error message of a failed fetch.
+        fetched (float): time.monotonic() of the fetch.
+    """
+    value: object
+    ok: bool
+    error: Optional[str]
+    fetched: float
+
+class RobotInfoFetcher(QObject):
+    """Fetches Status tab fields on a worker thread with per-field TTL caching.
+
+    Cached values are dropped when global_vars.robot_ip changes.
+
+    Signals:
+        field_updated (str, object): Field name and FieldValue, emitted after every fetch.
+    """
+    field_updated = Signal(str, object)
+
+    def __init__(self, policies: Optional[Dict[str, FieldPolicy]] = None, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.policies = policies or FIELD_POLICIES
+        self._values: Dict[str, FieldValue] = {}
+        self._in_flight: set = set()
+        self._lock = threading.Lock()
+        self._robot_ip: Optional[str] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="robot-info")
+
+    def request(self, *fields: str, force: bool = False) -> None:
+        """Queue the fetch of expired fields. Never blocks.
+
+        Args:
+            *fields (str): The fields to check; all fields if none are given.
+            force (bool, optional): Fetch even if the cached value has not expired. Defaults to False.
+        """
+        if global_vars.robot_ip != self._robot_ip:
+            # Answers of the previous robot do not apply to the new one
+            self._robot_ip = global_vars.robot_ip
+            self.invalidate()
+        now = time.monotonic()
+        for name in fields or self.policies:
+            policy = self.policies[name]
+            with self._lock:
+                if name in self._in_flight:
+                    continue
+                cached = self._values.get(name)
+                if not force and cached is not None:
+                    ttl = policy.ttl if cached.ok else policy.negative_ttl
+                    if now - cached.fetched < ttl:
+                        continue
+                self._in_flight.add(name)
+            self._executor.submit(self._fetch, name, policy)
+
+    def value(self, name: str) -> Optional[FieldValue]:
+        """Get the cached value of a field, None if it was never fetched."""
+        with self._lock:
+            return self._values.get(name)
+
+    def invalidate(self) -> None:
+        """Drop all cached values, e.g. after the robot was changed."""
+        with self._lock:
+            self._values.clear()
+
+    def shutdown(self) -> None:
+        """Stop the worker thread; queued fetches are dropped."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _fetch(self, name: str, policy: FieldPolicy) -> None:
+        try:
+            value, ok, error = policy.fetch()
+        except Exception as e:
+            value, ok, error = None, False, str(e)
+        with self._lock:
+            if not ok:
+                # Keep the last known value until it can be fetched again
+                previous = self._values.get(name)
+                value = previous.value if previous is not None else None
+            result = self._values[name] = FieldValue(value, ok, error, time.monotonic())
+            self._in_flight.discard(name)
+        if not ok:
+            logger.debug(f"Fetching {name} failed: {error}")
+        self.field_updated.emit(name, result)
@@ -1,15 +1,20 @@
 import socket
 import time
 import threading
-from dataclasses import dataclass
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, replace
 from datetime import datetime
-from typing import Optional, Tuple, List
-from utils.system.core.global_vars import robot_ip, logger
+from typing import Callable, Optional, Tuple, List
+from PySide6.QtCore import QObject, Signal
+from utils.system.core.global_vars import logger
 from .robot_enums import RobotMode, SafetyStatus, ProgramState
+from .rtde_client import DEFAULT_FREQUENCY, RtdeStatusStream
+from .polling_policy import PollingPolicy
+from .dashboard_client import DASHBOARD_PORT, TIMEOUT_SECONDS, DashboardUnavailable, get_dashboard_session, close_dashboard_sessions
 
-# Constants
-DASHBOARD_PORT = 29999
-TIMEOUT_SECONDS = 5
+# Polls the effective poll rate is measured over
+POLL_RATE_WINDOW = 10
 
 @dataclass
 class RobotStatus:
@@ -21,15 +26,15 @@ class RobotStatus:
     is_connected: bool = False
     connection_error: Optional[str] = None
 
-def send_dashboard_command(command: str, ip: str = robot_ip, port: int = DASHBOARD_PORT, timeout: int = TIMEOUT_SECONDS) -> Tuple[str, bool, Optional[str]]:
+def send_dashboard_command(command: str, ip: Optional[str] = None, port: int = DASHBOARD_PORT, timeout: int = TIMEOUT_SECONDS) -> Tuple[str, bool, Optional[str]]:
     """
-    Sends a command to the UR Dashboard Server and returns the response.
+    Sends a command to the UR Dashboard Server over the shared persistent connection and returns the response.
     
     Args:
         command: The command to send to the dashboard server
-        ip: Robot IP address
+        ip: Robot IP address, defaults to global_vars.robot_ip
         port: Dashboard server port
-        timeout: Connection timeout in seconds
+        timeout: Connection and response timeout in seconds
         
     Returns:
         Tuple[str, bool, Optional[str]]: 
@@ -37,22 +42,41 @@ def send_dashboard_command(command: str, ip: str = robot_ip, port: int = DASHBOA
             - Success flag (True if command succeeded)
             - Error message if any
     """
+    return send_dashboard_commands([command], ip, port, timeout)[0]
+
+def send_dashboard_commands(commands: List[str], ip: Optional[str] = None, port: int = DASHBOARD_PORT, timeout: int = TIMEOUT_SECONDS) -> List[Tuple[str, bool, Optional[str]]]:
+    """
+    Sends several commands pipelined over the shared connection and waits for all responses.
+    
+    Args:
+        commands: The commands to send to the dashboard server
+        ip: Robot IP address, defaults to global_vars.robot_ip
+        port: Dashboard server port
+        timeout: Connection and response timeout in seconds
+        
+    Returns:
+        List[Tuple[str, bool, Optional[str]]]: Per command the result like send_dashboard_command
+    """
+    session = get_dashboard_session(ip, port)
+    futures = [session.submit(command, timeout) for command in commands]
+    return [_dashboard_result(future, session.ip, port) for future in futures]
+
+def _dashboard_result(future: "Future[str]", ip: str, port: int) -> Tuple[str, bool, Optional[str]]:
+    """Wait for a submitted dashboard command and classify its response."""
     try:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.settimeout(timeout)
-            s.connect((ip, port))
-            welcome_message_bytes = s.recv(1024)
-            s.sendall((command + "\n").encode("utf-8"))
-            response_data = s.recv(1024)
-            response = response_data.decode("utf-8").strip()
-            
-            # Check if response indicates robot is not powered on
-            if "Robotmode: POWER_OFF" in response:
-                return response, False, "Robot is powered off"
-            elif "Error" in response:
-                return response, False, response
-            return response, True, None
+        response = future.result()
+        
+        # Check if response indicates robot is not powered on
+        if "Robotmode: POWER_OFF" in response:
+            return response, False, "Robot is powered off"
+        elif "Error" in response:
+            return response, False, response
+        return response, True, None
             
+    except DashboardUnavailable as e:
+        # Reconnecting is backed off; the failed attempt was already logged
+        logger.debug(str(e))
+        return "Error: Not connected", False, str(e)
     except socket.timeout:
         error_msg = f"Connection timeout to robot at {ip}:{port}"
         logger.error(error_msg)
@@ -103,42 +127,205 @@ def get_serial_number() -> Tuple[str, bool, Optional[str]]:
     response, success, error = send_dashboard_command("get serial number")
     return response, success, error
 
+def _setting(key: str, default):
+    """Get a value of the robot settings group, the default if settings are not loaded."""
+    from utils.system.core import global_vars
+    try:
+        return global_vars.settings.settings['robot'][key]
+    except (AttributeError, KeyError, TypeError):
+        return default
+
+def _status_source_setting() -> str:
+    source = _setting('status_source', "dashboard")
+    if source not in ("dashboard", "rtde"):
+        logger.warning(f"Unknown robot status source {source!r}, using dashboard")
+        return "dashboard"
+    return source
+
+class RobotStatusPublisher(QObject):
+    """Announces robot status transitions to the GUI and to background subscribers.
+
+    A status is published after every poll or RTDE package, but listeners are
+    only notified when robot mode, safety status, program state or the
+    connection state changed; a new error text while disconnected is no
+    transition. Each notification carries a copy of the status, so
+    listeners never see a status that is half updated.
+
+    Signals:
+        status_changed (object): The new RobotStatus, delivered in the GUI thread.
+    """
+    status_changed = Signal(object)
+
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self._lock = threading.Lock()
+        # Held while notifying, so a replay and a publish reach a subscriber in order
+        self._notify_lock = threading.RLock()
+        self._callbacks: List[Callable[[RobotStatus], None]] = []
+        self._current = RobotStatus()
+        self.transitions = 0
+
+    @property
+    def current(self) -> RobotStatus:
+        """The last published status."""
+        return self._current
+
+    def subscribe(self, callback: Callable[[RobotStatus], None], replay: bool = True) -> None:
+        """Register a callback for status transitions.
+
+        Callbacks run on the monitor thread and must not block; GUI code connects
+        to `status_changed` instead. The replay finishes before the next
+        transition is delivered.
+
+        Args:
+            callback (Callable[[RobotStatus], None]): Called with the new status.
+            replay (bool, optional): Call it right away with the current status. Defaults to True.
+        """
+        with self._notify_lock:
+            with self._lock:
+                self._callbacks.append(callback)
+                current = self._current
+            if replay:
+                callback(current)
+
+    def unsubscribe(self, callback: Callable[[RobotStatus], None]) -> None:
+        """Remove a callback registered with `subscribe`."""
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def publish(self, status: RobotStatus) -> bool:
+        """Publish a status, notifying the listeners if it changed.
+
+        Args:
+            status (RobotStatus): The status just read from the robot.
+
+        Returns:
+            bool: True if the status changed.
+        """
+        snapshot = replace(status)
+        with self._notify_lock:
+            with self._lock:
+                previous = self._current
+                self._current = snapshot
+                if _transition_key(snapshot) == _transition_key(previous):
+                    return False
+                self.transitions += 1
+                callbacks = list(self._callbacks)
+            from utils.system.core import global_vars
+            global_vars.current_robot_mode = snapshot.robot_mode
+            global_vars.current_safety_status = snapshot.safety_status
+            global_vars.current_program_state = snapshot.program_state
+            self.status_changed.emit(snapshot)
+            for callback in callbacks:
+                try:
+                    callback(snapshot)
+                except Exception as e:
+                    logger.error(f"Robot status subscriber {callback!r} failed: {e}")
+        return True
+
+def _transition_key(status: RobotStatus) -> tuple:
+    # Not the connection error: while reconnecting is suspended its text counts down on every poll
+    return (status.robot_mode, status.safety_status, status.program_state, status.is_connected)
+
+_status_publisher = RobotStatusPublisher()
+
+def get_status_publisher() -> RobotStatusPublisher:
+    """Get the publisher of robot status transitions.
+
+    Returns:
+        RobotStatusPublisher: The publisher shared by all monitors.
+    """
+    return _status_publisher
+
+def _polling_policy_setting() -> PollingPolicy:
+    from utils.system.core import global_vars
+    try:
+        return PollingPolicy.from_settings(global_vars.settings.settings['robot'])
+    except (AttributeError, KeyError, TypeError, ValueError) as e:
+        logger.warning(f"Invalid robot polling settings, using the defaults: {e}")
+        return PollingPolicy()
+
 class RobotStatusMonitor:
-    def __init__(self, update_interval: int = 2):
+    def __init__(self, update_interval: Optional[float] = None, source: Optional[str] = None,
+                 policy: Optional[PollingPolicy] = None, ip: Optional[str] = None, port: int = DASHBOARD_PORT):
         """
         Initialize the robot status monitor.
         
         Args:
-            update_interval: Time between status updates in seconds
+            update_interval: Fixed time between dashboard status polls in seconds while connected,
+                instead of the adaptive polling policy
+            source: "dashboard" to poll the dashboard server or "rtde" to stream the state,
+                defaults to the robot status_source setting
+            policy: Dashboard poll intervals, defaults to the robot polling settings
+            ip: Robot IP address for dashboard polling, defaults to global_vars.robot_ip
+            port: Dashboard server port
         """
-        self.update_interval = update_interval
+        if policy is None:
+            policy = _polling_policy_setting()
+        if update_interval is not None:
+            policy = replace(policy, active_interval=update_interval, idle_interval=update_interval)
+        self.policy = policy
+        self.ip = ip
+        self.port = port
+        self.source = source or _status_source_setting()
         self.running = False
         self.monitor_thread: Optional[threading.Thread] = None
+        self.rtde_stream: Optional[RtdeStatusStream] = None
         self.status = RobotStatus()
+        self.publisher = get_status_publisher()
+        # Current dashboard poll interval and why it was chosen
+        self.poll_interval = policy.idle_interval
+        self.poll_reason = "starting"
+        self._failures = 0
+        self._poll_times: deque = deque(maxlen=POLL_RATE_WINDOW)
+        self._wake = threading.Event()
+
+    @property
+    def effective_rate(self) -> float:
+        """Dashboard polls per second over the last POLL_RATE_WINDOW polls, 0.0 before the second poll."""
+        times = list(self._poll_times)
+        if len(times) < 2 or times[-1] <= times[0]:
+            return 0.0
+        return (len(times) - 1) / (times[-1] - times[0])
+
+    def request_poll(self) -> None:
+        """Poll right away instead of waiting for the interval, e.g. after a command was sent."""
+        self._wake.set()
         
     def start_monitoring(self):
         """Start the status monitoring thread"""
         if not self.running:
             self.running = True
-            self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
-            self.monitor_thread.start()
-            logger.info("Robot status monitoring started")
+            if self.source == "rtde":
+                self.rtde_stream = RtdeStatusStream(self.status, frequency=_setting('rtde_frequency', DEFAULT_FREQUENCY),
+                                                    on_change=self.publisher.publish)
+                self.rtde_stream.start()
+            else:
+                self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
+                self.monitor_thread.start()
+            logger.info(f"Robot status monitoring started ({self.source})")
             
     def stop_monitoring(self):
         """Stop the status monitoring thread"""
         self.running = False
+        self._wake.set()
+        if self.rtde_stream:
+            self.rtde_stream.stop()
+            self.rtde_stream = None
         if self.monitor_thread:
             self.monitor_thread.join()
             logger.info("Robot status monitoring stopped")
+        close_dashboard_sessions()
             
     def _monitor_loop(self):
         """Main monitoring loop that updates robot status"""
         while self.running:
             try:
                 # Get robot status
-                robot_mode, mode_success, mode_error = send_dashboard_command("robotmode")
-                safety_status, safety_success, safety_error = send_dashboard_command("safetystatus")
-                program_state, prog_success, prog_error = send_dashboard_command("programstate")
+                (robot_mode, mode_success, mode_error), \
+                    (safety_status, safety_success, safety_error), \
+                    (program_state, prog_success, prog_error) = send_dashboard_commands(["robotmode", "safetystatus", "programstate"], self.ip, self.port)
                 
                 # Check if any command succeeded
                 any_success = mode_success or safety_success or prog_success
@@ -157,18 +344,23 @@ class RobotStatusMonitor:
                 else:
                     self.status.connection_error = None
                 
-                # Update global variables
-                from utils.system.core import global_vars
-                global_vars.current_robot_mode = self.status.robot_mode
-                global_vars.current_safety_status = self.status.safety_status
-                global_vars.current_program_state = self.status.program_state
-                
             except Exception as e:
                 logger.error(f"Error in status monitoring loop: {str(e)}")
                 self.status.is_connected = False
                 self.status.connection_error = str(e)
-                
-            time.sleep(self.update_interval)
+
+            try:
+                # Sets the global variables and notifies the subscribers on transitions
+                self.publisher.publish(self.status)
+                self._poll_times.append(time.monotonic())
+
+                self._failures = 0 if self.status.is_connected else self._failures + 1
+                self.poll_interval, self.poll_reason = self.policy.next_interval(self.status, self._failures)
+            except Exception as e:
+                # Keep polling at the previous interval rather than ending the thread
+                logger.error(f"Error scheduling the next status poll: {str(e)}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
             
     def get_current_status(self) -> RobotStatus:
         """
@@ -0,0 +1,509 @@
+"""
+Streaming robot state over the UR Real-Time Data Exchange (RTDE, port 30004).
+
+Instead of polling the dashboard server as text every few seconds, the
+controller pushes robot_mode, safety_mode and runtime_state as binary data
+packages at a fixed rate (10 Hz by default). `RtdeStatusStream` decodes them
+into the monitor's `RobotStatus` as they arrive, so a change to REDUCED or a
+protective stop is seen within one package.
+
+RTDE packets are `size (uint16) | type (uint8) | payload`, big endian. The
+client negotiates protocol version 2, sets up an output recipe and starts the
+stream; each data package then holds the recipe id and the values.
+
+`RtdeStandIn` is a local RTDE server that replays a list of frames (decoded
+values), so the client can be tested without a robot. Frames can be recorded
+from a real robot as JSON lines and replayed later:
+
+    python -m utils.robot.rtde_client --host 192.168.0.1 --record capture.jsonl --seconds 60
+    python -m utils.robot.rtde_client --standin --replay capture.jsonl --port 30004
+
+tests/test_rtde_client.py streams from the stand-in.
+"""
+
+import argparse
+import json
+import logging
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import TYPE_CHECKING, BinaryIO, Callable, Dict, List, Optional, Sequence, Tuple
+
+from utils.system.core import global_vars
+from .robot_enums import RobotMode, SafetyStatus, ProgramState
+
+if TYPE_CHECKING:
+    from .robot_status_monitor import RobotStatus
+
+logger = logging.getLogger(__name__)
+
+RTDE_PORT = 30004
+PROTOCOL_VERSION = 2
+DEFAULT_FREQUENCY = 10.0
+TIMEOUT_SECONDS = 5
+# Reconnect backoff in seconds, doubled after every failed attempt
+INITIAL_BACKOFF = 0.5
+MAX_BACKOFF = 30.0
+
+# Packet types
+REQUEST_PROTOCOL_VERSION = ord('V')
+GET_URCONTROL_VERSION = ord('v')
+TEXT_MESSAGE = ord('M')
+DATA_PACKAGE = ord('U')
+CONTROL_PACKAGE_SETUP_OUTPUTS = ord('O')
+CONTROL_PACKAGE_START = ord('S')
+CONTROL_PACKAGE_PAUSE = ord('P')
+
+HEADER = struct.Struct(">HB")
+
+# RTDE type -> struct format of its value
+TYPE_FORMATS: Dict[str, str] = {
+    "BOOL": "?",
+    "UINT8": "B",
+    "UINT32": "I",
+    "UINT64": "Q",
+    "INT32": "i",
+    "DOUBLE": "d",
+    "VECTOR3D": "3d",
+    "VECTOR6D": "6d",
+    "VECTOR6INT32": "6i",
+    "VECTOR6UINT32": "6I",
+}
+
+# Outputs needed for RobotStatus
+STATUS_OUTPUTS = ("timestamp", "robot_mode", "safety_mode", "runtime_state")
+
+# Output types the stand-in serves
+STANDIN_OUTPUT_TYPES: Dict[str, str] = {
+    "timestamp": "DOUBLE",
+    "robot_mode": "INT32",
+    "safety_mode": "INT32",
+    "safety_status": "INT32",
+    "runtime_state": "UINT32",
+    "speed_scaling": "DOUBLE",
+}
+
+class RtdeError(OSError):
+    """Raised when the controller rejects a request or sends an unexpected packet."""
+
+def pack_packet(packet_type: int, payload: bytes = b"") -> bytes:
+    """Build an RTDE packet.
+
+    Args:
+        packet_type (int): The packet type.
+        payload (bytes, optional): The payload. Defaults to b"".
+
+    Returns:
+        bytes: The packet including the header.
+    """
+    return HEADER.pack(HEADER.size + len(payload), packet_type) + payload
+
+def read_packet(stream: BinaryIO) -> Tuple[int, bytes]:
+    """Read one RTDE packet.
+
+    Args:
+        stream (BinaryIO): The socket file.
+
+    Raises:
+        ConnectionResetError: If the connection was closed.
+
+    Returns:
+        Tuple[int, bytes]: The packet type and payload.
+    """
+    header = stream.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ConnectionResetError("RTDE connection closed")
+    size, packet_type = HEADER.unpack(header)
+    payload = stream.read(size - HEADER.size)
+    if len(payload) < size - HEADER.size:
+        raise ConnectionResetError("RTDE connection closed")
+    return packet_type, payload
+
+def recipe_struct(types: Sequence[str]) -> struct.Struct:
+    """Get the struct of a data package of an output recipe, including the recipe id.
+
+    Args:
+        types (Sequence[str]): The RTDE types of the recipe.
+
+    Raises:
+        RtdeError: If a type is not supported.
+
+    Returns:
+        struct.Struct: The struct.
+    """
+    try:
+        return struct.Struct(">B" + "".join(TYPE_FORMATS[t] for t in types))
+    except KeyError as e:
+        raise RtdeError(f"Unsupported RTDE type {e}")
+
+def _group_values(types: Sequence[str], flat: Sequence) -> List:
+    """Group the unpacked values of vector types into tuples."""
+    values, position = [], 0
+    for rtde_type in types:
+        count = int(TYPE_FORMATS[rtde_type][:-1] or 1)
+        values.append(flat[position] if count == 1 else tuple(flat[position:position + count]))
+        position += count
+    return values
+
+class RtdeClient:
+    """Minimal RTDE client for output recipes."""
+
+    def __init__(self, host: str, port: int = RTDE_PORT, timeout: float = TIMEOUT_SECONDS):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._file: Optional[BinaryIO] = None
+        self._recipe_id: Optional[int] = None
+        self._variables: Tuple[str, ...] = ()
+        self._types: Tuple[str, ...] = ()
+        self._struct: Optional[struct.Struct] = None
+
+    def connect(self) -> None:
+        """Connect and negotiate the protocol version.
+
+        Raises:
+            RtdeError: If the controller does not support protocol version 2.
+        """
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._file = self._sock.makefile("rb")
+        accepted = self._request(REQUEST_PROTOCOL_VERSION, struct.pack(">H", PROTOCOL_VERSION))
+        if not accepted or not accepted[0]:
+            raise RtdeError(f"Controller does not accept RTDE protocol version {PROTOCOL_VERSION}")
+
+    def setup_outputs(self, variables: Sequence[str], frequency: float = DEFAULT_FREQUENCY) -> Tuple[str, ...]:
+        """Set up the output recipe.
+
+        Args:
+            variables (Sequence[str]): The output variable names.
+            frequency (float, optional): Packages per second. Defaults to DEFAULT_FREQUENCY.
+
+        Raises:
+            RtdeError: If a variable is unknown to the controller.
+
+        Returns:
+            Tuple[str, ...]: The RTDE types of the variables.
+        """
+        payload = struct.pack(">d", frequency) + ",".join(variables).encode("ascii")
+        answer = self._request(CONTROL_PACKAGE_SETUP_OUTPUTS, payload)
+        types = tuple(answer[1:].decode("ascii").split(","))
+        missing = [name for name, rtde_type in zip(variables, types) if rtde_type == "NOT_FOUND"]
+        if missing:
+            raise RtdeError(f"Controller does not provide {', '.join(missing)}")
+        self._recipe_id, self._variables, self._types = answer[0], tuple(variables), types
+        self._struct = recipe_struct(types)
+        return types
+
+    def start(self) -> None:
+        """Start the data package stream."""
+        accepted = self._request(CONTROL_PACKAGE_START)
+        if not accepted or not accepted[0]:
+            raise RtdeError("Controller refused to start the RTDE stream")
+
+    def receive(self) -> Dict[str, object]:
+        """Wait for the next data package.
+
+        Returns:
+            Dict[str, object]: Variable name -> value.
+        """
+        while True:
+            packet_type, payload = read_packet(self._file)
+            if packet_type == DATA_PACKAGE and payload and payload[0] == self._recipe_id:
+                return dict(zip(self._variables, _group_values(self._types, self._struct.unpack(payload)[1:])))
+            if packet_type == TEXT_MESSAGE:
+                logger.info(f"RTDE message: {payload.decode('utf-8', errors='replace')}")
+
+    def close(self) -> None:
+        """Pause the stream and close the connection."""
+        if self._sock is None:
+            return
+        try:
+            self._sock.sendall(pack_packet(CONTROL_PACKAGE_PAUSE))
+        except OSError:
+            pass
+        try:
+            self._file.close()
+            self._sock.close()
+        except OSError:
+            pass
+        self._sock = self._file = None
+
+    def _request(self, packet_type: int, payload: bytes = b"") -> bytes:
+        """Send a control request and wait for the answer of the same type."""
+        self._sock.sendall(pack_packet(packet_type, payload))
+        while True:
+            answer_type, answer = read_packet(self._file)
+            if answer_type == packet_type:
+                return answer
+            if answer_type == TEXT_MESSAGE:
+                logger.info(f"RTDE message: {answer.decode('utf-8', errors='replace')}")
+            elif answer_type != DATA_PACKAGE:
+                raise RtdeError(f"Unexpected RTDE packet type {chr(answer_type)!r}")
+
+def apply_rtde_state(status: 'RobotStatus', state: Dict[str, object]) -> bool:
+    """Update a RobotStatus from a decoded data package.
+
+    Args:
+        status (RobotStatus): The status to update.
+        state (Dict[str, object]): The decoded package.
+
+    Returns:
+        bool: True if robot mode, safety status, program state or the connection changed.
+    """
+    robot_mode = RobotMode.from_rtde(state["robot_mode"])
+    safety_status = SafetyStatus.from_rtde(state["safety_mode"])
+    program_state = ProgramState.from_rtde(state["runtime_state"])
+    changed = (robot_mode, safety_status, program_state) != (status.robot_mode, status.safety_status, status.program_state) \
+        or not status.is_connected
+    status.robot_mode = robot_mode
+    status.safety_status = safety_status
+    status.program_state = program_state
+    status.last_update = datetime.now()
+    status.is_connected = True
+    status.connection_error = None
+    return changed
+
+class RtdeStatusStream:
+    """Keeps a RobotStatus up to date from the RTDE stream on a daemon thread."""
+
+    def __init__(self, status: 'RobotStatus', host: Optional[str] = None, port: int = RTDE_PORT,
+                 frequency: float = DEFAULT_FREQUENCY, on_change: Optional[Callable[['RobotStatus'], None]] = None):
+        """Initialize the stream.
+
+        Args:
+            status (RobotStatus): The status to update.
+            host (Optional[str], optional): Robot IP address. Defaults to global_vars.robot_ip.
+            port (int, optional): RTDE port. Defaults to RTDE_PORT.
+            frequency (float, optional): Packages per second. Defaults to DEFAULT_FREQUENCY.
+            on_change (Optional[Callable[[RobotStatus], None]], optional): Called on the stream thread when
+                robot mode, safety status, program state or the connection changed. Defaults to None.
+        """
+        self.status = status
+        self._host = host
+        self.port = port
+        self.frequency = frequency
+        self.on_change = on_change
+        self.packages = 0
+        self.running = False
+        self._client: Optional[RtdeClient] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        """Start streaming on a daemon thread."""
+        if self.running:
+            return
+        self.running = True
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="rtde-status", daemon=True)
+        self._thread.start()
+        logger.info("RTDE status stream started")
+
+    def stop(self) -> None:
+        """Stop streaming and close the connection."""
+        self.running = False
+        self._stop.set()
+        client = self._client
+        if client is not None and client._sock is not None:
+            try:
+                client._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread:
+            self._thread.join(timeout=TIMEOUT_SECONDS)
+            logger.info("RTDE status stream stopped")
+
+    def _run(self) -> None:
+        backoff = 0.0
+        while self.running:
+            host = self._host or global_vars.robot_ip
+            self._client = RtdeClient(host, self.port)
+            try:
+                self._client.connect()
+                self._client.setup_outputs(STATUS_OUTPUTS, self.frequency)
+                self._client.start()
+                logger.info(f"Streaming robot state from {host}:{self.port} at {self.frequency} Hz")
+                backoff = 0.0
+                while self.running:
+                    state = self._client.receive()
+                    self.packages += 1
+                    if apply_rtde_state(self.status, state):
+                        self._publish()
+            except OSError as e:
+                if not self.running:
+                    break
+                self.status.is_connected = False
+                self.status.connection_error = f"RTDE: {e}"
+                self.status.robot_mode = RobotMode.UNKNOWN
+                self.status.safety_status = SafetyStatus.UNKNOWN
+                self.status.program_state = ProgramState.UNKNOWN
+                self._publish()
+                backoff = min(MAX_BACKOFF, backoff * 2 if backoff else INITIAL_BACKOFF)
+                logger.warning(f"RTDE stream from {host}:{self.port} failed: {e}; retrying in {backoff} s")
+                self._stop.wait(backoff)
+            finally:
+                self._client.close()
+
+    def _publish(self) -> None:
+        global_vars.current_robot_mode = self.status.robot_mode
+        global_vars.current_safety_status = self.status.safety_status
+        global_vars.current_program_state = self.status.program_state
+        if self.on_change is not None:
+            self.on_change(self.status)
+
+class _StandInHandler(socketserver.StreamRequestHandler):
+    """Answers one RTDE client like a controller."""
+    disable_nagle_algorithm = True
+
+    def handle(self) -> None:
+        streaming = threading.Event()
+        done = threading.Event()
+        recipe: List[str] = []
+        frequency = DEFAULT_FREQUENCY
+        send_lock = threading.Lock()
+        streamer: Optional[threading.Thread] = None
+
+        def send(packet_type: int, payload: bytes = b"") -> None:
+            with send_lock:
+                self.wfile.write(pack_packet(packet_type, payload))
+
+        def stream() -> None:
+            packer = recipe_struct([STANDIN_OUTPUT_TYPES[name] for name in recipe])
+            position = 0
+            next_time = time.monotonic()
+            while streaming.is_set() and not done.is_set():
+                frame = self.server.frames[position % len(self.server.frames)]
+                position += 1
+                if position >= len(self.server.frames) and not self.server.loop:
+                    position = len(self.server.frames) - 1
+                values = [time.monotonic() if name == "timestamp" else frame.get(name, 0) for name in recipe]
+                try:
+                    send(DATA_PACKAGE, packer.pack(1, *values))
+                except OSError:
+                    return
+                next_time += 1 / frequency
+                done.wait(max(0.0, next_time - time.monotonic()))
+
+        try:
+            while True:
+                packet_type, payload = read_packet(self.rfile)
+                if packet_type == REQUEST_PROTOCOL_VERSION:
+                    send(packet_type, struct.pack(">B", struct.unpack(">H", payload)[0] == PROTOCOL_VERSION))
+                elif packet_type == GET_URCONTROL_VERSION:
+                    send(packet_type, struct.pack(">IIII", 5, 11, 0, 0))
+                elif packet_type == CONTROL_PACKAGE_SETUP_OUTPUTS:
+                    frequency = struct.unpack(">d", payload[:8])[0] or DEFAULT_FREQUENCY
+                    recipe = payload[8:].decode("ascii").split(",")
+                    types = [STANDIN_OUTPUT_TYPES.get(name, "NOT_FOUND") for name in recipe]
+                    send(packet_type, b"\x01" + ",".join(types).encode("ascii"))
+                elif packet_type == CONTROL_PACKAGE_START:
+                    send(packet_type, b"\x01")
+                    if not streaming.is_set():
+                        streaming.set()
+                        streamer = threading.Thread(target=stream, daemon=True)
+                        streamer.start()
+                elif packet_type == CONTROL_PACKAGE_PAUSE:
+                    streaming.clear()
+                    send(packet_type, b"\x01")
+        except OSError:
+            pass
+        finally:
+            done.set()
+            if streamer is not None:
+                streamer.join(timeout=1)
+
+class RtdeStandIn(socketserver.ThreadingTCPServer):
+    """Local RTDE server replaying frames of decoded output values."""
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, frames: Sequence[Dict[str, object]], addr: Tuple[str, int] = ("127.0.0.1", 0), loop: bool = True):
+        """Initialize the stand-in.
+
+        Args:
+            frames (Sequence[Dict[str, object]]): Output values per package, e.g. {"robot_mode": 7, ...}.
+            addr (Tuple[str, int], optional): Address to listen on. Defaults to an ephemeral local port.
+            loop (bool, optional): Start over after the last frame instead of repeating it. Defaults to True.
+        """
+        super().__init__(addr, _StandInHandler)
+        self.frames = list(frames) or [{}]
+        self.loop = loop
+
+    def start(self) -> int:
+        """Serve on a daemon thread.
+
+        Returns:
+            int: The port.
+        """
+        threading.Thread(target=self.serve_forever, name="rtde-standin", daemon=True).start()
+        return self.server_address[1]
+
+# The cycle of dashboard_standin.DEMO_SCRIPT as RTDE output values, five packages per step
+DEMO_FRAMES: List[Dict[str, object]] = (
+    [{"robot_mode": 5, "safety_mode": 1, "runtime_state": 1}] * 5
+    + [{"robot_mode": 7, "safety_mode": 1, "runtime_state": 1}] * 5
+    + [{"robot_mode": 7, "safety_mode": 1, "runtime_state": 2}] * 5
+    + [{"robot_mode": 7, "safety_mode": 2, "runtime_state": 2}] * 5
+    + [{"robot_mode": 7, "safety_mode": 3, "runtime_state": 4}] * 5
+    + [{"robot_mode": 7, "safety_mode": 1, "runtime_state": 2}] * 5
+)
+
+def load_frames(path: str) -> List[Dict[str, object]]:
+    """Read frames recorded with --record (one JSON object per line)."""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point: print or record the robot state, or serve the stand-in.
+
+    Returns:
+        int: 0 on success.
+    """
+    parser = argparse.ArgumentParser(description="UR RTDE robot state stream")
+    parser.add_argument("--host", default=global_vars.robot_ip)
+    parser.add_argument("--port", type=int, default=RTDE_PORT)
+    parser.add_argument("--frequency", type=float, default=DEFAULT_FREQUENCY)
+    parser.add_argument("--record", help="write the received frames to a JSON lines file")
+    parser.add_argument("--seconds", type=float, default=10.0, help="how long to print or record")
+    parser.add_argument("--standin", action="store_true", help="serve a local stand-in instead of connecting")
+    parser.add_argument("--replay", help="frames for the stand-in, recorded with --record")
+    args = parser.parse_args(argv)
+
+    if args.standin:
+        standin = RtdeStandIn(load_frames(args.replay) if args.replay else DEMO_FRAMES, ("", args.port))
+        print(f"RTDE stand-in listening on port {standin.server_address[1]}")
+        try:
+            standin.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            standin.server_close()
+        return 0
+
+    client = RtdeClient(args.host, args.port)
+    client.connect()
+    client.setup_outputs(STATUS_OUTPUTS, args.frequency)
+    client.start()
+    record = open(args.record, "w", encoding="utf-8") if args.record else None
+    try:
+        end = time.monotonic() + args.seconds
+        while time.monotonic() < end:
+            state = client.receive()
+            if record:
+                record.write(json.dumps(state) + "\n")
+            else:
+                print(f"{RobotMode.from_rtde(state['robot_mode']).name} / {SafetyStatus.from_rtde(state['safety_mode']).name}"
+                      f" / {ProgramState.from_rtde(state['runtime_state']).name}")
+    finally:
+        client.close()
+        if record:
+            record.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,14 @@
 # implementation of UR20 functions to be called by the server
 
 from PySide6.QtWidgets import QMessageBox, QLabel
-from PySide6.QtGui import QPixmap
 import utils
 from utils.system.core import global_vars
+from utils.server.ui_state import get_ui_state
+from utils.server.scanner_status import SAFE_STATUS, SCANNER_IMAGES, get_scanner_pipeline
 from datetime import datetime
 from utils.message.status_manager import update_status_label
 from typing import Literal, cast, Union
-from PySide6.QtCore import Qt, QObject, Signal, QTimer
+from PySide6.QtCore import Qt, QTimer
 import logging
 # from utils.audio.audio import kill_play_stepback_warning_thread, spawn_play_stepback_warning_thread
 import time
@@ -17,15 +18,7 @@ from utils.system.config.logging_config import setup_server_logger
 
 logger = setup_server_logger()
 
-class ScannerSignals(QObject):
-    """Signals for the scanner.
-
-    Args:
-        QObject (QObject): The parent class of the signals.
-    """
-    status_changed = Signal(str, str)  # status, image_path
-
-scanner_signals = ScannerSignals()
+scanner_pipeline = get_scanner_pipeline()
 
 # Helper function to mark palette as not empty and record timestamp
 def mark_palette_not_empty(palette_number: int) -> None:
@@ -51,26 +44,35 @@ def mark_palette_not_empty(palette_number: int) -> None:
 def UR20_scannerStatus(status: str) -> int:
     """Set the scanner status.
 
+    Repeated statuses are dropped here; transitions go to the GUI through the
+    scanner status pipeline.
+
     Args:
         status (str): The status of the scanner.
 
     Returns:
         int: The exit code of the application.
     """
-    logger.debug(f"Scanner status update received: {status}")
-    
+    if status == SAFE_STATUS:
+        # Track when the scanners were last seen safe
+        global_vars.timestamp_scanner_safe = time.time()
+    if status not in SCANNER_IMAGES:
+        logger.warning(f"Unknown scanner status received: {status}")
+        return 0
+    if not scanner_pipeline.submit(status):
+        return 0
+    logger.debug(f"Scanner status changed: {status}")
+
     # Track previous status for audio changes
-    previous_status = getattr(global_vars, 'previous_scanner_status', "True,True,True")
+    previous_status = getattr(global_vars, 'previous_scanner_status', SAFE_STATUS)
     global_vars.previous_scanner_status = status
 
-    # Track when entering safe state
-    if status == "True,True,True":
-        global_vars.timestamp_scanner_safe = time.time()
-    
     # Handle scanner fault detection
-    if status != "True,True,True":
+    if status != SAFE_STATUS:
+        if status == "False,False,False":
+            logger.warning("All scanners report unsafe conditions")
         # Play scanner warning sound if status changed from safe to unsafe
-        if previous_status == "True,True,True":
+        if previous_status == SAFE_STATUS:
             current_time = time.time()
             # Check if warning sound hasn't been played in the last 15 seconds
             if (global_vars.last_scanner_warning_time is None or 
@@ -85,45 +87,13 @@ def UR20_scannerStatus(status: str) -> int:
                 else:
                     logger.warning("Settings not available, cannot play scanner warning sound")
     else:
+        logger.info("All scanners report safe conditions")
         # Reset scanner fault timestamp when all scanners are safe
         if global_vars.timestamp_scanner_fault is not None:
             logger.info("Scanner fault cleared")
             global_vars.timestamp_scanner_fault = None
             # Stop any playing warning sound
             # kill_play_stepback_warning_thread()
-
-    image_path = None
-    message = "Bitte Arbeitsbereich räumen."  # Default message for unsafe conditions
-    
-    match status:
-        case "True,True,True":
-            logger.info("All scanners report safe conditions")
-            image_path = u':/ScannerUR20/imgs/UR20/scanner1&2&3io.png'
-            message = "Alles in Ordnung"
-        case "False,False,False":
-            logger.warning("All scanners report unsafe conditions")
-            image_path = u':/ScannerUR20/imgs/UR20/scanner1&2&3nio.png'
-        case "True,False,False":
-            image_path = u':/ScannerUR20/imgs/UR20/scanner1io.png'
-        case "False,True,False":
-            image_path = u':/ScannerUR20/imgs/UR20/scanner2io.png'
-        case "False,False,True":
-            image_path = u':/ScannerUR20/imgs/UR20/scanner3io.png'
-        case "True,True,False":
-            image_path = u':/ScannerUR20/imgs/UR20/scanner3nio.png'
-        case "True,False,True":
-            image_path = u':/ScannerUR20/imgs/UR20/scanner2nio.png'
-        case "False,True,True":
-            image_path = u':/ScannerUR20/imgs/UR20/scanner1nio.png'
-
-    if image_path:
-        logger.debug(f"Updating scanner image: {image_path}")
-        try:
-            if global_vars.ui and global_vars.ui.label_7:
-                global_vars.ui.label_7.setPixmap(QPixmap(image_path))
-            scanner_signals.status_changed.emit(status, image_path)
-        except Exception as e:
-            logger.error(f"Failed to update scanner image: {e}")
     return 0
 
 # change active pallet
@@ -268,7 +238,7 @@ def UR20_GetKlemmungAktiv() -> bool:
     Returns:
         bool: True if the klemmung is active, False otherwise.
     """
-    return global_vars.ui.checkBoxKlemmung.isChecked()
+    return get_ui_state().clamping_active
 
 def UR20_GetScannerOverride() -> list[bool]:
     """Get the scanner override.
@@ -276,7 +246,7 @@ def UR20_GetScannerOverride() -> list[bool]:
     Returns:
         list[bool]: The status of the scanner override.
     """
-    scanner_override: list[bool] = [global_vars.ui.checkBoxScanner1Overwrite.isChecked(), global_vars.ui.checkBoxScanner2Overwrite.isChecked(), global_vars.ui.checkBoxScanner3Overwrite.isChecked()]
+    scanner_override: list[bool] = list(get_ui_state().scanner_override)
     logger.debug(f"Checking scanner override: {scanner_override=}")
     return scanner_override
 
@@ -6,6 +6,8 @@ from typing import Literal, List, Optional, Union, Tuple
 
 from utils.database.database import load_from_database
 from utils.system.core import global_vars
+from utils.server.ui_state import get_ui_state
+from utils.server.plan_state import get_plan, publish_plan, update_plan, make_plan, set_box_height
 
 from utils.system.config.logging_config import setup_server_logger
 
@@ -30,108 +32,106 @@ def UR_SetFileName(Artikelnummer) -> str:
 def UR_ReadDataFromUsbStick() -> Union[Literal[0], Literal[1]]:
     """Read data from the Path_USB_STICK.
 
+    The plan is parsed completely and then published in one step, so concurrent
+    handlers see either the previous plan or the new one.
+
     Returns:
         Union[Literal[0], Literal[1]]: 1 if the data was read successfully, 0 otherwise.
     """
-    
-    global_vars.g_Daten = []
-    global_vars.g_LageZuordnung = []
-    global_vars.g_PaketPos = []
-    global_vars.g_PaketeZuordnung = []
-    global_vars.g_Zwischenlagen = []
     global_vars.g_paket_quer = 1
     global_vars.g_CenterOfGravity = [0,0,0]
+    file_name = global_vars.FILENAME
     
-    if global_vars.FILENAME is None:
+    if file_name is None:
         logger.error("No filename set")
+        _publish_empty_plan(file_name)
         return 0
-    logger.debug(f"Trying to read file {global_vars.FILENAME}")
+    logger.debug(f"Trying to read file {file_name}")
     
     try:
         # Load all data from database, including saved box dimensions
-        db_result = load_from_database(file_name=global_vars.FILENAME)
+        db_result = load_from_database(file_name=file_name)
         
         # Unpack the result - load_from_database returns a tuple with all the data
-        (global_vars.g_Daten, _, _, _, _, _, _, 
+        (daten, _, _, _, _, _, _, 
          g_PalettenDim_db, g_PaketDim_db, _, _, _, _) = db_result
     
         # Use palette dimensions from database
         if g_PalettenDim_db:
-            global_vars.g_PalettenDim = g_PalettenDim_db
+            palette_dim = g_PalettenDim_db
         else:
-            pl = global_vars.g_Daten[global_vars.LI_PALETTE_DATA][global_vars.LI_PALETTE_DATA_LENGTH]
-            pw = global_vars.g_Daten[global_vars.LI_PALETTE_DATA][global_vars.LI_PALETTE_DATA_WIDTH]
-            ph = global_vars.g_Daten[global_vars.LI_PALETTE_DATA][global_vars.LI_PALETTE_DATA_HEIGHT]
-            global_vars.g_PalettenDim = [pl, pw, ph]
+            pl = daten[global_vars.LI_PALETTE_DATA][global_vars.LI_PALETTE_DATA_LENGTH]
+            pw = daten[global_vars.LI_PALETTE_DATA][global_vars.LI_PALETTE_DATA_WIDTH]
+            ph = daten[global_vars.LI_PALETTE_DATA][global_vars.LI_PALETTE_DATA_HEIGHT]
+            palette_dim = [pl, pw, ph]
         
         # Use package dimensions from database (includes saved height!)
         if g_PaketDim_db:
-            global_vars.g_PaketDim = g_PaketDim_db
+            package_dim = g_PaketDim_db
         else:
-            pl = global_vars.g_Daten[global_vars.LI_PACKAGE_DATA][global_vars.LI_PACKAGE_DATA_LENGTH]
-            pw = global_vars.g_Daten[global_vars.LI_PACKAGE_DATA][global_vars.LI_PACKAGE_DATA_WIDTH]
-            ph = global_vars.g_Daten[global_vars.LI_PACKAGE_DATA][global_vars.LI_PACKAGE_DATA_HEIGHT]
-            pr = global_vars.g_Daten[global_vars.LI_PACKAGE_DATA][global_vars.LI_PACKAGE_DATA_GAP]
-            global_vars.g_PaketDim = [pl, pw, ph, pr]
+            pl = daten[global_vars.LI_PACKAGE_DATA][global_vars.LI_PACKAGE_DATA_LENGTH]
+            pw = daten[global_vars.LI_PACKAGE_DATA][global_vars.LI_PACKAGE_DATA_WIDTH]
+            ph = daten[global_vars.LI_PACKAGE_DATA][global_vars.LI_PACKAGE_DATA_HEIGHT]
+            pr = daten[global_vars.LI_PACKAGE_DATA][global_vars.LI_PACKAGE_DATA_GAP]
+            package_dim = [pl, pw, ph, pr]
 
         #Lagearten
-        global_vars.g_LageArten = global_vars.g_Daten[global_vars.LI_LAYERTYPES][0]
-        
-        #Lagenzuordnung
-        anzLagen = global_vars.g_Daten[global_vars.LI_NUMBER_OF_LAYERS][0]
-        global_vars.g_AnzLagen = anzLagen
+        lageArten = daten[global_vars.LI_LAYERTYPES][0]
 
+        #Lagenzuordnung
+        anzLagen = daten[global_vars.LI_NUMBER_OF_LAYERS][0]
+        lageZuordnung = []
+        zwischenlagen = []
 
         index       = global_vars.LI_NUMBER_OF_LAYERS + 2
         end_index   = index + anzLagen
 
-
         while index < end_index:
-            
-            lagenart = global_vars.g_Daten[index][0]
-            zwischenlagen = global_vars.g_Daten[index][1]
-
-            global_vars.g_LageZuordnung.append(lagenart)
-            global_vars.g_Zwischenlagen.append(zwischenlagen)
-        
+            lageZuordnung.append(daten[index][0])
+            zwischenlagen.append(daten[index][1])
             index = index +1
         
         #Paketpositionen
         ersteLage   = 4 + (anzLagen + 1)
         index       = ersteLage
-        anzahlPaket = global_vars.g_Daten[index][0]
-        global_vars.g_AnzahlPakete = anzahlPaket #Achtung veraltet - Anzahl der Picks bei Multipick
+        anzahlPakete = daten[index][0] #Achtung veraltet - Anzahl der Picks bei Multipick
         index_paketZuordnung = index
+        paketeZuordnung = []
+        paketPos = []
         
-        for i in range(global_vars.g_LageArten):
-            
-            anzahlPick = global_vars.g_Daten[index_paketZuordnung][0]
-            global_vars.g_PaketeZuordnung.append(anzahlPick)
+        for i in range(lageArten):
+            anzahlPick = daten[index_paketZuordnung][0]
+            paketeZuordnung.append(anzahlPick)
             index_paketZuordnung = index_paketZuordnung + anzahlPick + 1
-            
         
-        for i in range(global_vars.g_LageArten):            
+        for i in range(lageArten):            
             index = index + 1 #Überspringe die Zeile mit der Anzahl der Pakete
-            anzahlPaket = global_vars.g_PaketeZuordnung[i]
             
-            for j in range(anzahlPaket):
-                xp = global_vars.g_Daten[index][global_vars.LI_POSITION_XP]
-                yp = global_vars.g_Daten[index][global_vars.LI_POSITION_YP]
-                ap = global_vars.g_Daten[index][global_vars.LI_POSITION_AP]
-                xd = global_vars.g_Daten[index][global_vars.LI_POSITION_XD]
-                yd = global_vars.g_Daten[index][global_vars.LI_POSITION_YD]
-                ad = global_vars.g_Daten[index][global_vars.LI_POSITION_AD]
-                nop = global_vars.g_Daten[index][global_vars.LI_POSITION_NOP]
-                xvec = global_vars.g_Daten[index][global_vars.LI_POSITION_XVEC]
-                yvec = global_vars.g_Daten[index][global_vars.LI_POSITION_YVEC]
-                packagePos = [xp, yp, ap, xd, yd, ad, nop, xvec, yvec]
-                global_vars.g_PaketPos.append(packagePos)
+            for j in range(paketeZuordnung[i]):
+                row = daten[index]
+                paketPos.append([row[global_vars.LI_POSITION_XP], row[global_vars.LI_POSITION_YP],
+                                 row[global_vars.LI_POSITION_AP], row[global_vars.LI_POSITION_XD],
+                                 row[global_vars.LI_POSITION_YD], row[global_vars.LI_POSITION_AD],
+                                 row[global_vars.LI_POSITION_NOP], row[global_vars.LI_POSITION_XVEC],
+                                 row[global_vars.LI_POSITION_YVEC]])
                 index = index + 1
 
+        publish_plan(make_plan(file_name, daten, palette_dim, package_dim, lageArten, lageZuordnung,
+                               zwischenlagen, paketeZuordnung, paketPos, anzLagen, anzahlPakete),
+                     f"plan {file_name} read")
         return 0                
     except:
-        logger.error(f"Error reading file {global_vars.FILENAME}")
+        logger.error(f"Error reading file {file_name}")
+    _publish_empty_plan(file_name)
     return 1
+
+def _publish_empty_plan(file_name: Optional[str]) -> None:
+    """Publish a plan without layers and positions, as left behind by a failed read.
+
+    Dimensions and counts of the previous plan are kept, as the old in-place reset did.
+    """
+    update_plan(f"plan {file_name} not read", file_name=file_name, daten=(), layer_assignment=(),
+                intermediate_layers=(), packages_per_type=(), package_positions=())
  
 #funktion für den roboter 
 def UR_Palette() -> Optional[List[int]]:
@@ -140,7 +140,7 @@ def UR_Palette() -> Optional[List[int]]:
     Returns:
         Optional[List[int]]: The palette dimensions, or None if not available.
     """
-    return global_vars.g_PalettenDim
+    return _as_list(get_plan().palette_dim)
  
 def UR_Karton() -> Optional[List[int]]:
     """Get the carton dimensions.
@@ -148,7 +148,7 @@ def UR_Karton() -> Optional[List[int]]:
     Returns:
         Optional[List[int]]: The carton dimensions, or None if not available.
     """
-    return global_vars.g_PaketDim
+    return _as_list(get_plan().package_dim)
  
 def UR_Lagen() -> Optional[List[int]]:
     """Get the layer types.
@@ -156,7 +156,7 @@ def UR_Lagen() -> Optional[List[int]]:
     Returns:
         Optional[List[int]]: The layer types, or None if not available.
     """
-    return global_vars.g_LageZuordnung
+    return _as_list(get_plan().layer_assignment)
  
 def UR_Zwischenlagen() -> Optional[List[int]]:
     """Get the number of use cycles.
@@ -164,7 +164,7 @@ def UR_Zwischenlagen() -> Optional[List[int]]:
     Returns:
         Optional[List[int]]: The number of use cycles, or None if not available.
     """
-    return global_vars.g_Zwischenlagen
+    return _as_list(get_plan().intermediate_layers)
  
 def UR_PaketPos(Nummer: int) -> Optional[List[int]]:
     """Get the package position, with coordinate transformation for palette 2.
@@ -175,18 +175,43 @@ def UR_PaketPos(Nummer: int) -> Optional[List[int]]:
     Returns:
         Optional[List[int]]: The package position, or None if not available.
     """
-    if global_vars.g_PaketPos is None:
+    package_positions = get_plan().package_positions
+    if package_positions is None:
         logger.error("Package positions not initialized")
         return None
         
-    pos = global_vars.g_PaketPos[Nummer]
+    return _transform_position(package_positions[Nummer], _label_inverted(), global_vars.UR20_active_palette)
+
+def _as_list(value: Optional[tuple]) -> Optional[list]:
+    """Convert a plan field to the list the robot interface always returned."""
+    return None if value is None else list(value)
+
+def _label_inverted() -> bool:
+    """Check whether the label side is inverted in the UI.
+
+    Returns:
+        bool: True if the label invert checkbox is checked.
+    """
+    return get_ui_state().label_inverted
+
+def _transform_position(pos: List[int], label_inverted: bool, active_palette: int) -> List[int]:
+    """Apply the label inversion and the palette 2 transformation to a package position.
+
+    Args:
+        pos (List[int]): The package position as stored in the plan.
+        label_inverted (bool): Whether the label side is inverted.
+        active_palette (int): The active palette number.
+
+    Returns:
+        List[int]: The package position as sent to the robot.
+    """
     px, py, pr = pos[0], pos[1], pos[2]
     x, y, r = pos[3], pos[4], pos[5]
     n = pos[6]
     dx, dy = pos[7], pos[8]
-    if global_vars.ui.checkBoxLabelInvert.isChecked():
+    if label_inverted:
         r = (r + 180) % 360
-    if global_vars.UR20_active_palette == 2:
+    if active_palette == 2:
         # For palette 2, transform coordinates using:
         # (px, py, pr, x, y, r, n, dx, dy) -> (px, py, pr, y, x, (r+180)mod360, n, dy, dx)
         
@@ -202,13 +227,49 @@ def UR_PaketPos(Nummer: int) -> Optional[List[int]]:
         
     return [px, py, pr, x, y, r, n, dx, dy]
 
+def UR_GetPlanHeader() -> list:
+    """Get everything the robot needs before placing the first package in one call.
+
+    Returns:
+        list: [palette dimensions, carton dimensions, layer types, intermediate layers,
+            packages per layer type, number of layers, number of packages].
+    """
+    # One snapshot, so the header never mixes two plans
+    plan = get_plan()
+    return [_as_list(plan.palette_dim), _as_list(plan.package_dim), _as_list(plan.layer_assignment),
+            _as_list(plan.intermediate_layers), _as_list(plan.packages_per_type),
+            plan.number_of_layers, plan.number_of_packages]
+
+def UR_GetLayerPositions(layer_type: int) -> Optional[List[List[int]]]:
+    """Get all package positions of a layer type in one call.
+
+    Args:
+        layer_type (int): The layer type, starting at 1 as in the layer assignment.
+
+    Returns:
+        Optional[List[List[int]]]: The package positions as returned by UR_PaketPos, or None if not available.
+    """
+    plan = get_plan()
+    if plan.package_positions is None or plan.packages_per_type is None:
+        logger.error("Package positions not initialized")
+        return None
+    if not 1 <= layer_type <= len(plan.packages_per_type):
+        logger.error(f"Invalid layer type {layer_type}")
+        return None
+        
+    start = sum(plan.packages_per_type[:layer_type - 1])
+    end = start + plan.packages_per_type[layer_type - 1]
+    label_inverted = _label_inverted()
+    active_palette = global_vars.UR20_active_palette
+    return [_transform_position(pos, label_inverted, active_palette) for pos in plan.package_positions[start:end]]
+
 def UR_AnzLagen() -> Optional[int]:
     """Get the number of layers.
 
     Returns:
         Optional[int]: The number of layers, or None if not available.
     """
-    return global_vars.g_AnzLagen
+    return get_plan().number_of_layers
  
 def UR_AnzPakete() -> Optional[int]:
     """Get the number of packages.
@@ -216,7 +277,7 @@ def UR_AnzPakete() -> Optional[int]:
     Returns:
         Optional[int]: The number of packages, or None if not available.
     """
-    return global_vars.g_AnzahlPakete
+    return get_plan().number_of_packages
  
 def UR_PaketeZuordnung() -> Optional[List[int]]:
     """Get the package order.
@@ -224,7 +285,7 @@ def UR_PaketeZuordnung() -> Optional[List[int]]:
     Returns:
         Optional[List[int]]: The package order, or None if not available.
     """
-    return global_vars.g_PaketeZuordnung
+    return _as_list(get_plan().packages_per_type)
  
  
 #den "center of gravity" messen
@@ -239,7 +300,8 @@ def UR_CoG(Masse_Paket: float, Masse_Greifer: float, Anzahl_Pakete: int = 1) ->
     Returns:
         Optional[List[float]]: The center of gravity, or None if it couldn't be calculated.
     """
-    if global_vars.g_PaketDim is None:
+    package_dim = get_plan().package_dim
+    if package_dim is None:
         logger.error("Package dimensions not initialized")
         return None
         
@@ -250,10 +312,10 @@ def UR_CoG(Masse_Paket: float, Masse_Greifer: float, Anzahl_Pakete: int = 1) ->
     if Anzahl_Pakete == 0:
         Masse_Paket = 0
     #Berechnung Y
-    Karton_Y = global_vars.g_PaketDim[0]
+    Karton_Y = package_dim[0]
     y = (1/(Masse_Greifer + Masse_Paket))*((-0.045*Masse_Greifer)+(-0.045*Masse_Paket))
     #Berechnung Z
-    Karton_Z = global_vars.g_PaketDim[2]
+    Karton_Z = package_dim[2]
     z = (1/(Masse_Greifer + (Masse_Paket*Anzahl_Pakete)))*((0.047*Masse_Greifer)+((0.047+(Karton_Z/2000))*Masse_Paket*Anzahl_Pakete)) #Annahme Schwerpunkt Paket ist halbe Höhe u. mm zu m -> Karton_Z/2*1000
     #Zuweisung Array
     global_vars.g_CenterOfGravity[0] = y
@@ -266,13 +328,13 @@ def UR_Paket_hoehe() -> int:
     Returns:
         int: The package height.
     """
-    if global_vars.g_PaketDim is None:
+    if get_plan().package_dim is None:
         logger.error("Package dimensions not initialized")
         return 0
         
-    if global_vars.ui and global_vars.ui.EingabeKartonhoehe:
-        global_vars.g_PaketDim[2] = int(global_vars.ui.EingabeKartonhoehe.text())
-        return global_vars.g_PaketDim[2]
+    state = get_ui_state()
+    if state.ui_available:
+        return set_box_height(int(state.box_height_text)).package_dim[2]
     return 0
 
 def UR_Startlage() -> int:
@@ -281,8 +343,9 @@ def UR_Startlage() -> int:
     Returns:
         int: The start layer.
     """
-    if global_vars.ui and global_vars.ui.EingabeStartlage:
-        global_vars.g_Startlage = int(global_vars.ui.EingabeStartlage.value())
+    state = get_ui_state()
+    if state.ui_available:
+        global_vars.g_Startlage = int(state.start_layer)
         return global_vars.g_Startlage
     return 0
 
@@ -292,8 +355,9 @@ def UR_MasseGeschaetzt() -> float:
     Returns:
         float: The mass of the carton.
     """
-    if global_vars.ui and global_vars.ui.EingabeKartonGewicht:
-        global_vars.g_MassePaket = float(global_vars.ui.EingabeKartonGewicht.text())
+    state = get_ui_state()
+    if state.ui_available:
+        global_vars.g_MassePaket = float(state.box_weight_text)
         return global_vars.g_MassePaket
     return 0.0
 
@@ -303,8 +367,9 @@ def UR_PickOffsetX() -> int:
     Returns:
         int: The pick offset in x direction.
     """
-    if global_vars.ui and global_vars.ui.EingabeVerschiebungX:
-        global_vars.g_Pick_Offset_X = int(global_vars.ui.EingabeVerschiebungX.value())
+    state = get_ui_state()
+    if state.ui_available:
+        global_vars.g_Pick_Offset_X = int(state.pick_offset_x)
         return global_vars.g_Pick_Offset_X
     return 0
 
@@ -314,8 +379,9 @@ def UR_PickOffsetY() -> int:
     Returns:
         int: The pick offset in y direction.
     """
-    if global_vars.ui and global_vars.ui.EingabeVerschiebungY:
-        global_vars.g_Pick_Offset_Y = int(global_vars.ui.EingabeVerschiebungY.value())
+    state = get_ui_state()
+    if state.ui_available:
+        global_vars.g_Pick_Offset_Y = int(state.pick_offset_y)
         return global_vars.g_Pick_Offset_Y
     return 0
 
@@ -325,7 +391,6 @@ def UR_Quergreifen() -> bool:
     Returns:
         bool: True if the package should be gripped lengthwise, False otherwise.
     """
-    if global_vars.ui and global_vars.ui.checkBoxEinzelpaket:
-        logger.debug(f"{global_vars.ui.checkBoxEinzelpaket.isChecked()=}")
-        return global_vars.ui.checkBoxEinzelpaket.isChecked()
-    return False
\ No newline at end of file
+    state = get_ui_state()
+    logger.debug(f"{state.single_package=}")
+    return state.single_package
\ No newline at end of file
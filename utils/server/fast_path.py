@@ -0,0 +1,279 @@
+"""
+Raw TCP fast path for position streaming next to the XMLRPC server.
+
+URScript reads a line like `(100,50,0,150,100,90,1,1,0)` with a single
+`socket_read_ascii_float`, which is far cheaper on the controller than building
+and parsing an XMLRPC envelope. This service answers one command per line on a
+persistent connection per robot, with the same data and transformations as the
+XMLRPC functions:
+
+    P <n>             UR_PaketPos(n)
+    C <m_pkg> <m_grip> [<count>]
+                      UR_CoG(m_pkg, m_grip, count)
+    H                 plan header: palette L W H, carton L W H gap,
+                      layer types, layers, packages
+    L                 UR_Lagen
+    Z                 UR_Zwischenlagen
+    N                 UR_PaketeZuordnung
+
+Every answer is one line `(v1,v2,...)`. Unknown commands, bad arguments and
+missing data are answered with `()`, which socket_read_ascii_float reads as
+zero values. socket_read_ascii_float reads at most 30 values, so L, Z and N
+are only usable for plans with up to 30 layers or layer types.
+
+URScript example:
+    socket_open("192.168.0.10", 8081, "fast")
+    socket_send_line("P 3", "fast")
+    pos = socket_read_ascii_float(9, "fast")
+
+Benchmark against the XMLRPC path with a local stand-in client:
+    python -m utils.server.fast_path --benchmark [--calls 2000]
+"""
+
+import argparse
+import socket
+import socketserver
+import statistics
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from utils.system.config.logging_config import setup_server_logger
+from utils.server.UR_Common_functions import UR_PaketPos, UR_CoG, UR_Lagen, UR_Zwischenlagen, UR_PaketeZuordnung
+from utils.server.rpc_metrics import get_rpc_metrics
+from utils.server.plan_state import get_plan
+
+logger = setup_server_logger()
+
+DEFAULT_FAST_PATH_PORT = 8081
+# Longest accepted command line; longer lines are answered with an error
+MAX_LINE_LENGTH = 256
+EMPTY_RESPONSE = b"()\n"
+
+def format_floats(values: Sequence) -> bytes:
+    """Format values as a socket_read_ascii_float line.
+
+    Args:
+        values (Sequence): Numbers; integers are sent without a decimal point.
+
+    Returns:
+        bytes: The line `(v1,v2,...)` including the newline.
+    """
+    return ("(" + ",".join(str(v) if isinstance(v, int) else f"{v:.6g}" for v in values) + ")\n").encode("ascii")
+
+def _plan_header() -> Optional[List]:
+    plan = get_plan()
+    if not plan.palette_dim or not plan.package_dim:
+        return None
+    return [*plan.palette_dim[:3], *plan.package_dim[:4], plan.layer_types, plan.number_of_layers, plan.number_of_packages]
+
+def _package_position(number: str) -> Optional[List[int]]:
+    return UR_PaketPos(int(number))
+
+def _center_of_gravity(mass_package: str, mass_gripper: str, count: str = "1") -> Optional[List[float]]:
+    return UR_CoG(float(mass_package), float(mass_gripper), int(count))
+
+# Command -> (handler, metrics name)
+COMMANDS: Dict[str, Tuple[Callable[..., Optional[Sequence]], str]] = {
+    "P": (_package_position, "fast.UR_PaketPos"),
+    "C": (_center_of_gravity, "fast.UR_CoG"),
+    "H": (_plan_header, "fast.UR_GetPlanHeader"),
+    "L": (UR_Lagen, "fast.UR_Lagen"),
+    "Z": (UR_Zwischenlagen, "fast.UR_Zwischenlagen"),
+    "N": (UR_PaketeZuordnung, "fast.UR_PaketeZuordnung"),
+}
+
+def handle_command(line: bytes) -> bytes:
+    """Answer a single command line.
+
+    Args:
+        line (bytes): The command line without the newline.
+
+    Returns:
+        bytes: The response line.
+    """
+    parts = line.decode("ascii", errors="replace").split()
+    if not parts:
+        return EMPTY_RESPONSE
+    command = COMMANDS.get(parts[0].upper())
+    if command is None:
+        logger.warning("Fast path: unknown command %r", line)
+        return EMPTY_RESPONSE
+    handler, name = command
+    start = time.perf_counter()
+    response = EMPTY_RESPONSE
+    try:
+        values = handler(*parts[1:])
+        if values is not None:
+            response = format_floats(values)
+    except Exception as e:
+        logger.error("Fast path: %r failed: %s", line, e)
+    get_rpc_metrics().method(name).record(time.perf_counter() - start, response is not EMPTY_RESPONSE)
+    return response
+
+class FastPathRequestHandler(socketserver.StreamRequestHandler):
+    """Answers command lines on one persistent connection."""
+    disable_nagle_algorithm = True
+
+    def handle(self) -> None:
+        logger.info("Fast path: robot connected from %s", self.client_address)
+        while True:
+            line = self.rfile.readline(MAX_LINE_LENGTH + 1)
+            if not line:
+                break
+            if len(line) > MAX_LINE_LENGTH:
+                logger.warning("Fast path: command line too long from %s", self.client_address)
+                self.wfile.write(EMPTY_RESPONSE)
+                break
+            self.wfile.write(handle_command(line.strip()))
+        logger.info("Fast path: robot disconnected from %s", self.client_address)
+
+class FastPathServer(socketserver.ThreadingTCPServer):
+    """Line protocol server with one thread per robot connection."""
+    allow_reuse_address = True
+    daemon_threads = True
+    # Handler threads are daemons and end with their connection
+    block_on_close = False
+
+    def __init__(self, addr: Tuple[str, int], handler=None):
+        super().__init__(addr, handler or FastPathRequestHandler)
+        self._active_requests = set()
+        self._active_requests_lock = threading.Lock()
+
+    def process_request_thread(self, request, client_address) -> None:
+        with self._active_requests_lock:
+            self._active_requests.add(request)
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            with self._active_requests_lock:
+                self._active_requests.discard(request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        # Persistent connections would otherwise keep being served after a stop
+        with self._active_requests_lock:
+            active_requests = list(self._active_requests)
+        for request in active_requests:
+            try:
+                request.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+def create_fast_path_server(addr: Tuple[str, int] = ("", DEFAULT_FAST_PATH_PORT)) -> FastPathServer:
+    """Create the fast path server.
+
+    Args:
+        addr (Tuple[str, int], optional): Address to listen on. Defaults to ("", DEFAULT_FAST_PATH_PORT).
+
+    Returns:
+        FastPathServer: The server, not yet serving.
+    """
+    return FastPathServer(addr)
+
+class StandInRobot:
+    """Local stand-in for a robot reading the fast path like socket_read_ascii_float."""
+
+    def __init__(self, addr: Tuple[str, int]):
+        self._socket = socket.create_connection(addr)
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._file = self._socket.makefile("rb")
+
+    def request(self, line: str) -> List[float]:
+        """Send a command line and parse the answer.
+
+        Returns:
+            List[float]: The values, empty for an error response.
+        """
+        self._socket.sendall(line.encode("ascii") + b"\n")
+        answer = self._file.readline().strip()
+        inner = answer[1:-1]
+        return [float(value) for value in inner.split(b",")] if inner else []
+
+    def close(self) -> None:
+        self._file.close()
+        self._socket.close()
+
+def benchmark(calls: int = 2000) -> Dict[str, List[float]]:
+    """Compare UR_PaketPos latency over XMLRPC and the fast path on a synthetic plan.
+
+    Args:
+        calls (int, optional): Number of timed calls per path. Defaults to 2000.
+
+    Returns:
+        Dict[str, List[float]]: Per path the call durations in seconds.
+    """
+    import xmlrpc.client
+    from utils.server.rpc_benchmark import install_synthetic_plan
+    from utils.server.rpc_logging import LOG_OFF, RpcLogPolicy
+    from utils.server.rpc_server import create_server
+    from utils.server.server import register_functions
+
+    install_synthetic_plan()
+    package_count = len(get_plan().package_positions)
+    results: Dict[str, List[float]] = {}
+
+    rpc_server = create_server(("127.0.0.1", 0), threaded=True)
+    register_functions(rpc_server, 'UR10', RpcLogPolicy(default_mode=LOG_OFF))
+    fast_server = create_fast_path_server(("127.0.0.1", 0))
+    for server in (rpc_server, fast_server):
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        proxy = xmlrpc.client.ServerProxy(f"http://127.0.0.1:{rpc_server.server_address[1]}")
+        robot = StandInRobot(("127.0.0.1", fast_server.server_address[1]))
+        paths = {
+            "xmlrpc": lambda n: proxy.UR_PaketPos(n),
+            "fast path": lambda n: robot.request(f"P {n}"),
+        }
+        for name, fetch in paths.items():
+            if fetch(0) == []:
+                raise RuntimeError(f"{name} returned no position")
+            durations = []
+            for call in range(calls):
+                start = time.perf_counter()
+                fetch(call % package_count)
+                durations.append(time.perf_counter() - start)
+            results[name] = durations
+        robot.close()
+    finally:
+        for server in (rpc_server, fast_server):
+            server.shutdown()
+            server.server_close()
+    return results
+
+def main(argv=None) -> int:
+    """Command line entry point: serve the fast path or run the benchmark.
+
+    Returns:
+        int: 0 on success.
+    """
+    parser = argparse.ArgumentParser(description="Raw TCP fast path for package positions")
+    parser.add_argument("--benchmark", action="store_true", help="compare against XMLRPC with a local stand-in robot")
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--port", type=int, default=DEFAULT_FAST_PATH_PORT)
+    args = parser.parse_args(argv)
+
+    if not args.benchmark:
+        server = create_fast_path_server(("", args.port))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return 0
+
+    results = benchmark(args.calls)
+    baseline = statistics.median(results["xmlrpc"])
+    print(f"{'path':<10} {'median us':>10} {'p95 us':>8} {'p99 us':>8} {'speedup':>8}")
+    for name, durations in results.items():
+        ordered = sorted(durations)
+        median = statistics.median(durations)
+        p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+        p99 = ordered[max(0, int(len(ordered) * 0.99) - 1)]
+        print(f"{name:<10} {median * 1e6:>10.1f} {p95 * 1e6:>8.1f} {p99 * 1e6:>8.1f} {baseline / median:>7.1f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
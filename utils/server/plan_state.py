@@ -0,0 +1,168 @@
+"""
+The loaded palette plan as one immutable, versioned object.
+
+A plan is parsed completely into a new `Plan` and then published by replacing
+a single reference, so the XMLRPC handlers (and the fast path) always see
+either the old plan or the new one, never a half-built mix. Reading is one
+reference lookup without a lock; only publishers serialize on a write lock.
+
+The legacy `global_vars.g_*` plan globals are kept in sync after every publish
+for the UI code that still reads them. Publishing also drops the marshalled
+plan responses (see utils.server.response_cache).
+"""
+
+import threading
+from dataclasses import dataclass, replace
+from typing import List, Optional, Tuple
+
+from utils.system.core import global_vars
+from utils.system.config.logging_config import setup_server_logger
+from utils.server.response_cache import invalidate_plan_responses
+
+logger = setup_server_logger()
+
+Row = Tuple[int, ...]
+
+@dataclass(frozen=True)
+class Plan:
+    """Immutable snapshot of a loaded palette plan.
+
+    Version 0 means no plan has been published yet; all data fields are None then.
+    """
+    version: int = 0
+    file_name: Optional[str] = None
+    daten: Optional[Tuple[Row, ...]] = None
+    palette_dim: Optional[Row] = None
+    package_dim: Optional[Row] = None
+    layer_types: Optional[int] = None
+    layer_assignment: Optional[Row] = None
+    intermediate_layers: Optional[Row] = None
+    packages_per_type: Optional[Row] = None
+    package_positions: Optional[Tuple[Row, ...]] = None
+    number_of_layers: Optional[int] = None
+    number_of_packages: Optional[int] = None
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the plan holds package positions."""
+        return bool(self.package_positions)
+
+# Plan field -> legacy global_vars name
+LEGACY_GLOBALS = {
+    "daten": "g_Daten",
+    "palette_dim": "g_PalettenDim",
+    "package_dim": "g_PaketDim",
+    "layer_types": "g_LageArten",
+    "layer_assignment": "g_LageZuordnung",
+    "intermediate_layers": "g_Zwischenlagen",
+    "packages_per_type": "g_PaketeZuordnung",
+    "package_positions": "g_PaketPos",
+    "number_of_layers": "g_AnzLagen",
+    "number_of_packages": "g_AnzahlPakete",
+}
+
+_plan = Plan()
+# Serializes publishers only; readers take the current reference without locking
+_write_lock = threading.Lock()
+
+def get_plan() -> Plan:
+    """Get the current plan.
+
+    Returns:
+        Plan: The current plan.
+    """
+    return _plan
+
+def publish_plan(plan: Plan, reason: str = "") -> Plan:
+    """Publish a fully built plan with the next version number.
+
+    Args:
+        plan (Plan): The new plan; its version is replaced.
+        reason (str, optional): Logged with the new version. Defaults to "".
+
+    Returns:
+        Plan: The published plan.
+    """
+    with _write_lock:
+        published = _swap_plan(plan)
+    return _after_publish(published, reason)
+
+def update_plan(reason: str = "", **changes) -> Plan:
+    """Publish a copy of the current plan with the given fields changed.
+
+    Args:
+        reason (str, optional): Logged with the new version. Defaults to "".
+        **changes: Plan fields to change.
+
+    Returns:
+        Plan: The published plan.
+    """
+    with _write_lock:
+        published = _swap_plan(replace(_plan, **changes))
+    return _after_publish(published, reason)
+
+def _swap_plan(plan: Plan) -> Plan:
+    """Replace the current plan; the write lock must be held."""
+    global _plan
+    previous = _plan
+    _plan = replace(plan, version=previous.version + 1)
+    _sync_legacy_globals(previous, _plan)
+    return _plan
+
+def _after_publish(plan: Plan, reason: str) -> Plan:
+    invalidate_plan_responses(reason or f"plan version {plan.version}")
+    logger.debug("Published plan %s version %d: %s", plan.file_name, plan.version, reason)
+    return plan
+
+def set_box_height(height: int) -> Plan:
+    """Publish the current plan with a new box height.
+
+    Args:
+        height (int): The box height in mm.
+
+    Returns:
+        Plan: The current plan, a new version only if the height changed.
+    """
+    with _write_lock:
+        plan = _plan
+        if plan.package_dim is None or len(plan.package_dim) < 3 or plan.package_dim[2] == height:
+            return plan
+        package_dim = plan.package_dim[:2] + (height,) + plan.package_dim[3:]
+        published = _swap_plan(replace(plan, package_dim=package_dim))
+    return _after_publish(published, "box height changed")
+
+def make_plan(file_name: Optional[str], daten: List[List[int]], palette_dim: List[int], package_dim: List[int],
+              layer_types: int, layer_assignment: List[int], intermediate_layers: List[int],
+              packages_per_type: List[int], package_positions: List[List[int]],
+              number_of_layers: int, number_of_packages: int) -> Plan:
+    """Build an unpublished plan from parsed lists.
+
+    Returns:
+        Plan: The plan with every list converted to a tuple.
+    """
+    return Plan(
+        file_name=file_name,
+        daten=tuple(tuple(row) for row in daten),
+        palette_dim=tuple(palette_dim),
+        package_dim=tuple(package_dim),
+        layer_types=layer_types,
+        layer_assignment=tuple(layer_assignment),
+        intermediate_layers=tuple(intermediate_layers),
+        packages_per_type=tuple(packages_per_type),
+        package_positions=tuple(tuple(position) for position in package_positions),
+        number_of_layers=number_of_layers,
+        number_of_packages=number_of_packages,
+    )
+
+def _as_legacy(value):
+    """Convert a plan field to the mutable form the legacy globals used."""
+    if isinstance(value, tuple):
+        return [_as_legacy(item) for item in value]
+    return value
+
+def _sync_legacy_globals(previous: Plan, plan: Plan) -> None:
+    """Assign the legacy globals whose plan field changed."""
+    for field_name, global_name in LEGACY_GLOBALS.items():
+        value = getattr(plan, field_name)
+        if value is not getattr(previous, field_name):
+            setattr(global_vars, global_name, _as_legacy(value))
@@ -0,0 +1,88 @@
+"""
+Cache of marshalled XMLRPC responses for plan queries without arguments.
+
+The plan header queries (UR_Palette, UR_Karton, ...) return data that only
+changes when a plan is loaded or the box height changes. The server keeps the
+complete XML response of such a call and sends it again without running the
+handler or marshalling anything.
+
+Entries belong to a generation. `invalidate_plan_responses` starts a new,
+empty generation with a single reference swap, so a response computed from the
+previous plan while the swap happens is stored into the discarded generation
+and never served.
+"""
+
+import threading
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from utils.system.config.logging_config import setup_server_logger
+
+logger = setup_server_logger()
+
+# Methods whose response depends only on the loaded plan and the box height
+CACHEABLE_METHODS: FrozenSet[str] = frozenset({
+    "UR_Palette",
+    "UR_Karton",
+    "UR_Lagen",
+    "UR_Zwischenlagen",
+    "UR_PaketeZuordnung",
+    "UR_AnzLagen",
+    "UR_AnzPakete",
+    "UR_GetPlanHeader",
+})
+
+class ResponseCache:
+    """Marshalled responses of the current plan generation."""
+
+    def __init__(self, methods: FrozenSet[str] = CACHEABLE_METHODS):
+        self.methods = methods
+        self._generation: Tuple[int, Dict[str, bytes]] = (0, {})
+        self._invalidate_lock = threading.Lock()
+
+    def generation(self) -> Tuple[int, Dict[str, bytes]]:
+        """Get the current generation number and its entries.
+
+        Store new responses into the returned entries, so they are dropped if the
+        generation is invalidated in the meantime.
+
+        Returns:
+            Tuple[int, Dict[str, bytes]]: The generation number and the method -> response mapping.
+        """
+        return self._generation
+
+    def lookup(self, method: str) -> Optional[bytes]:
+        """Get the cached response of a method in the current generation."""
+        return self._generation[1].get(method)
+
+    def invalidate(self, reason: str = "") -> int:
+        """Drop all cached responses by starting a new generation.
+
+        Args:
+            reason (str, optional): Logged with the new generation. Defaults to "".
+
+        Returns:
+            int: The new generation number.
+        """
+        with self._invalidate_lock:
+            generation = self._generation[0] + 1
+            self._generation = (generation, {})
+        logger.debug("Plan response cache invalidated (generation %d): %s", generation, reason)
+        return generation
+
+_response_cache = ResponseCache()
+
+def get_response_cache() -> ResponseCache:
+    """Get the response cache of the robot interface.
+
+    Returns:
+        ResponseCache: The process wide cache.
+    """
+    return _response_cache
+
+def invalidate_plan_responses(reason: str = "") -> None:
+    """Drop the cached plan responses. Call after the plan or the box height changed.
+
+    Args:
+        reason (str, optional): Logged with the new generation. Defaults to "".
+    """
+    _response_cache.invalidate(reason)
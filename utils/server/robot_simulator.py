@@ -0,0 +1,239 @@
+"""
+Simulated robot clients for load and latency tests of the XMLRPC server.
+
+Each simulated robot replays a full palletizing cycle the way the URScript
+program does:
+
+1. UR_SetFileName and UR_ReadDataFromUsbStick
+2. the header calls (UR_Palette, UR_Karton, UR_Lagen, UR_Zwischenlagen,
+   UR_PaketeZuordnung, UR_AnzLagen, UR_AnzPakete, UR_Startlage, UR_CoG)
+3. one UR_PaketPos per pick, layer by layer
+4. for UR20 additionally intermediate layer requests, scanner status updates
+   and a palette change at the end of the cycle
+
+N robots run concurrently, each on its own persistent connection. Latencies
+are recorded per method on the client side and reported with throughput and
+p50/p95/p99. Without --url a local server is started on a temporary database
+holding a synthetic plan, so no controller, USB stick or UI is needed.
+
+Usage:
+    python -m utils.server.robot_simulator [--robots 4] [--cycles 3] [--robot-type UR20]
+    python -m utils.server.robot_simulator --url http://192.168.0.10:8080 --plan 12345
+"""
+
+import argparse
+import contextlib
+import itertools
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import xmlrpc.client
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+from utils.server.rpc_metrics import MethodMetrics
+
+# Scanner states sent by the UR20 safety program; mostly safe
+SCANNER_STATES = ["True,True,True"] * 8 + ["False,True,True", "True,False,True", "True,True,False", "False,False,False"]
+
+@dataclass
+class SimulationResult:
+    """Outcome of a simulation run."""
+    robots: int
+    cycles: int
+    seconds: float
+    calls: int
+    errors: int
+    latencies: Dict[str, MethodMetrics] = field(default_factory=dict)
+    error_samples: List[str] = field(default_factory=list)
+
+class SimulatedRobot:
+    """One robot replaying palletizing cycles over its own connection."""
+
+    def __init__(self, url: str, robot_type: str, plan: str, result: SimulationResult, lock: threading.Lock,
+                 pick_delay: float = 0.0, seed: int = 0):
+        self._proxy = xmlrpc.client.ServerProxy(url, allow_none=True)
+        self._robot_type = robot_type
+        self._plan = plan
+        self._result = result
+        self._lock = lock
+        self._pick_delay = pick_delay
+        self._random = random.Random(seed)
+        self._active_palette = 1
+
+    def call(self, method: str, *args):
+        """Call a server method and record its latency; faults are counted, not raised.
+
+        Returns:
+            The result, or None if the call failed.
+        """
+        start = time.perf_counter()
+        ok = False
+        try:
+            result = getattr(self._proxy, method)(*args)
+            ok = True
+            return result
+        except (xmlrpc.client.Fault, OSError, xmlrpc.client.ProtocolError) as e:
+            with self._lock:
+                self._result.errors += 1
+                if len(self._result.error_samples) < 10:
+                    self._result.error_samples.append(f"{method}{args}: {e}")
+            return None
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._result.calls += 1
+                metrics = self._result.latencies.setdefault(method, MethodMetrics())
+            metrics.record(elapsed, ok)
+
+    def run_cycle(self) -> None:
+        """Replay one full palletizing cycle."""
+        self.call("UR_SetFileName", self._plan)
+        if self.call("UR_ReadDataFromUsbStick") != 0:
+            return
+        for method in ("UR_Palette", "UR_Karton", "UR_AnzLagen", "UR_AnzPakete", "UR_Startlage"):
+            self.call(method)
+        layers = self.call("UR_Lagen") or []
+        intermediate_layers = self.call("UR_Zwischenlagen") or []
+        packages_per_type = self.call("UR_PaketeZuordnung") or []
+        self.call("UR_CoG", 12.5, 35.0, 1)
+
+        first_package = list(itertools.accumulate([0] + packages_per_type))
+        for layer, layer_type in enumerate(layers):
+            if self._robot_type == 'UR20' and layer < len(intermediate_layers) and intermediate_layers[layer]:
+                self.call("UR_SetZwischenLageLegen", True)
+                self.call("UR_SetZwischenLageLegen", False)
+            if not 1 <= layer_type <= len(packages_per_type):
+                continue
+            for pick in range(packages_per_type[layer_type - 1]):
+                self.call("UR_PaketPos", first_package[layer_type - 1] + pick)
+                if self._robot_type == 'UR20' and pick % 4 == 0:
+                    self.call("UR_scannerStatus", self._random.choice(SCANNER_STATES))
+                    self.call("UR_GetScannerOverwrite")
+                if self._pick_delay:
+                    time.sleep(self._pick_delay)
+
+        if self._robot_type == 'UR20':
+            new_palette = 2 if self._active_palette == 1 else 1
+            self.call("UR_GetPaletteStatus", new_palette)
+            if self.call("UR_RequestPaletteChange", self._active_palette, new_palette) == 1:
+                self._active_palette = new_palette
+            self.call("UR_GetActivePaletteNumber")
+
+def run_simulation(url: str, robots: int = 4, cycles: int = 3, robot_type: str = 'UR10', plan: str = "simulated",
+                   pick_delay: float = 0.0) -> SimulationResult:
+    """Run concurrent simulated robots against a server.
+
+    Args:
+        url (str): URL of the XMLRPC server.
+        robots (int, optional): Number of concurrent robots. Defaults to 4.
+        cycles (int, optional): Cycles per robot. Defaults to 3.
+        robot_type (str, optional): 'UR10' or 'UR20'. Defaults to 'UR10'.
+        plan (str, optional): Plan name (without .rob) passed to UR_SetFileName. Defaults to "simulated".
+        pick_delay (float, optional): Seconds each robot waits after a pick. Defaults to 0.0.
+
+    Returns:
+        SimulationResult: Calls, errors, duration and per-method latencies.
+    """
+    result = SimulationResult(robots=robots, cycles=cycles, seconds=0.0, calls=0, errors=0)
+    lock = threading.Lock()
+    simulated = [SimulatedRobot(url, robot_type, plan, result, lock, pick_delay, seed=n) for n in range(robots)]
+    barrier = threading.Barrier(robots)
+
+    def worker(robot: SimulatedRobot) -> None:
+        barrier.wait()
+        for _ in range(cycles):
+            robot.run_cycle()
+
+    threads = [threading.Thread(target=worker, args=(robot,), name=f"robot-{n}", daemon=True)
+               for n, robot in enumerate(simulated)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result.seconds = time.perf_counter() - start
+    return result
+
+@contextlib.contextmanager
+def local_server(robot_type: str, plan: str, threaded: bool = True) -> Iterator[str]:
+    """Serve a synthetic plan from a temporary database on an ephemeral port.
+
+    The working directory is switched to a temporary directory for the duration,
+    because the database is opened relative to it.
+
+    Args:
+        robot_type (str): 'UR10' or 'UR20'.
+        plan (str): Plan name (without .rob) to generate.
+        threaded (bool, optional): Use the pooled server. Defaults to True.
+
+    Yields:
+        str: The server URL.
+    """
+    from utils.database.database import save_to_database
+    from utils.database.rob_export import generate_synthetic_corpus
+    from utils.server.rpc_logging import LOG_OFF, RpcLogPolicy
+    from utils.server.rpc_server import create_server
+    from utils.server.server import register_functions
+
+    previous_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        server = None
+        try:
+            generate_synthetic_corpus(tmp_dir, 1)
+            os.replace(os.path.join(tmp_dir, "synthetic_00000.rob"), os.path.join(tmp_dir, f"{plan}.rob"))
+            if not save_to_database(f"{plan}.rob", path_usb_stick=tmp_dir + os.sep):
+                raise RuntimeError("Could not store the synthetic plan")
+            server = create_server(("127.0.0.1", 0), threaded=threaded)
+            register_functions(server, robot_type, RpcLogPolicy(default_mode=LOG_OFF))
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            yield f"http://127.0.0.1:{server.server_address[1]}"
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+            os.chdir(previous_cwd)
+
+def print_report(result: SimulationResult) -> None:
+    """Print throughput and per-method latency percentiles."""
+    print(f"{result.robots} robots x {result.cycles} cycles in {result.seconds:.2f} s: "
+          f"{result.calls} calls ({result.calls / result.seconds:.0f} calls/s), "
+          f"{result.robots * result.cycles / result.seconds:.2f} cycles/s, {result.errors} errors")
+    print(f"{'method':<28} {'calls':>7} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for method, metrics in sorted(result.latencies.items(), key=lambda item: item[1].calls, reverse=True):
+        summary = metrics.summary()
+        print(f"{method:<28} {summary['calls']:>7} {summary['errors']:>6} {summary['p50_ms']:>8.3f} "
+              f"{summary['p95_ms']:>8.3f} {summary['p99_ms']:>8.3f} {summary['max_ms']:>8.3f}")
+    for sample in result.error_samples:
+        print(f"error: {sample}")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point.
+
+    Returns:
+        int: 0 if no call failed, 1 otherwise.
+    """
+    parser = argparse.ArgumentParser(description="Simulated robots for load and latency tests of the XMLRPC server")
+    parser.add_argument("--robots", type=int, default=4)
+    parser.add_argument("--cycles", type=int, default=3, help="palletizing cycles per robot")
+    parser.add_argument("--robot-type", choices=['UR10', 'UR20'], default='UR10')
+    parser.add_argument("--pick-delay", type=float, default=0.0, help="seconds between picks")
+    parser.add_argument("--url", help="server to test instead of a local one")
+    parser.add_argument("--plan", default="simulated", help="plan name for UR_SetFileName")
+    parser.add_argument("--serial", action="store_true", help="use the single-threaded local server")
+    args = parser.parse_args(argv)
+
+    if args.url:
+        result = run_simulation(args.url, args.robots, args.cycles, args.robot_type, args.plan, args.pick_delay)
+    else:
+        with local_server(args.robot_type, args.plan, threaded=not args.serial) as url:
+            result = run_simulation(url, args.robots, args.cycles, args.robot_type, args.plan, args.pick_delay)
+    print_report(result)
+    return 1 if result.errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+"""
+Latency comparison of the ways the robot can fetch a palette plan.
+
+A synthetic plan is installed in global_vars and served by a local XMLRPC
+server on an ephemeral port. The robot's access pattern is then replayed in
+three variants:
+
+- per-call: UR_Palette, UR_Karton, UR_Lagen, UR_Zwischenlagen,
+  UR_PaketeZuordnung and one UR_PaketPos per package, each its own request
+- multicall: the same calls bundled with system.multicall, one request for
+  the header and one per layer type
+- batched: UR_GetPlanHeader once and UR_GetLayerPositions once per layer type
+
+Every pattern is fetched by --clients concurrent clients, by default more than
+the pooled server has call workers, as several robots and diagnostic clients
+would. A pattern whose calls fail (e.g. the deadline fault of a pool that is
+blocked on itself) aborts the benchmark.
+
+With --compare-handlers it instead measures the latency of single calls on the
+original server setup (HTTP/1.0, a new TCP connection per call, request
+logging) against the tuned handlers of utils.server.rpc_server.
+
+--log-mode sets the call logging of every method (default off) to measure its
+overhead.
+
+Usage:
+    python -m utils.server.rpc_benchmark [--layer-types 3] [--packages 24] [--rounds 20] [--clients 8] [--serial] [--log-mode off]
+    python -m utils.server.rpc_benchmark --compare-handlers [--calls 500]
+"""
+
+import argparse
+import contextlib
+import os
+import statistics
+import sys
+import threading
+import time
+import xmlrpc.client
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+from xmlrpc.server import SimpleXMLRPCServer
+
+from utils.system.core import global_vars
+from utils.server.rpc_server import DEFAULT_WORKERS, create_server
+from utils.server.server import register_functions
+from utils.server.rpc_logging import LOG_MODES, LOG_OFF, RpcLogPolicy
+from utils.server.plan_state import make_plan, publish_plan
+
+# Concurrent clients per pattern, more than the call workers of the pooled server
+DEFAULT_CLIENTS = 2 * DEFAULT_WORKERS
+
+def install_synthetic_plan(layer_types: int = 3, packages_per_layer: int = 24, layers: int = 12) -> None:
+    """Publish a synthetic plan.
+
+    Args:
+        layer_types (int, optional): Number of layer types. Defaults to 3.
+        packages_per_layer (int, optional): Number of package positions per layer type. Defaults to 24.
+        layers (int, optional): Number of layers on the palette. Defaults to 12.
+    """
+    global_vars.FILENAME = "benchmark.rob"
+    publish_plan(make_plan(
+        file_name=global_vars.FILENAME,
+        daten=[],
+        palette_dim=[1200, 800, 144],
+        package_dim=[300, 200, 150, 0],
+        layer_types=layer_types,
+        layer_assignment=[layer % layer_types + 1 for layer in range(layers)],
+        intermediate_layers=[layer % 2 for layer in range(layers)],
+        packages_per_type=[packages_per_layer] * layer_types,
+        package_positions=[[100 * i, 50 * i, 0, 150 + 10 * i, 100 + 5 * i, 90 * (i % 4), 1, 1, 0]
+                           for i in range(layer_types * packages_per_layer)],
+        number_of_layers=layers,
+        number_of_packages=packages_per_layer,
+    ), "synthetic plan installed")
+
+def fetch_per_call(proxy: xmlrpc.client.ServerProxy) -> int:
+    """Fetch the plan one value per request.
+
+    Returns:
+        int: Number of HTTP round trips.
+    """
+    proxy.UR_Palette()
+    proxy.UR_Karton()
+    proxy.UR_Lagen()
+    proxy.UR_Zwischenlagen()
+    packages_per_layer = proxy.UR_PaketeZuordnung()
+    round_trips = 5
+    for number in range(sum(packages_per_layer)):
+        proxy.UR_PaketPos(number)
+        round_trips += 1
+    return round_trips
+
+def fetch_multicall(proxy: xmlrpc.client.ServerProxy) -> int:
+    """Fetch the plan with system.multicall, one request for the header and one per layer type.
+
+    Returns:
+        int: Number of HTTP round trips.
+    """
+    header = xmlrpc.client.MultiCall(proxy)
+    header.UR_Palette()
+    header.UR_Karton()
+    header.UR_Lagen()
+    header.UR_Zwischenlagen()
+    header.UR_PaketeZuordnung()
+    packages_per_layer = list(header())[-1]
+    number = 0
+    for count in packages_per_layer:
+        positions = xmlrpc.client.MultiCall(proxy)
+        for _ in range(count):
+            positions.UR_PaketPos(number)
+            number += 1
+        list(positions())
+    return 1 + len(packages_per_layer)
+
+def fetch_batched(proxy: xmlrpc.client.ServerProxy) -> int:
+    """Fetch the plan with the batched endpoints.
+
+    Returns:
+        int: Number of HTTP round trips.
+    """
+    header = proxy.UR_GetPlanHeader()
+    packages_per_layer = header[4]
+    for layer_type in range(1, len(packages_per_layer) + 1):
+        proxy.UR_GetLayerPositions(layer_type)
+    return 1 + len(packages_per_layer)
+
+PATTERNS: Dict[str, Callable[[xmlrpc.client.ServerProxy], int]] = {
+    "per-call": fetch_per_call,
+    "multicall": fetch_multicall,
+    "batched": fetch_batched,
+}
+
+def _fetch_rounds(url: str, pattern: Callable[[xmlrpc.client.ServerProxy], int], rounds: int) -> Tuple[int, List[float]]:
+    """Fetch the plan `rounds` times on one connection after a warm-up fetch.
+
+    Returns:
+        Tuple[int, List[float]]: The round trips per fetch and the fetch durations in seconds.
+    """
+    proxy = xmlrpc.client.ServerProxy(url, allow_none=True)
+    round_trips = pattern(proxy)  # warm up
+    durations = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        pattern(proxy)
+        durations.append(time.perf_counter() - start)
+    return round_trips, durations
+
+def run_benchmark(rounds: int = 20, threaded: bool = True, log_mode: str = LOG_OFF,
+                  clients: int = DEFAULT_CLIENTS) -> Dict[str, Tuple[int, List[float]]]:
+    """Serve the synthetic plan locally and time every access pattern.
+
+    Args:
+        rounds (int, optional): Number of full plan fetches per client and pattern. Defaults to 20.
+        threaded (bool, optional): Use the pooled server instead of the single-threaded one. Defaults to True.
+        log_mode (str, optional): Call logging mode of every method. Defaults to LOG_OFF.
+        clients (int, optional): Number of clients fetching concurrently. Defaults to DEFAULT_CLIENTS.
+
+    Raises:
+        xmlrpc.client.Fault: If a call of a pattern failed.
+
+    Returns:
+        Dict[str, Tuple[int, List[float]]]: Per pattern the round trips per fetch and the fetch durations
+            of all clients in seconds.
+    """
+    server = create_server(("127.0.0.1", 0), threaded=threaded)
+    register_functions(server, 'UR10', RpcLogPolicy(default_mode=log_mode))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    results: Dict[str, Tuple[int, List[float]]] = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, clients)) as pool:
+            for name, pattern in PATTERNS.items():
+                fetches = [pool.submit(_fetch_rounds, url, pattern, rounds) for _ in range(max(1, clients))]
+                client_results = [fetch.result() for fetch in fetches]
+                results[name] = (client_results[0][0], [duration for _, durations in client_results for duration in durations])
+    finally:
+        server.shutdown()
+        server.server_close()
+    return results
+
+def measure_call_latency(server: SimpleXMLRPCServer, calls: int = 500) -> List[float]:
+    """Serve the synthetic plan on the given server and time single UR_Palette calls.
+
+    Args:
+        server (SimpleXMLRPCServer): A server bound to an ephemeral local port.
+        calls (int, optional): Number of timed calls. Defaults to 500.
+
+    Returns:
+        List[float]: The call durations in seconds.
+    """
+    register_functions(server, 'UR10', RpcLogPolicy(default_mode=LOG_OFF))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    proxy = xmlrpc.client.ServerProxy(f"http://127.0.0.1:{server.server_address[1]}", allow_none=True)
+    durations = []
+    try:
+        proxy.UR_Palette()  # warm up
+        for _ in range(calls):
+            start = time.perf_counter()
+            proxy.UR_Palette()
+            durations.append(time.perf_counter() - start)
+    finally:
+        server.shutdown()
+        server.server_close()
+    return durations
+
+def compare_handlers(calls: int = 500) -> Dict[str, List[float]]:
+    """Compare single-call latency of the original server setup and the tuned servers.
+
+    Args:
+        calls (int, optional): Number of timed calls per server. Defaults to 500.
+
+    Returns:
+        Dict[str, List[float]]: Per server setup the call durations in seconds.
+    """
+    results = {}
+    # The original setup logs every request to stderr, keep that cost but not the output
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stderr(devnull):
+        results["before (HTTP/1.0)"] = measure_call_latency(SimpleXMLRPCServer(("127.0.0.1", 0), allow_none=True), calls)
+    results["serial (HTTP/1.0)"] = measure_call_latency(create_server(("127.0.0.1", 0), threaded=False), calls)
+    results["pooled (keep-alive)"] = measure_call_latency(create_server(("127.0.0.1", 0), threaded=True), calls)
+    return results
+
+def _percentile(durations: List[float], fraction: float) -> float:
+    ordered = sorted(durations)
+    return ordered[max(0, int(len(ordered) * fraction) - 1)]
+
+def main(argv=None) -> int:
+    """Command line entry point.
+
+    Returns:
+        int: 0 on success.
+    """
+    parser = argparse.ArgumentParser(description="Compare per-call, multicall and batched plan fetching")
+    parser.add_argument("--layer-types", type=int, default=3)
+    parser.add_argument("--packages", type=int, default=24, help="package positions per layer type")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--clients", type=int, default=DEFAULT_CLIENTS, help="concurrent clients per pattern")
+    parser.add_argument("--serial", action="store_true", help="use the single-threaded server")
+    parser.add_argument("--log-mode", choices=LOG_MODES, default=LOG_OFF, help="call logging mode of every method")
+    parser.add_argument("--compare-handlers", action="store_true", help="compare single-call latency before and after the HTTP tuning")
+    parser.add_argument("--calls", type=int, default=500, help="timed calls per server for --compare-handlers")
+    args = parser.parse_args(argv)
+
+    install_synthetic_plan(args.layer_types, args.packages)
+
+    if args.compare_handlers:
+        results = compare_handlers(args.calls)
+        baseline = statistics.median(results["before (HTTP/1.0)"])
+        print(f"{'server':<20} {'median ms':>10} {'p95 ms':>8} {'p99 ms':>8} {'speedup':>8}")
+        for name, durations in results.items():
+            median = statistics.median(durations)
+            print(f"{name:<20} {median * 1000:>10.3f} {_percentile(durations, 0.95) * 1000:>8.3f} "
+                  f"{_percentile(durations, 0.99) * 1000:>8.3f} {baseline / median:>7.1f}x")
+        return 0
+
+    results = run_benchmark(args.rounds, threaded=not args.serial, log_mode=args.log_mode, clients=args.clients)
+
+    baseline = statistics.median(results["per-call"][1])
+    print(f"{'pattern':<10} {'round trips':>11} {'median ms':>10} {'p95 ms':>8} {'speedup':>8}")
+    for name, (round_trips, durations) in results.items():
+        median = statistics.median(durations)
+        p95 = _percentile(durations, 0.95)
+        print(f"{name:<10} {round_trips:>11} {median * 1000:>10.2f} {p95 * 1000:>8.2f} {baseline / median:>7.1f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,340 @@
+"""
+Binary journal of incoming XMLRPC requests with offline replay.
+
+When enabled, every request the server answers is appended to a journal file:
+the wall clock time, the call duration, the raw request body and a digest of
+the response. The RPC thread only puts a tuple on a bounded queue; a
+background thread extracts the method name, hashes the response and writes
+the record. If the writer falls behind, records are dropped and counted instead
+of slowing down the robot.
+
+File layout (little endian):
+
+    header  b"MPJ1" + started (double)
+    record  timestamp (double), duration (float), flags (uint8, bit 0 = ok),
+            response digest (16 bytes, BLAKE2b), method length (uint16),
+            request length (uint32), method (UTF-8), request body
+
+The replay tool posts the recorded request bodies to a server over one
+persistent connection, at the recorded pace or as fast as possible, and reports
+every response whose digest differs from the recorded one:
+
+    python -m utils.server.rpc_journal dump JOURNAL
+    python -m utils.server.rpc_journal replay JOURNAL [--url URL] [--speed 1.0 | --fast]
+
+Without --url a local server is started in the working directory, so the
+database there must hold the plans the journal loads.
+"""
+
+import argparse
+import hashlib
+import http.client
+import os
+import queue
+import re
+import struct
+import sys
+import threading
+import time
+import urllib.parse
+from dataclasses import dataclass
+from datetime import datetime
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+from xmlrpc.client import Fault, loads
+
+from utils.system.config.logging_config import get_server_log_dir, setup_server_logger
+
+logger = setup_server_logger()
+
+MAGIC = b"MPJ1"
+HEADER = struct.Struct("<d")
+RECORD = struct.Struct("<dfB16sHI")
+DIGEST_SIZE = 16
+FLAG_OK = 0x01
+# Requests kept in memory while the writer is busy
+DEFAULT_QUEUE_SIZE = 10000
+# Seconds between flushes of the journal file
+FLUSH_INTERVAL = 1.0
+
+_METHOD_NAME = re.compile(rb"<methodName>([^<]*)</methodName>")
+_FAULT = b"<fault>"
+
+def response_digest(response: bytes) -> bytes:
+    """Get the digest stored for a response.
+
+    Args:
+        response (bytes): The encoded XMLRPC response.
+
+    Returns:
+        bytes: The 16 byte BLAKE2b digest.
+    """
+    return hashlib.blake2b(response, digest_size=DIGEST_SIZE).digest()
+
+@dataclass(frozen=True)
+class JournalRecord:
+    """One journaled request."""
+    timestamp: float
+    duration: float
+    ok: bool
+    digest: bytes
+    method: str
+    request: bytes
+
+    @property
+    def params(self) -> tuple:
+        """The decoded call parameters, empty if the request is malformed."""
+        try:
+            return loads(self.request, use_builtin_types=True)[0]
+        except Exception:
+            return ()
+
+class RpcJournal:
+    """Writes journal records on a background thread."""
+
+    def __init__(self, path: str, queue_size: int = DEFAULT_QUEUE_SIZE):
+        """Open the journal file and start the writer thread.
+
+        Args:
+            path (str): The journal file; its directory is created if needed.
+            queue_size (int, optional): Requests kept while the writer is busy. Defaults to DEFAULT_QUEUE_SIZE.
+        """
+        self.path = path
+        self.written = 0
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Tuple[float, float, bytes, bytes]]]" = queue.Queue(maxsize=queue_size)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file: BinaryIO = open(path, "wb")
+        self._file.write(MAGIC + HEADER.pack(time.time()))
+        self._thread = threading.Thread(target=self._write_loop, name="rpc-journal", daemon=True)
+        self._thread.start()
+        logger.info(f"RPC journal writing to {path}")
+
+    def record(self, started: float, duration: float, request: bytes, response: bytes) -> None:
+        """Queue a request for the journal. Never blocks.
+
+        Args:
+            started (float): Wall clock time the request was received.
+            duration (float): Seconds until the response was ready.
+            request (bytes): The raw request body.
+            response (bytes): The encoded response.
+        """
+        try:
+            self._queue.put_nowait((started, duration, request, response))
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self) -> None:
+        """Write the queued records and close the file."""
+        if self._file.closed:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+        if self._thread.is_alive():
+            logger.warning("RPC journal writer did not finish in time")
+            return
+        self._file.close()
+        logger.info(f"RPC journal closed: {self.written} requests written, {self.dropped} dropped")
+
+    def _write_loop(self) -> None:
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=FLUSH_INTERVAL)
+            except queue.Empty:
+                item = ()
+            if item is None:
+                break
+            if item:
+                try:
+                    self._write(*item)
+                except (OSError, ValueError) as e:
+                    logger.error(f"RPC journal write failed, journal stopped: {e}")
+                    break
+            if time.monotonic() - last_flush >= FLUSH_INTERVAL:
+                self._file.flush()
+                last_flush = time.monotonic()
+        self._file.flush()
+
+    def _write(self, started: float, duration: float, request: bytes, response: bytes) -> None:
+        match = _METHOD_NAME.search(request)
+        method = match.group(1)[:0xFFFF] if match else b""
+        flags = 0 if _FAULT in response else FLAG_OK
+        self._file.write(RECORD.pack(started, duration, flags, response_digest(response), len(method), len(request)))
+        self._file.write(method)
+        self._file.write(request)
+        self.written += 1
+
+class RequestJournalMixin:
+    """Passes every answered request to an RpcJournal while one is set.
+
+    Must come first in the bases, so it sees the final response, including
+    responses served from the response cache.
+    """
+    journal: Optional[RpcJournal] = None
+
+    def _marshaled_dispatch(self, data: bytes, dispatch_method=None, path=None) -> bytes:
+        journal = self.journal
+        if journal is None:
+            return super()._marshaled_dispatch(data, dispatch_method, path)
+        started = time.time()
+        start = time.perf_counter()
+        response = super()._marshaled_dispatch(data, dispatch_method, path)
+        journal.record(started, time.perf_counter() - start, data, response)
+        return response
+
+def default_journal_path(directory: str = "") -> str:
+    """Get a new journal file name.
+
+    Args:
+        directory (str, optional): Directory of the journal. Defaults to a journal folder next to the server log.
+
+    Returns:
+        str: The journal path.
+    """
+    directory = directory or os.path.join(get_server_log_dir(), "journal")
+    return os.path.join(directory, f"rpc_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mpj")
+
+def read_journal(path: str) -> Iterator[JournalRecord]:
+    """Read the records of a journal file.
+
+    A record cut off at the end of the file (the server was killed) is skipped.
+
+    Args:
+        path (str): The journal file.
+
+    Yields:
+        JournalRecord: The records in the order they were written.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an RPC journal")
+        f.read(HEADER.size)
+        while True:
+            head = f.read(RECORD.size)
+            if len(head) < RECORD.size:
+                return
+            timestamp, duration, flags, digest, method_length, request_length = RECORD.unpack(head)
+            method = f.read(method_length)
+            request = f.read(request_length)
+            if len(request) < request_length:
+                return
+            yield JournalRecord(timestamp, duration, bool(flags & FLAG_OK), digest,
+                                method.decode("utf-8", errors="replace"), request)
+
+@dataclass
+class ReplayResult:
+    """Outcome of a replay."""
+    requests: int = 0
+    mismatches: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+    recorded_seconds: float = 0.0
+
+def _describe_response(response: bytes) -> str:
+    try:
+        return repr(loads(response, use_builtin_types=True)[0][0])
+    except Fault as fault:
+        return f"fault {fault.faultCode}: {fault.faultString}"
+    except Exception:
+        return repr(response[:200])
+
+def replay(records: List[JournalRecord], url: str, speed: Optional[float] = 1.0, verbose: bool = True) -> ReplayResult:
+    """Post recorded requests to a server and compare the response digests.
+
+    Args:
+        records (List[JournalRecord]): The recorded requests.
+        url (str): URL of the XMLRPC server.
+        speed (Optional[float], optional): Pace relative to the recording; None replays as fast as possible. Defaults to 1.0.
+        verbose (bool, optional): Print every mismatch. Defaults to True.
+
+    Returns:
+        ReplayResult: Counts and durations of the replay.
+    """
+    result = ReplayResult()
+    if not records:
+        return result
+    parts = urllib.parse.urlsplit(url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    path = parts.path or "/RPC2"
+    result.recorded_seconds = records[-1].timestamp - records[0].timestamp
+    start = time.perf_counter()
+    try:
+        for number, record in enumerate(records):
+            if speed:
+                delay = (record.timestamp - records[0].timestamp) / speed - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            try:
+                connection.request("POST", path, record.request, {"Content-Type": "text/xml"})
+                response = connection.getresponse().read()
+            except (OSError, http.client.HTTPException) as e:
+                result.errors += 1
+                print(f"#{number} {record.method}: {e}")
+                connection.close()
+                continue
+            result.requests += 1
+            if response_digest(response) != record.digest:
+                result.mismatches += 1
+                if verbose:
+                    print(f"#{number} {record.method}{record.params}: response differs, now {_describe_response(response)}"
+                          f"{'' if record.ok else ' (recorded a fault)'}")
+    finally:
+        connection.close()
+    result.seconds = time.perf_counter() - start
+    return result
+
+def _local_server_url(robot_type: str):
+    from utils.server.rpc_logging import LOG_OFF, RpcLogPolicy
+    from utils.server.rpc_server import create_server
+    from utils.server.server import register_functions
+
+    server = create_server(("127.0.0.1", 0), threaded=True)
+    register_functions(server, robot_type, RpcLogPolicy(default_mode=LOG_OFF))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point.
+
+    Returns:
+        int: 0 if every replayed response matched, 1 otherwise.
+    """
+    parser = argparse.ArgumentParser(description="Inspect and replay RPC journals")
+    commands = parser.add_subparsers(dest="command", required=True)
+    dump_parser = commands.add_parser("dump", help="print the recorded requests")
+    dump_parser.add_argument("journal")
+    replay_parser = commands.add_parser("replay", help="replay the requests and compare the responses")
+    replay_parser.add_argument("journal")
+    replay_parser.add_argument("--url", help="server to replay against instead of a local one")
+    replay_parser.add_argument("--robot-type", choices=['UR10', 'UR20'], default='UR10', help="functions of the local server")
+    pace = replay_parser.add_mutually_exclusive_group()
+    pace.add_argument("--speed", type=float, default=1.0, help="pace relative to the recording")
+    pace.add_argument("--fast", action="store_true", help="replay as fast as possible")
+    replay_parser.add_argument("--quiet", action="store_true", help="only print the summary")
+    args = parser.parse_args(argv)
+
+    records = list(read_journal(args.journal))
+    if args.command == "dump":
+        first = records[0].timestamp if records else 0.0
+        for record in records:
+            print(f"{record.timestamp - first:10.3f} s {record.duration * 1000:8.3f} ms "
+                  f"{'ok   ' if record.ok else 'fault'} {record.method}{record.params}")
+        print(f"{len(records)} requests")
+        return 0
+
+    server = None
+    url = args.url
+    if url is None:
+        server, url = _local_server_url(args.robot_type)
+    try:
+        result = replay(records, url, None if args.fast else args.speed, verbose=not args.quiet)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+    print(f"{result.requests} requests replayed in {result.seconds:.2f} s (recorded {result.recorded_seconds:.2f} s), "
+          f"{result.mismatches} responses differ, {result.errors} failed")
+    return 1 if result.mismatches or result.errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
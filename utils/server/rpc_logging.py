@@ -0,0 +1,150 @@
+"""
+Per-method logging of XMLRPC calls.
+
+Every registered robot function can be logged in one of four modes:
+
+- off: the function is registered unwrapped, no logging overhead at all
+- errors: only calls that raise are logged, with their arguments
+- sampled: every n-th call is logged in full, failing calls always
+- full: every call and its result is logged
+
+Messages use lazy %-formatting, so arguments and results are only turned into
+text for records that are actually emitted. The server logger hands records to
+a queue listener (see setup_server_logger), so the RPC threads never write files.
+
+The mode comes from the `server` settings group: `rpc_log_mode` is the default,
+`rpc_log_sample_every` the sampling interval and `rpc_log_overrides` a comma
+separated list of `method=mode` entries.
+"""
+
+import itertools
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Callable, Dict
+
+from utils.system.core import global_vars
+from utils.system.config.logging_config import setup_server_logger
+
+logger = setup_server_logger()
+
+LOG_OFF = "off"
+LOG_ERRORS = "errors"
+LOG_SAMPLED = "sampled"
+LOG_FULL = "full"
+LOG_MODES = (LOG_OFF, LOG_ERRORS, LOG_SAMPLED, LOG_FULL)
+
+DEFAULT_LOG_MODE = LOG_SAMPLED
+DEFAULT_SAMPLE_EVERY = 50
+
+@dataclass(frozen=True)
+class RpcLogPolicy:
+    """Logging mode per XMLRPC method."""
+    default_mode: str = DEFAULT_LOG_MODE
+    sample_every: int = DEFAULT_SAMPLE_EVERY
+    overrides: Dict[str, str] = field(default_factory=dict)
+
+    def mode_for(self, name: str) -> str:
+        """Get the logging mode of a method.
+
+        Args:
+            name (str): The registered method name.
+
+        Returns:
+            str: One of LOG_MODES.
+        """
+        return self.overrides.get(name, self.default_mode)
+
+def parse_overrides(text: str) -> Dict[str, str]:
+    """Parse a `method=mode, method=mode` list, skipping invalid entries.
+
+    Args:
+        text (str): The override list.
+
+    Returns:
+        Dict[str, str]: Mapping of method name to logging mode.
+    """
+    overrides = {}
+    for entry in text.split(","):
+        name, _, mode = entry.partition("=")
+        name, mode = name.strip(), mode.strip().lower()
+        if not name:
+            continue
+        if mode not in LOG_MODES:
+            logger.warning("Ignoring RPC log override %r: unknown mode %r", name, mode)
+            continue
+        overrides[name] = mode
+    return overrides
+
+def policy_from_settings() -> RpcLogPolicy:
+    """Build the logging policy from the `server` settings group.
+
+    Returns:
+        RpcLogPolicy: The policy, the defaults if the settings are unavailable.
+    """
+    try:
+        server_settings = global_vars.settings.settings['server']
+        default_mode = str(server_settings['rpc_log_mode']).lower()
+        if default_mode not in LOG_MODES:
+            logger.warning("Unknown RPC log mode %r, using %r", default_mode, DEFAULT_LOG_MODE)
+            default_mode = DEFAULT_LOG_MODE
+        return RpcLogPolicy(default_mode=default_mode,
+                            sample_every=max(1, int(server_settings['rpc_log_sample_every'])),
+                            overrides=parse_overrides(server_settings['rpc_log_overrides']))
+    except (AttributeError, KeyError, TypeError, ValueError) as e:
+        logger.error("Error accessing RPC log settings: %s. Using defaults", e)
+        return RpcLogPolicy()
+
+def wrap_rpc_call(func: Callable, name: str, policy: RpcLogPolicy) -> Callable:
+    """Wrap a robot function with the logging its mode asks for.
+
+    Args:
+        func (Callable): The function to register.
+        name (str): The registered method name.
+        policy (RpcLogPolicy): The logging policy.
+
+    Returns:
+        Callable: The function itself in mode off, otherwise a logging wrapper.
+    """
+    mode = policy.mode_for(name)
+    if mode == LOG_OFF:
+        return func
+
+    if mode == LOG_FULL:
+        @wraps(func)
+        def log_full(*args):
+            logger.info("XMLRPC call: %s%r", name, args)
+            try:
+                result = func(*args)
+            except Exception:
+                logger.exception("XMLRPC call failed: %s%r", name, args)
+                raise
+            logger.info("XMLRPC result: %s -> %r", name, result)
+            return result
+        return log_full
+
+    if mode == LOG_SAMPLED:
+        # next() on itertools.count is atomic, so the counter is safe across RPC threads
+        calls = itertools.count(1)
+        sample_every = policy.sample_every
+
+        @wraps(func)
+        def log_sampled(*args):
+            number = next(calls)
+            try:
+                result = func(*args)
+            except Exception:
+                logger.exception("XMLRPC call failed: %s%r", name, args)
+                raise
+            if number % sample_every == 0:
+                logger.info("XMLRPC call #%d (1 in %d logged): %s%r -> %r", number, sample_every, name, args, result)
+            return result
+        return log_sampled
+
+    @wraps(func)
+    def log_errors(*args):
+        try:
+            return func(*args)
+        except Exception:
+            logger.exception("XMLRPC call failed: %s%r", name, args)
+            raise
+    return log_errors
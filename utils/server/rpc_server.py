@@ -0,0 +1,308 @@
+"""
+XMLRPC server variants used by the robot interface.
+
+`TimedXMLRPCServer` is the classic single-threaded server: one request is
+handled at a time. `PooledXMLRPCServer` handles connections on a bounded
+worker pool, so a slow call (SQLite, Qt, a diagnostic client) no longer blocks
+every other client, and gives every call a deadline after which the client
+receives a fault. Both record the duration of every call.
+
+The pooled server speaks HTTP/1.1 with persistent connections, so the robot
+pays the TCP handshake once instead of on every call. The single-threaded
+server stays on HTTP/1.0: a persistent connection would lock out every other
+client there.
+
+Both answer plan queries without arguments from the marshalled response cache
+(see utils.server.response_cache) while the plan is unchanged, and pass every
+request to the RPC journal while one is set (see utils.server.rpc_journal).
+"""
+
+import socket
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import Any, Deque, List, Optional, Tuple
+from xmlrpc.client import Fault, dumps, loads
+from xmlrpc.server import SimpleXMLRPCServer, SimpleXMLRPCRequestHandler
+
+from utils.system.config.logging_config import setup_server_logger
+from utils.server.response_cache import ResponseCache, get_response_cache
+from utils.server.rpc_journal import RequestJournalMixin
+from utils.server.rpc_metrics import get_rpc_metrics
+
+logger = setup_server_logger()
+
+DEFAULT_ADDRESS: Tuple[str, int] = ("", 8080)
+DEFAULT_WORKERS = 4
+DEFAULT_REQUEST_DEADLINE = 10.0
+# Connections served on top of the number of call workers
+DEFAULT_MAX_PENDING = 16
+# Number of call timings kept for inspection
+MAX_CALL_TIMINGS = 1000
+# Seconds an idle persistent connection is kept open
+KEEP_ALIVE_TIMEOUT = 30.0
+
+# Fault codes in the XMLRPC server error range
+FAULT_DEADLINE_EXCEEDED = -32001
+FAULT_SERVER_BUSY = -32002
+
+class QuietRequestHandler(SimpleXMLRPCRequestHandler):
+    """HTTP/1.0 request handler without Nagle delay and without request logging."""
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+class KeepAliveRequestHandler(QuietRequestHandler):
+    """HTTP/1.1 request handler that keeps the connection open between calls.
+
+    Idle connections are closed after KEEP_ALIVE_TIMEOUT seconds.
+    """
+    protocol_version = "HTTP/1.1"
+    timeout = KEEP_ALIVE_TIMEOUT
+
+@dataclass(frozen=True)
+class CallTiming:
+    """Timing of a single XMLRPC call."""
+    method: str
+    started: float
+    duration: float
+    ok: bool
+    thread: str
+
+class CallTimingMixin:
+    """Records the duration of every dispatched call.
+
+    Must come before the XMLRPC server class in the bases so it wraps `_dispatch`.
+    """
+
+    def _init_call_timing(self, max_timings: int = MAX_CALL_TIMINGS) -> None:
+        self._call_timings: Deque[CallTiming] = deque(maxlen=max_timings)
+        self._call_timings_lock = threading.Lock()
+
+    def _dispatch(self, method: str, params: tuple) -> Any:
+        started = time.time()
+        start = time.perf_counter()
+        ok = False
+        try:
+            result = self._dispatch_call(method, params)
+            ok = True
+            return result
+        finally:
+            duration = time.perf_counter() - start
+            timing = CallTiming(method, started, duration, ok, threading.current_thread().name)
+            with self._call_timings_lock:
+                self._call_timings.append(timing)
+
+    def _dispatch_call(self, method: str, params: tuple) -> Any:
+        """Run the registered function; overridden by servers that dispatch elsewhere."""
+        return super()._dispatch(method, params)
+
+    def get_call_timings(self) -> List[CallTiming]:
+        """Get the most recent call timings, oldest first.
+
+        Returns:
+            List[CallTiming]: The recorded call timings.
+        """
+        with self._call_timings_lock:
+            return list(self._call_timings)
+
+class ResponseCacheMixin:
+    """Serves cacheable calls from a ResponseCache without running the handler.
+
+    Replaces SimpleXMLRPCDispatcher._marshaled_dispatch, so the request is parsed
+    once and a cache hit skips dispatching and marshalling. Hits are counted in
+    the RPC metrics like any other call. Must come before the XMLRPC server class
+    in the bases.
+    """
+
+    def _init_response_cache(self, cache: Optional[ResponseCache] = None) -> None:
+        self._response_cache = cache if cache is not None else get_response_cache()
+
+    def _marshaled_dispatch(self, data: bytes, dispatch_method=None, path=None) -> bytes:
+        start = time.perf_counter()
+        try:
+            params, method = loads(data, use_builtin_types=self.use_builtin_types)
+        except BaseException:
+            # Let the dispatcher build the fault for a malformed request
+            return super()._marshaled_dispatch(data, dispatch_method, path)
+
+        if params or dispatch_method is not None or method not in self._response_cache.methods:
+            return self._marshal_call(method, params, dispatch_method)[0]
+
+        generation, entries = self._response_cache.generation()
+        response = entries.get(method)
+        if response is not None:
+            get_rpc_metrics().method(method).record(time.perf_counter() - start, True)
+            return response
+        response, ok = self._marshal_call(method, params, dispatch_method)
+        if ok:
+            entries[method] = response
+            logger.debug("Cached response of %s for plan generation %d", method, generation)
+        return response
+
+    def _marshal_call(self, method: str, params: tuple, dispatch_method=None) -> Tuple[bytes, bool]:
+        """Dispatch a call and marshal its result or fault like SimpleXMLRPCDispatcher.
+
+        Returns:
+            Tuple[bytes, bool]: The encoded response and False if it is a fault.
+        """
+        ok = False
+        try:
+            if dispatch_method is not None:
+                response = dispatch_method(method, params)
+            else:
+                response = self._dispatch(method, params)
+            response = dumps((response,), methodresponse=1, allow_none=self.allow_none, encoding=self.encoding)
+            ok = True
+        except Fault as fault:
+            response = dumps(fault, allow_none=self.allow_none, encoding=self.encoding)
+        except BaseException as exc:
+            response = dumps(Fault(1, "%s:%s" % (type(exc), exc)), encoding=self.encoding, allow_none=self.allow_none)
+        return response.encode(self.encoding, 'xmlcharrefreplace'), ok
+
+class TimedXMLRPCServer(RequestJournalMixin, ResponseCacheMixin, CallTimingMixin, SimpleXMLRPCServer):
+    """Single-threaded XMLRPC server that records call timings."""
+    # Rebind the port right away after server_stop
+    allow_reuse_address = True
+
+    def __init__(self, addr: Tuple[str, int] = DEFAULT_ADDRESS, requestHandler=QuietRequestHandler, **kwargs):
+        super().__init__(addr, requestHandler=requestHandler, logRequests=False, **kwargs)
+        self._init_call_timing()
+        self._init_response_cache()
+
+class PooledXMLRPCServer(RequestJournalMixin, ResponseCacheMixin, CallTimingMixin, SimpleXMLRPCServer):
+    """XMLRPC server that handles connections on a bounded worker pool.
+
+    Each call runs on a pool of `workers` call threads and the connection thread
+    waits at most `request_deadline` seconds for it. A call that overruns keeps
+    its call worker until it returns, but the client gets a fault instead of waiting.
+    The sub-calls of system.multicall run on the call worker of the multicall.
+
+    Connections are persistent, so a connection thread stays with its client
+    until the client closes the connection or it is idle for KEEP_ALIVE_TIMEOUT.
+    There are therefore `workers + max_pending` connection threads, so idle robot
+    connections do not starve other clients; further connections are closed right away.
+    """
+    # Rebind the port right away after server_stop
+    allow_reuse_address = True
+
+    def __init__(self, addr: Tuple[str, int] = DEFAULT_ADDRESS, workers: int = DEFAULT_WORKERS,
+                 request_deadline: float = DEFAULT_REQUEST_DEADLINE, max_pending: int = DEFAULT_MAX_PENDING,
+                 requestHandler=KeepAliveRequestHandler, **kwargs):
+        """Initialize the server.
+
+        Args:
+            addr (Tuple[str, int], optional): Address to listen on. Defaults to DEFAULT_ADDRESS.
+            workers (int, optional): Number of call workers. Defaults to DEFAULT_WORKERS.
+            request_deadline (float, optional): Seconds a call may take before the client gets a fault. Defaults to DEFAULT_REQUEST_DEADLINE.
+            max_pending (int, optional): Connections served on top of `workers`. Defaults to DEFAULT_MAX_PENDING.
+            requestHandler (optional): The request handler class. Defaults to KeepAliveRequestHandler.
+        """
+        super().__init__(addr, requestHandler=requestHandler, logRequests=False, **kwargs)
+        self._init_call_timing()
+        self._init_response_cache()
+        self._active_requests = set()
+        self._active_requests_lock = threading.Lock()
+        self.request_deadline = request_deadline
+        self._connection_slots = threading.BoundedSemaphore(workers + max_pending)
+        self._connection_pool = ThreadPoolExecutor(max_workers=workers + max_pending, thread_name_prefix="xmlrpc-conn")
+        self._call_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="xmlrpc-call")
+        self._call_worker = threading.local()
+
+    def process_request(self, request, client_address) -> None:
+        """Hand the connection to the connection pool, or close it if the pool is saturated."""
+        if not self._connection_slots.acquire(blocking=False):
+            logger.warning(f"XMLRPC server busy, rejecting connection from {client_address}")
+            self.shutdown_request(request)
+            return
+        try:
+            self._connection_pool.submit(self._process_request_worker, request, client_address)
+        except RuntimeError:
+            # Pool already shut down
+            self._connection_slots.release()
+            self.shutdown_request(request)
+
+    def _process_request_worker(self, request, client_address) -> None:
+        """Handle one connection on a connection worker, like ThreadingMixIn.process_request_thread."""
+        with self._active_requests_lock:
+            self._active_requests.add(request)
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            with self._active_requests_lock:
+                self._active_requests.discard(request)
+            self.shutdown_request(request)
+            self._connection_slots.release()
+
+    def _dispatch_call(self, method: str, params: tuple) -> Any:
+        if getattr(self._call_worker, "active", False):
+            # A sub-call of system.multicall: waiting for another call worker could take the
+            # whole pool, so it runs inline within the deadline of the multicall
+            return super()._dispatch_call(method, params)
+        try:
+            future = self._call_pool.submit(self._run_call, method, params)
+        except RuntimeError:
+            raise Fault(FAULT_SERVER_BUSY, "Server is shutting down")
+        try:
+            return future.result(timeout=self.request_deadline)
+        except FutureTimeoutError:
+            logger.error(f"XMLRPC call {method} exceeded the deadline of {self.request_deadline} s")
+            raise Fault(FAULT_DEADLINE_EXCEEDED, f"{method} exceeded the deadline of {self.request_deadline} s")
+
+    def _run_call(self, method: str, params: tuple) -> Any:
+        """Run a call on a call worker, marking the thread so nested dispatches run inline."""
+        self._call_worker.active = True
+        try:
+            return super()._dispatch_call(method, params)
+        finally:
+            self._call_worker.active = False
+
+    def server_close(self) -> None:
+        super().server_close()
+        # Persistent connections would otherwise keep being served after a stop
+        with self._active_requests_lock:
+            active_requests = list(self._active_requests)
+        for request in active_requests:
+            try:
+                request.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self._connection_pool.shutdown(wait=False, cancel_futures=True)
+        self._call_pool.shutdown(wait=False, cancel_futures=True)
+
+def create_server(addr: Tuple[str, int] = DEFAULT_ADDRESS, threaded: bool = True, workers: int = DEFAULT_WORKERS,
+                  request_deadline: float = DEFAULT_REQUEST_DEADLINE) -> SimpleXMLRPCServer:
+    """Create the XMLRPC server.
+
+    Args:
+        addr (Tuple[str, int], optional): Address to listen on. Defaults to DEFAULT_ADDRESS.
+        threaded (bool, optional): Use the pooled server; False keeps the single-threaded behaviour. Defaults to True.
+        workers (int, optional): Number of workers of the pooled server. Defaults to DEFAULT_WORKERS.
+        request_deadline (float, optional): Call deadline of the pooled server in seconds. Defaults to DEFAULT_REQUEST_DEADLINE.
+
+    Returns:
+        SimpleXMLRPCServer: The server, not yet serving.
+    """
+    if threaded:
+        logger.info(f"Creating pooled XMLRPC server with {workers} workers and a {request_deadline} s deadline")
+        return PooledXMLRPCServer(addr, workers=max(1, workers), request_deadline=request_deadline, allow_none=True)
+    logger.info("Creating single-threaded XMLRPC server")
+    return TimedXMLRPCServer(addr, allow_none=True)
+
+def get_call_timings(server: Optional[SimpleXMLRPCServer]) -> List[CallTiming]:
+    """Get the call timings of a server, empty if it does not record any.
+
+    Args:
+        server (Optional[SimpleXMLRPCServer]): The XMLRPC server.
+
+    Returns:
+        List[CallTiming]: The recorded call timings.
+    """
+    if isinstance(server, CallTimingMixin):
+        return server.get_call_timings()
+    return []
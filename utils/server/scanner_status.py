@@ -0,0 +1,145 @@
+"""
+Scanner status pipeline from the UR20 robot to the GUI.
+
+The UR20 safety program reports its three area scanners many times per second,
+almost always with the same value. `submit` runs in the RPC thread and drops a
+repeated status with a single comparison; only transitions are passed on to
+the GUI thread through a queued signal. There, transitions are coalesced and
+delivered at most every MIN_UPDATE_INTERVAL seconds, so a flickering scanner
+cannot flood the event loop. The latest status is always delivered.
+
+The scanner images are loaded once in the GUI thread by `attach`, and
+`pixmap` hands out the cached QPixmap instead of decoding the resource again.
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+from PySide6.QtCore import QObject, QThread, QTimer, Qt, Signal
+from PySide6.QtGui import QPixmap
+
+from utils.system.config.logging_config import setup_server_logger
+
+logger = setup_server_logger()
+
+SAFE_STATUS = "True,True,True"
+# Minimum time between two GUI updates in seconds
+MIN_UPDATE_INTERVAL = 0.1
+
+# Scanner status "scanner1,scanner2,scanner3" -> image resource
+SCANNER_IMAGES: Dict[str, str] = {
+    "True,True,True": u':/ScannerUR20/imgs/UR20/scanner1&2&3io.png',
+    "False,False,False": u':/ScannerUR20/imgs/UR20/scanner1&2&3nio.png',
+    "True,False,False": u':/ScannerUR20/imgs/UR20/scanner1io.png',
+    "False,True,False": u':/ScannerUR20/imgs/UR20/scanner2io.png',
+    "False,False,True": u':/ScannerUR20/imgs/UR20/scanner3io.png',
+    "True,True,False": u':/ScannerUR20/imgs/UR20/scanner3nio.png',
+    "True,False,True": u':/ScannerUR20/imgs/UR20/scanner2nio.png',
+    "False,True,True": u':/ScannerUR20/imgs/UR20/scanner1nio.png',
+}
+
+class ScannerStatusPipeline(QObject):
+    """Filters, coalesces and rate limits scanner status updates for the GUI.
+
+    Must be created in the GUI thread.
+
+    Signals:
+        status_changed (str, str): Status and image path, emitted in the GUI thread.
+    """
+    status_changed = Signal(str, str)  # status, image_path
+    _transition = Signal(str)
+
+    def __init__(self, min_interval: float = MIN_UPDATE_INTERVAL):
+        super().__init__()
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._last_status: Optional[str] = None
+        self._attached = False
+        self._pixmaps: Dict[str, QPixmap] = {}
+        self._pending: Optional[str] = None
+        self._last_delivery = 0.0
+        self._timer: Optional[QTimer] = None
+        self.received = 0
+        self.transitions = 0
+        self.delivered = 0
+        self._transition.connect(self._on_transition, Qt.ConnectionType.QueuedConnection)
+
+    def attach(self) -> None:
+        """Preload the scanner images and start delivering updates. Must be called in the GUI thread."""
+        if QThread.currentThread() != self.thread():
+            logger.error("Scanner status pipeline attached outside its thread")
+            return
+        self._pixmaps = {path: QPixmap(path) for path in SCANNER_IMAGES.values()}
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._deliver)
+        self._attached = True
+        logger.debug("Scanner status pipeline attached, %d images preloaded", len(self._pixmaps))
+
+    def submit(self, status: str) -> bool:
+        """Pass a status reported by the robot. Safe to call from any thread.
+
+        Args:
+            status (str): The scanner status, e.g. "True,True,False".
+
+        Returns:
+            bool: True if the status differs from the previous one.
+        """
+        with self._lock:
+            self.received += 1
+            if status == self._last_status:
+                return False
+            self._last_status = status
+            self.transitions += 1
+        if self._attached:
+            self._transition.emit(status)
+        return True
+
+    @property
+    def last_status(self) -> Optional[str]:
+        """The most recently submitted status, None before the first one."""
+        return self._last_status
+
+    def pixmap(self, image_path: str) -> QPixmap:
+        """Get the preloaded image of a scanner status, loading it if it is not cached.
+
+        Args:
+            image_path (str): The image resource path.
+
+        Returns:
+            QPixmap: The image.
+        """
+        pixmap = self._pixmaps.get(image_path)
+        if pixmap is None:
+            pixmap = self._pixmaps[image_path] = QPixmap(image_path)
+        return pixmap
+
+    def _on_transition(self, status: str) -> None:
+        self._pending = status
+        if self._timer.isActive():
+            return
+        wait = self._last_delivery + self.min_interval - time.monotonic()
+        if wait > 0:
+            self._timer.start(int(wait * 1000) + 1)
+        else:
+            self._deliver()
+
+    def _deliver(self) -> None:
+        status, self._pending = self._pending, None
+        if status is None:
+            return
+        self._last_delivery = time.monotonic()
+        self.delivered += 1
+        self.status_changed.emit(status, SCANNER_IMAGES.get(status, ""))
+
+# Created on import, which happens in the GUI thread before the server starts
+_scanner_pipeline = ScannerStatusPipeline()
+
+def get_scanner_pipeline() -> ScannerStatusPipeline:
+    """Get the scanner status pipeline.
+
+    Returns:
+        ScannerStatusPipeline: The process wide pipeline.
+    """
+    return _scanner_pipeline
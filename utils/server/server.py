@@ -1,7 +1,7 @@
 import threading
 import socket
+from typing import Literal, List, Optional
 from xmlrpc.server import SimpleXMLRPCServer
-from typing import Literal
 
 from utils.system.core import global_vars
 from utils.server.UR_Common_functions import (
@@ -9,7 +9,7 @@ from utils.server.UR_Common_functions import (
     UR_Lagen, UR_Zwischenlagen, UR_PaketPos, UR_AnzLagen,
     UR_AnzPakete, UR_PaketeZuordnung, UR_Paket_hoehe, UR_Startlage,
     UR_Quergreifen, UR_CoG, UR_MasseGeschaetzt, UR_PickOffsetX,
-    UR_PickOffsetY
+    UR_PickOffsetY, UR_GetPlanHeader, UR_GetLayerPositions
 )
 from utils.server.UR10_Server_functions import (
     UR10_scanner1and2niobild, UR10_scanner1bild,
@@ -24,6 +24,11 @@ from utils.server.UR20_Server_functions import (
 from utils.message.message import MessageType
 from utils.message.message_manager import MessageManager
 from utils.system.config.logging_config import setup_server_logger
+from utils.server.rpc_server import create_server, DEFAULT_WORKERS, DEFAULT_REQUEST_DEADLINE
+from utils.server.rpc_logging import RpcLogPolicy, policy_from_settings, wrap_rpc_call
+from utils.server.rpc_metrics import get_metrics, get_rpc_metrics
+from utils.server.fast_path import create_fast_path_server, DEFAULT_FAST_PATH_PORT
+from utils.server.rpc_journal import RpcJournal, default_journal_path
 
 logger = setup_server_logger()
 
@@ -36,7 +41,7 @@ def server_start() -> Literal[0]:
     try:
         # Initialize server if not already initialized
         if global_vars.server is None:
-            global_vars.server = SimpleXMLRPCServer(("", 8080), allow_none=True)
+            global_vars.server = create_server(("", 8080), **_server_options())
             logger.debug("Start Server")
         # Get settings from global vars
         settings = global_vars.settings
@@ -51,14 +56,27 @@ def server_start() -> Literal[0]:
         robot_type = 'UR10'
         logger.error(f"Error accessing robot type from settings: {e}. Defaulting to UR10")
         
-    # Wrapper to log function calls
-    def log_rpc_call(func, name):
-        def wrapper(*args, **kwargs):
-            logger.info(f"XMLRPC call: {name} - Args: {args}, Kwargs: {kwargs}")
-            result = func(*args, **kwargs)
-            logger.info(f"XMLRPC result: {name} -> {result}")
-            return result
-        return wrapper
+    register_functions(global_vars.server, robot_type)
+    logger.debug(f"Successfully registered functions for {robot_type}")
+    _start_fast_path()
+    _start_journal()
+    
+    global_vars.server.serve_forever()
+    return 0
+
+def register_functions(server: SimpleXMLRPCServer, robot_type: str, log_policy: Optional[RpcLogPolicy] = None) -> List[str]:
+    """Register the robot interface functions on a server.
+
+    Args:
+        server (SimpleXMLRPCServer): The XMLRPC server.
+        robot_type (str): The robot type, 'UR10' or 'UR20'.
+        log_policy (Optional[RpcLogPolicy], optional): Per-method call logging. Defaults to the settings.
+
+    Returns:
+        List[str]: The names of the registered robot functions.
+    """
+    if log_policy is None:
+        log_policy = policy_from_settings()
 
     # Register common functions for both robot types
     common_functions = [
@@ -78,25 +96,22 @@ def server_start() -> Literal[0]:
         (UR_CoG, "UR_CoG"),
         (UR_MasseGeschaetzt, "UR_MasseGeschaetzt"),
         (UR_PickOffsetX, "UR_PickOffsetX"),
-        (UR_PickOffsetY, "UR_PickOffsetY")
+        (UR_PickOffsetY, "UR_PickOffsetY"),
+        (UR_GetPlanHeader, "UR_GetPlanHeader"),
+        (UR_GetLayerPositions, "UR_GetLayerPositions")
     ]
-
-    for func, name in common_functions:
-        global_vars.server.register_function(log_rpc_call(func, name), name)
+    robot_functions = list(common_functions)
     
-    
-    # Register robot type specific functions here if needed
+    # Register robot type specific functions
     if robot_type == 'UR10':
-        ur10_functions = [
+        robot_functions += [
             (UR10_scanner1and2niobild, "UR_scanner1and2niobild"),
             (UR10_scanner1bild, "UR_scanner1bild"),
             (UR10_scanner2bild, "UR_scanner2bild"),
             (UR10_scanner1and2iobild, "UR_scanner1and2iobild")
         ]
-        for func, name in ur10_functions:
-            global_vars.server.register_function(log_rpc_call(func, name), name)
     elif robot_type == 'UR20':
-        ur20_functions = [
+        robot_functions += [
             (UR20_scannerStatus, "UR_scannerStatus"),
             (UR20_SetActivePalette, "UR_SetActivePalette"),
             (UR20_RequestPaletteChange, "UR_RequestPaletteChange"),
@@ -106,25 +121,93 @@ def server_start() -> Literal[0]:
             (UR20_GetKlemmungAktiv, "UR_GetKlemmungAktiv"),
             (UR20_GetScannerOverride, "UR_GetScannerOverwrite")
         ]
-        for func, name in ur20_functions:
-            global_vars.server.register_function(log_rpc_call(func, name), name)
+    metrics = get_rpc_metrics()
+    for func, name in robot_functions:
+        server.register_function(metrics.instrument(wrap_rpc_call(func, name, log_policy), name), name)
+
+    available_functions = [name for _, name in robot_functions]
     def get_available_functions():
-        # get all functions from common_functions and robot type specific functions but only take the name of the function
-        available_functions = []
-        for func, name in common_functions:
-            available_functions.append(name)
-        if robot_type == 'UR10':
-            for func, name in ur10_functions:
-                available_functions.append(name)
-        elif robot_type == 'UR20':
-            for func, name in ur20_functions:
-                available_functions.append(name)
         return available_functions
-    global_vars.server.register_function(get_available_functions, "get_available_functions")
-    logger.debug(f"Successfully registered functions for {robot_type}")
-    
-    global_vars.server.serve_forever()
-    return 0
+    server.register_function(get_available_functions, "get_available_functions")
+    server.register_function(get_metrics, "get_metrics")
+
+    # system.multicall lets the robot fetch several values in one round trip
+    server.register_multicall_functions()
+    return available_functions
+
+def _server_options() -> dict:
+    """Get the server variant and pool options from the settings.
+
+    Returns:
+        dict: Keyword arguments for create_server.
+    """
+    try:
+        server_settings = global_vars.settings.settings['server']
+        return {
+            'threaded': server_settings['threaded'],
+            'workers': server_settings['workers'],
+            'request_deadline': server_settings['request_deadline'],
+        }
+    except (AttributeError, KeyError, TypeError) as e:
+        logger.error(f"Error accessing server settings: {e}. Using defaults")
+        return {'threaded': True, 'workers': DEFAULT_WORKERS, 'request_deadline': DEFAULT_REQUEST_DEADLINE}
+
+def _start_fast_path() -> None:
+    """Start the raw TCP fast path in a daemon thread if it is enabled in the settings."""
+    if global_vars.fast_path_server is not None:
+        return
+    try:
+        server_settings = global_vars.settings.settings['server']
+        enabled, port = server_settings['fast_path'], server_settings['fast_path_port']
+    except (AttributeError, KeyError, TypeError) as e:
+        logger.error(f"Error accessing fast path settings: {e}. Fast path disabled")
+        return
+    if not enabled:
+        return
+    try:
+        global_vars.fast_path_server = create_fast_path_server(("", port or DEFAULT_FAST_PATH_PORT))
+    except OSError as e:
+        logger.error(f"Could not start fast path on port {port}: {e}")
+        return
+    threading.Thread(target=global_vars.fast_path_server.serve_forever, name="fast-path", daemon=True).start()
+    logger.info(f"Fast path listening on port {port}")
+
+def _stop_fast_path() -> None:
+    """Stop the raw TCP fast path and close its robot connections."""
+    if global_vars.fast_path_server is None:
+        return
+    global_vars.fast_path_server.shutdown()
+    global_vars.fast_path_server.server_close()
+    global_vars.fast_path_server = None
+    logger.debug("Fast path stopped")
+
+def _start_journal() -> None:
+    """Journal every request of the XMLRPC server if it is enabled in the settings."""
+    if global_vars.rpc_journal is not None:
+        return
+    try:
+        server_settings = global_vars.settings.settings['server']
+        enabled, directory = server_settings['rpc_journal'], server_settings['rpc_journal_dir']
+    except (AttributeError, KeyError, TypeError) as e:
+        logger.error(f"Error accessing journal settings: {e}. Journal disabled")
+        return
+    if not enabled:
+        return
+    try:
+        global_vars.rpc_journal = RpcJournal(default_journal_path(directory))
+    except OSError as e:
+        logger.error(f"Could not open RPC journal: {e}")
+        return
+    global_vars.server.journal = global_vars.rpc_journal
+
+def _stop_journal() -> None:
+    """Detach the journal from the server and write its remaining records."""
+    if global_vars.rpc_journal is None:
+        return
+    if global_vars.server is not None:
+        global_vars.server.journal = None
+    global_vars.rpc_journal.close()
+    global_vars.rpc_journal = None
 
 def server_stop() -> None:
     """Stop the XMLRPC server.
@@ -133,10 +216,12 @@ def server_stop() -> None:
         if global_vars.ui and global_vars.ui.ButtonStopRPCServer:
             global_vars.ui.ButtonStopRPCServer.setEnabled(False)
         try:
+            _stop_fast_path()
             # First shutdown the server
             global_vars.server.shutdown()
             # Close the socket connection
             global_vars.server.server_close()
+            _stop_journal()
             # Wait for server thread to complete if it exists
             if hasattr(global_vars, 'server_thread') and global_vars.server_thread:
                 global_vars.server_thread.join(timeout=5)  # Wait up to 5 seconds for thread to finish
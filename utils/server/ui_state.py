@@ -0,0 +1,112 @@
+"""
+Snapshot of the operator inputs the robot interface needs.
+
+The XMLRPC handlers run outside the GUI thread and must not touch Qt widgets.
+Instead, the GUI thread keeps an immutable, versioned `UiState` up to date from
+the widgets' change signals, and handlers read the current snapshot. Reading
+is a single reference lookup, so handlers never lock or wait for the GUI.
+"""
+
+import threading
+from dataclasses import dataclass, replace
+from typing import Tuple
+
+from utils.system.config.logging_config import setup_server_logger
+
+logger = setup_server_logger()
+
+@dataclass(frozen=True)
+class UiState:
+    """Immutable snapshot of the operator inputs.
+
+    Texts are kept as entered so handlers convert them exactly as they did when
+    reading the widgets. Version 0 means no UI has been captured yet.
+    """
+    version: int = 0
+    label_inverted: bool = False
+    box_height_text: str = ""
+    box_weight_text: str = ""
+    start_layer: int = 0
+    pick_offset_x: int = 0
+    pick_offset_y: int = 0
+    single_package: bool = False
+    clamping_active: bool = False
+    scanner_override: Tuple[bool, bool, bool] = (False, False, False)
+
+    @property
+    def ui_available(self) -> bool:
+        """Whether the snapshot reflects a real UI."""
+        return self.version > 0
+
+_state = UiState()
+# Serializes writers only; readers take the current reference without locking
+_write_lock = threading.Lock()
+
+def get_ui_state() -> UiState:
+    """Get the current snapshot.
+
+    Returns:
+        UiState: The current snapshot.
+    """
+    return _state
+
+def update_ui_state(**changes) -> UiState:
+    """Publish a new snapshot with the given fields changed.
+
+    Args:
+        **changes: UiState fields to change.
+
+    Returns:
+        UiState: The new snapshot.
+    """
+    global _state
+    with _write_lock:
+        _state = replace(_state, version=_state.version + 1, **changes)
+        return _state
+
+def capture_ui_state(ui) -> UiState:
+    """Publish a snapshot of all inputs. Must be called in the GUI thread.
+
+    Args:
+        ui (Ui_Form): The main window UI.
+
+    Returns:
+        UiState: The new snapshot.
+    """
+    return update_ui_state(
+        label_inverted=ui.checkBoxLabelInvert.isChecked(),
+        box_height_text=ui.EingabeKartonhoehe.text(),
+        box_weight_text=ui.EingabeKartonGewicht.text(),
+        start_layer=ui.EingabeStartlage.value(),
+        pick_offset_x=ui.EingabeVerschiebungX.value(),
+        pick_offset_y=ui.EingabeVerschiebungY.value(),
+        single_package=ui.checkBoxEinzelpaket.isChecked(),
+        clamping_active=ui.checkBoxKlemmung.isChecked(),
+        scanner_override=(ui.checkBoxScanner1Overwrite.isChecked(),
+                          ui.checkBoxScanner2Overwrite.isChecked(),
+                          ui.checkBoxScanner3Overwrite.isChecked()),
+    )
+
+def connect_ui_state(ui) -> None:
+    """Capture the inputs once and keep the snapshot updated from the widgets' change signals.
+
+    Widgets changed with blocked signals must be followed by a call to capture_ui_state.
+
+    Args:
+        ui (Ui_Form): The main window UI.
+    """
+    ui.checkBoxLabelInvert.toggled.connect(lambda checked: update_ui_state(label_inverted=checked))
+    ui.EingabeKartonhoehe.textChanged.connect(lambda text: update_ui_state(box_height_text=text))
+    ui.EingabeKartonGewicht.textChanged.connect(lambda text: update_ui_state(box_weight_text=text))
+    ui.EingabeStartlage.valueChanged.connect(lambda value: update_ui_state(start_layer=value))
+    ui.EingabeVerschiebungX.valueChanged.connect(lambda value: update_ui_state(pick_offset_x=value))
+    ui.EingabeVerschiebungY.valueChanged.connect(lambda value: update_ui_state(pick_offset_y=value))
+    ui.checkBoxEinzelpaket.toggled.connect(lambda checked: update_ui_state(single_package=checked))
+    ui.checkBoxKlemmung.toggled.connect(lambda checked: update_ui_state(clamping_active=checked))
+    for checkbox in (ui.checkBoxScanner1Overwrite, ui.checkBoxScanner2Overwrite, ui.checkBoxScanner3Overwrite):
+        checkbox.toggled.connect(lambda _checked: update_ui_state(
+            scanner_override=(ui.checkBoxScanner1Overwrite.isChecked(),
+                              ui.checkBoxScanner2Overwrite.isChecked(),
+                              ui.checkBoxScanner3Overwrite.isChecked())))
+    state = capture_ui_state(ui)
+    logger.debug(f"UI state snapshot connected: {state}")
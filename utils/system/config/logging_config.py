@@ -1,5 +1,7 @@
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 import os
 import sys
 from datetime import datetime
@@ -33,14 +35,19 @@ def get_log_path() -> str:
 
 # Global variable to store server log path
 _server_log_path = None
+# Writes the queued server log records to the file and console handlers
+_server_log_listener = None
 
 def setup_server_logger() -> logging.Logger:
     """Setup and configure the server logger
+
+    Records are put on a queue and written to the file and console by a
+    background listener thread, so the XMLRPC threads never do file I/O.
     
     Returns:
         logging.Logger: Configured server logger instance
     """
-    global _server_log_path
+    global _server_log_path, _server_log_listener
     
     # Get existing logger if already set up
     logger = logging.getLogger('server')
@@ -78,13 +85,17 @@ def setup_server_logger() -> logging.Logger:
         )
         file_handler.setFormatter(log_formatter)
         file_handler.setLevel(logging.DEBUG)
-        logger.addHandler(file_handler)
         
         # Console handler
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setFormatter(log_formatter)
         console_handler.setLevel(logging.DEBUG)
-        logger.addHandler(console_handler)
+
+        log_queue = queue.SimpleQueue()
+        logger.addHandler(QueueHandler(log_queue))
+        _server_log_listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+        _server_log_listener.start()
+        atexit.register(stop_server_log_listener)
         
         logger.info(f"Server logging initialized. Log file: {_server_log_path}")
         
@@ -97,6 +108,21 @@ def setup_server_logger() -> logging.Logger:
     
     return logger
 
+def get_server_log_dir() -> str:
+    """Get the directory of the server log file.
+
+    Returns:
+        str: The directory, the working directory if server logging is not set up.
+    """
+    return os.path.dirname(_server_log_path) if _server_log_path else os.getcwd()
+
+def stop_server_log_listener() -> None:
+    """Flush the queued server log records and stop the listener thread."""
+    global _server_log_listener
+    if _server_log_listener is not None:
+        _server_log_listener.stop()
+        _server_log_listener = None
+
 def setup_logger(verbose=False) -> logging.Logger:
     """Setup and configure the logger
     
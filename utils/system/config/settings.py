@@ -54,6 +54,37 @@ class Settings:
                 "number_of_plans": 0,
                 "number_of_use_cycles": 0,
                 "last_restart": "Never"
+            },
+            "server": {
+                "threaded": True,
+                "workers": 4,
+                "request_deadline": 10.0,
+                # Call logging: off, errors, sampled or full; overrides as "method=mode, ..."
+                "rpc_log_mode": "sampled",
+                "rpc_log_sample_every": 50,
+                "rpc_log_overrides": "UR_SetFileName=full, UR_ReadDataFromUsbStick=full",
+                # Raw TCP line protocol for positions next to XMLRPC (utils/server/fast_path.py)
+                "fast_path": False,
+                "fast_path_port": 8081,
+                # Binary journal of every request for offline replay (utils/server/rpc_journal.py);
+                # an empty directory means a journal folder next to the server log
+                "rpc_journal": False,
+                "rpc_journal_dir": ""
+            },
+            "robot": {
+                # Robot state source: "dashboard" polls port 29999, "rtde" streams port 30004
+                "status_source": "dashboard",
+                "rtde_frequency": 10.0,
+                # Dashboard poll intervals in seconds (utils/robot/polling_policy.py): active while a
+                # program plays or safety is not NORMAL, backoff with jitter while disconnected
+                "poll_active_interval": 0.5,
+                "poll_idle_interval": 5.0,
+                "poll_initial_backoff": 1.0,
+                "poll_max_backoff": 30.0,
+                "poll_jitter": 0.2,
+                # Robot state transitions for availability/OEE (utils/database/state_history.py)
+                "state_history": True,
+                "state_history_db": "robot_state.db"
             }
         }
         
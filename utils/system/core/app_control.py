@@ -75,6 +75,14 @@ def exit_app():
     # First stop the server if it's running
     if hasattr(global_vars, 'server') and global_vars.server:
         server_stop()
+
+    # Drop queued Status tab queries
+    if getattr(global_vars, 'robot_info_fetcher', None) is not None:
+        global_vars.robot_info_fetcher.shutdown()
+
+    # Write the robot state history up to now
+    from utils.database.state_history import stop_state_history
+    stop_state_history()
     
     # Stop any running audio threads
     if hasattr(global_vars, 'audio_thread_running') and global_vars.audio_thread_running:
@@ -14,7 +14,8 @@ if TYPE_CHECKING:
     from ui_files.ui_main_window import Ui_Form
     from ui_files.BlinkingLabel import BlinkingLabel
     from utils.message.message_manager import MessageManager
-    from utils.robot.robot_status_monitor import RobotStatus
+    from utils.robot.robot_status_monitor import RobotStatusMonitor
+    from utils.database.usb_sync import UsbPlanWatcher
 
 from utils.system.config.logging_config import logger
 from utils.robot.robot_enums import RobotMode, SafetyStatus, ProgramState
@@ -37,7 +38,7 @@ robot_ip: str = '192.168.0.1'  # DO NOT CHANGE
 current_robot_mode: RobotMode = RobotMode.UNKNOWN
 current_safety_status: SafetyStatus = SafetyStatus.UNKNOWN
 current_program_state: ProgramState = ProgramState.UNKNOWN
-robot_status_monitor: Optional['RobotStatus'] = None
+robot_status_monitor: Optional['RobotStatusMonitor'] = None
 
 # UR20 palette place
 UR20_active_palette: int = 0
@@ -121,5 +122,14 @@ filter_height: int = 0
 
 audio_thread: Optional[threading.Thread] = None
 
+# Palette plan completer and USB stick watcher
+completer = None
+usb_watcher: Optional['UsbPlanWatcher'] = None
+usb_sync_progress_bar = None
+
 # XMLRPC Server instance
 server = None
+# Raw TCP fast path server instance, only set if enabled in the settings
+fast_path_server = None
+# RPC request journal, only set if enabled in the settings
+rpc_journal = None
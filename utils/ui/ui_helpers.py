@@ -1,10 +1,11 @@
+import bisect
 import logging
 import os
 import subprocess
 import sys
 from enum import Enum
-from PySide6.QtWidgets import QMessageBox, QFileDialog, QCompleter
-from PySide6.QtCore import Qt, QProcess, QFileSystemWatcher, QStringListModel
+from PySide6.QtWidgets import QMessageBox, QFileDialog, QCompleter, QProgressBar
+from PySide6.QtCore import Qt, QProcess, QRect, QStringListModel
 from PySide6.QtGui import QIntValidator, QDoubleValidator, QRegularExpressionValidator
 from typing import Optional
 
@@ -410,9 +411,106 @@ def set_wordlist() -> None:
     except (ImportError, AttributeError) as e:
         logger.debug(f"Palette list update skipped: {e}")
     
-    # Setup file watcher to update wordlist when USB contents change
-    file_watcher = QFileSystemWatcher([global_vars.PATH_USB_STICK], global_vars.main_window)
-    file_watcher.directoryChanged.connect(update_wordlist)
+    # Watch the USB stick; changes are debounced and only the delta is applied
+    from utils.database.usb_sync import UsbPlanWatcher
+    if global_vars.usb_watcher is None:
+        global_vars.usb_watcher = UsbPlanWatcher(global_vars.PATH_USB_STICK, global_vars.main_window)
+        global_vars.usb_watcher.plans_changed.connect(apply_wordlist_changes)
+        global_vars.usb_watcher.sync_progress.connect(show_usb_sync_progress)
+        global_vars.usb_watcher.sync_finished.connect(handle_usb_sync_finished)
+    else:
+        # The path changed, bring the database up to date with the new directory
+        global_vars.usb_watcher.set_path(global_vars.PATH_USB_STICK)
+        start_usb_database_sync()
+
+def start_usb_database_sync() -> None:
+    """Start the background sync of all plans on the USB stick into the database.
+
+    Plans that are already in the database can be loaded while the sync is running.
+    """
+    if global_vars.usb_watcher is None:
+        logger.error("USB watcher not initialized")
+        return
+    logger.info("Starting background database sync from USB stick")
+    global_vars.usb_watcher.start_full_sync()
+
+def show_usb_sync_progress(processed: int, total: int) -> None:
+    """Show the progress of the background database sync on the main page.
+
+    Args:
+        processed (int): Number of plans checked so far.
+        total (int): Number of plans to check.
+    """
+    if not global_vars.ui:
+        return
+    if global_vars.usb_sync_progress_bar is None:
+        progress_bar = QProgressBar(global_vars.ui.MainMenu)
+        progress_bar.setAlignment(Qt.AlignCenter)
+        progress_bar.setFormat("Datenbank wird aktualisiert... %v/%m")
+        global_vars.usb_sync_progress_bar = progress_bar
+    progress_bar = global_vars.usb_sync_progress_bar
+    # MainMenu has no layout; sit right above the plan input, wherever the .ui puts it
+    plan_input = global_vars.ui.EingabePallettenplan.geometry()
+    height = progress_bar.sizeHint().height()
+    progress_bar.setGeometry(QRect(plan_input.x(), plan_input.y() - height - 6, plan_input.width(), height))
+    progress_bar.setMaximum(total)
+    progress_bar.setValue(processed)
+    progress_bar.show()
+    progress_bar.raise_()
+
+def handle_usb_sync_finished(updated_files: list) -> None:
+    """Hide the sync progress and refresh the views once the database is up to date.
+
+    Args:
+        updated_files (list): .rob file names that were added to or updated in the database.
+    """
+    if global_vars.usb_sync_progress_bar is not None:
+        global_vars.usb_sync_progress_bar.hide()
+    logger.info(f"Background database sync finished, {len(updated_files)} plans added or updated")
+    if updated_files:
+        try:
+            from ui_files.visualization_3d import load_rob_files
+            load_rob_files()
+        except (ImportError, AttributeError) as e:
+            logger.debug(f"Palette list update skipped: {e}")
+
+def apply_wordlist_changes(added: list, removed: list, updated_files: list) -> None:
+    """Apply a USB stick delta to the completer and the palette list.
+
+    Args:
+        added (list): Plan names (without .rob) that appeared on the USB stick.
+        removed (list): Plan names (without .rob) that disappeared from the USB stick.
+        updated_files (list): .rob file names that were added to or updated in the database.
+    """
+    if global_vars.completer:
+        model = global_vars.completer.model()
+        if isinstance(model, QStringListModel):
+            for name in removed:
+                row = bisect.bisect_left(model.stringList(), name)
+                if row < model.rowCount() and model.index(row).data() == name:
+                    model.removeRows(row, 1)
+            for name in added:
+                row = bisect.bisect_left(model.stringList(), name)
+                if row < model.rowCount() and model.index(row).data() == name:
+                    continue
+                model.insertRows(row, 1)
+                model.setData(model.index(row), name)
+        else:
+            update_wordlist()
+            return
+    logger.debug(f"Wordlist delta applied: +{len(added)} -{len(removed)}, {len(updated_files)} stored in database")
+
+    # The palette list is backed by the database, refresh it only when it changed
+    if updated_files or removed:
+        try:
+            from ui_files.visualization_3d import load_rob_files
+            load_rob_files()
+        except (ImportError, AttributeError) as e:
+            logger.debug(f"Palette list update skipped: {e}")
+
+    if updated_files:
+        from utils.robot.robot_control import _schedule_db_update_popup
+        _schedule_db_update_popup(updated_files)
 
 def update_wordlist() -> None:
     """Update the wordlist.
@@ -509,8 +607,8 @@ def handle_scanner_status(message: str, image_path: str):
         message (str): The message from the scanner.
         image_path (str): The path to the image from the scanner.
     """
-    from PySide6.QtGui import QPixmap
-    
+    from utils.server.scanner_status import get_scanner_pipeline
+
     logger.debug(f"Received scanner status - Message: {message}, Image: {image_path}")
     
     if message != "True,True,True":
@@ -536,8 +634,7 @@ def handle_scanner_status(message: str, image_path: str):
     if image_path and global_vars.ui and global_vars.ui.label_7:
         try:
             logger.debug("Updating scanner image display")
-            pixmap = QPixmap(image_path)
-            global_vars.ui.label_7.setPixmap(pixmap)
+            global_vars.ui.label_7.setPixmap(get_scanner_pipeline().pixmap(image_path))
         except Exception as e:
             logger.error(f"Failed to update scanner image: {e}")
 
@@ -6,7 +6,8 @@ import os
 import hashlib
 import threading
 import logging
-from PySide6.QtWidgets import QMainWindow, QMessageBox, QPushButton, QWidget, QFormLayout, QLabel, QVBoxLayout, QHBoxLayout, QListWidget
+from PySide6.QtWidgets import (QMainWindow, QMessageBox, QPushButton, QWidget, QFormLayout, QLabel, QVBoxLayout, QHBoxLayout, QListWidget,
+                               QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView)
 from PySide6.QtCore import Qt, QRegularExpression, QTimer
 from PySide6.QtGui import QRegularExpressionValidator, QIntValidator
 
@@ -24,13 +25,19 @@ from utils.robot.robot_control import (display_selected_file, load,
                                 send_cmd_play, send_cmd_pause, send_cmd_stop, load_selected_file,
                                 send_remote_control_command)
 from utils.database.database import update_box_dimensions
+from utils.database.state_history import start_state_history
 from utils.server.server import server_thread, server_stop
 # from utils.audio.audio import (spawn_play_stepback_warning_thread, kill_play_stepback_warning_thread, 
 #                         set_audio_volume, delay_warning_sound)
 import utils.audio.audio as audio
 from utils.system.updater import check_for_updates
 from utils.system.core.app_control import restart_app, exit_app
-from utils.server.UR20_Server_functions import scanner_signals
+from utils.server.scanner_status import get_scanner_pipeline
+from utils.server.ui_state import connect_ui_state, update_ui_state
+from utils.server.rpc_metrics import get_rpc_metrics
+from utils.server.plan_state import set_box_height
+from utils.robot.robot_info import FieldValue, RobotInfoFetcher
+from utils.robot.robot_status_monitor import RobotStatus, get_status_publisher
 from utils.ui.notification_popup import check_zwischenlage_status
 from utils.ui.ui_helpers import check_palette_clearing_status
 
@@ -249,11 +256,12 @@ def connect_signal_handlers():
         global_vars.ui.EingabeKartonhoehe.blockSignals(True)
         global_vars.ui.EingabeKartonhoehe.setText(str(height))
         global_vars.ui.EingabeKartonhoehe.blockSignals(False)
+        # textChanged was blocked, publish the new height to the RPC snapshot
+        update_ui_state(box_height_text=global_vars.ui.EingabeKartonhoehe.text())
         _previous_height = height
         
         # Sync global state variable (consistent with _update_box_height_in_db)
-        if global_vars.g_PaketDim and len(global_vars.g_PaketDim) > 2:
-            global_vars.g_PaketDim[2] = height
+        set_box_height(height)
         
         # Update weight info label since height affects calculated weight
         update_weight_info_label()
@@ -282,6 +290,8 @@ def connect_signal_handlers():
         global_vars.ui.EingabeKartonGewicht.blockSignals(True)
         global_vars.ui.EingabeKartonGewicht.setText(str(weight))
         global_vars.ui.EingabeKartonGewicht.blockSignals(False)
+        # textChanged was blocked, publish the new weight to the RPC snapshot
+        update_ui_state(box_weight_text=global_vars.ui.EingabeKartonGewicht.text())
         _previous_weight = weight
         
         # Sync global state variable (consistent with _update_box_weight_in_db)
@@ -365,8 +375,7 @@ def connect_signal_handlers():
             
             if response == QMessageBox.StandardButton.Yes:
                 # Also update g_PaketDim if it exists
-                if global_vars.g_PaketDim and len(global_vars.g_PaketDim) > 2:
-                    global_vars.g_PaketDim[2] = height
+                set_box_height(height)
                 update_box_dimensions(global_vars.FILENAME, height=height)
                 _previous_height = height
             else:
@@ -673,8 +682,13 @@ def connect_signal_handlers():
     global_vars.ui.pushButtonSearchUpdate.clicked.connect(check_for_updates)
     global_vars.ui.pushButtonExitApp.clicked.connect(restart_app)
     
-    # Connect scanner signal
-    scanner_signals.status_changed.connect(handle_scanner_status)
+    # Connect scanner status transitions and preload the scanner images
+    scanner_pipeline = get_scanner_pipeline()
+    scanner_pipeline.status_changed.connect(handle_scanner_status)
+    scanner_pipeline.attach()
+
+    # Keep the RPC handlers' snapshot of the operator inputs up to date
+    connect_ui_state(global_vars.ui)
 
     # Create and connect Status button to open the Status tab directly
     try:
@@ -752,6 +766,9 @@ def start_background_tasks():
     from utils.robot.robot_status_monitor import RobotStatusMonitor
     global_vars.robot_status_monitor = RobotStatusMonitor()
     global_vars.robot_status_monitor.start_monitoring()
+
+    # Record robot state transitions for availability and OEE queries
+    start_state_history()
     
     # Start zwischenlage popup monitor
     check_zwischenlage_status()
@@ -766,10 +783,18 @@ def start_background_tasks():
     palette_clear_timer.timeout.connect(check_palette_clearing_status)
     palette_clear_timer.start(1000)  # Check every 1000ms
     
-    # Create a timer to update the Status tab every 1000ms
+    # Refresh the RPC metrics and robot details every 1000ms, only while the Status tab is shown
     status_timer = QTimer(global_vars.main_window)
     status_timer.timeout.connect(_update_status_tab)
-    status_timer.start(1000)  # Update every 1000ms
+
+    def _on_tab_changed(index: int):
+        if index == getattr(global_vars, 'status_tab_index', None):
+            _update_status_tab()
+            status_timer.start(1000)
+        else:
+            status_timer.stop()
+    global_vars.ui.tabWidget.currentChanged.connect(_on_tab_changed)
+    _on_tab_changed(global_vars.ui.tabWidget.currentIndex())
     
     # Check zwischenlage status immediately (don't wait for timer)
     check_zwischenlage_status()
@@ -854,7 +879,8 @@ def _create_status_tab():
     gv.lbl_robot_mode = QLabel()
     gv.lbl_safety_status = QLabel()
     gv.lbl_program_state = QLabel()
-    gv.lbl_last_update = QLabel()
+    gv.lbl_last_change = QLabel()
+    gv.lbl_poll_rate = QLabel("-")
     gv.lbl_polyscope_version = QLabel("-")
     gv.lbl_serial_number = QLabel("-")
     gv.lbl_loaded_program = QLabel("-")
@@ -866,7 +892,8 @@ def _create_status_tab():
     form.addRow("Robot Mode:", gv.lbl_robot_mode)
     form.addRow("Safety Status:", gv.lbl_safety_status)
     form.addRow("Program State:", gv.lbl_program_state)
-    form.addRow("Last Update:", gv.lbl_last_update)
+    form.addRow("Last Change:", gv.lbl_last_change)
+    form.addRow("Poll Rate:", gv.lbl_poll_rate)
     form.addRow("Polyscope Version:", gv.lbl_polyscope_version)
     form.addRow("Serial Number:", gv.lbl_serial_number)
     form.addRow("Loaded Program:", gv.lbl_loaded_program)
@@ -883,25 +910,77 @@ def _create_status_tab():
     refresh_bar.addWidget(btn_refresh_programs)
     root_layout.addLayout(refresh_bar)
 
+    # XMLRPC call metrics, one row per called method
+    metrics_bar = QHBoxLayout()
+    metrics_bar.addWidget(QLabel("RPC Metrics:", status_widget))
+    metrics_bar.addStretch(1)
+    btn_reset_metrics = QPushButton("Reset Metrics", status_widget)
+    btn_reset_metrics.setCursor(Qt.PointingHandCursor)
+    btn_reset_metrics.clicked.connect(lambda: (get_rpc_metrics().reset(), _update_rpc_metrics_table()))
+    metrics_bar.addWidget(btn_reset_metrics)
+    root_layout.addLayout(metrics_bar)
+
+    gv.table_rpc_metrics = QTableWidget(0, len(RPC_METRICS_COLUMNS), status_widget)
+    gv.table_rpc_metrics.setHorizontalHeaderLabels([title for title, _ in RPC_METRICS_COLUMNS])
+    gv.table_rpc_metrics.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+    gv.table_rpc_metrics.horizontalHeader().setStretchLastSection(True)
+    gv.table_rpc_metrics.verticalHeader().setVisible(False)
+    gv.table_rpc_metrics.setEditTriggers(QAbstractItemView.NoEditTriggers)
+    gv.table_rpc_metrics.setMinimumHeight(120)
+    root_layout.addWidget(gv.table_rpc_metrics)
+
     # Add the tab and remember its index
     idx = gv.ui.tabWidget.addTab(status_widget, "Status")
     gv.status_tab_index = idx
 
-    # Counter for program refresh cadence
-    gv._programs_counter = 0
+    # Robot details are fetched in the background and pushed to the labels
+    gv.robot_info_fetcher = RobotInfoFetcher(status_widget)
+    gv.robot_info_fetcher.field_updated.connect(_apply_robot_info)
+    btn_refresh_programs.clicked.connect(_refresh_programs)
 
-    def _manual_refresh():
-        try:
-            from utils.system.core import global_vars as gvi
-            gvi._programs_counter = 0
-            _refresh_programs()
-        except Exception as e:
-            logger.error(f"Failed to refresh programs: {e}")
-    btn_refresh_programs.clicked.connect(_manual_refresh)
+    # Robot status transitions are pushed by the status publisher
+    publisher = get_status_publisher()
+    publisher.status_changed.connect(_show_robot_status)
 
     # Initialize with current known values
+    _show_robot_status(publisher.current if getattr(gv, 'robot_status_monitor', None) else None)
     _update_status_tab()
 
+# Columns of the RPC metrics table: header and key of the get_metrics summary
+RPC_METRICS_COLUMNS = [
+    ("Method", None),
+    ("Calls", "calls"),
+    ("Errors", "errors"),
+    ("p50 ms", "p50_ms"),
+    ("p95 ms", "p95_ms"),
+    ("p99 ms", "p99_ms"),
+    ("Max ms", "max_ms"),
+]
+
+def _update_rpc_metrics_table():
+    """Fill the RPC metrics table, most called methods first."""
+    from utils.system.core import global_vars as gv
+    table = getattr(gv, 'table_rpc_metrics', None)
+    if table is None:
+        return
+    summaries = sorted(get_rpc_metrics().snapshot().items(), key=lambda item: item[1]["calls"], reverse=True)
+    table.setRowCount(len(summaries))
+    for row, (name, summary) in enumerate(summaries):
+        for column, (_, key) in enumerate(RPC_METRICS_COLUMNS):
+            if key is None:
+                text = name
+            elif key.endswith("_ms"):
+                text = f"{summary[key]:.3f}"
+            else:
+                text = str(summary[key])
+            item = table.item(row, column)
+            if item is None:
+                item = QTableWidgetItem()
+                if key is not None:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                table.setItem(row, column, item)
+            item.setText(text)
+
 def _set_label_state(label: QLabel, text: str, ok: bool | None = None):
     """Helper to set label text and color based on state."""
     label.setText(text)
@@ -911,11 +990,9 @@ def _set_label_state(label: QLabel, text: str, ok: bool | None = None):
         label.setStyleSheet(f"color: {'green' if ok else 'red'};")
 
 def _update_status_tab():
-    """Update the Status tab labels from RobotStatusMonitor."""
+    """Update the Status tab's robot IP, RPC metrics and robot details."""
     try:
         from utils.system.core import global_vars as gv
-        from utils.robot.robot_enums import RobotMode, SafetyStatus, ProgramState
-        from utils.robot.robot_status_monitor import get_polyscope_version, get_serial_number
 
         # Robot IP
         if hasattr(gv, 'robot_ip'):
@@ -923,60 +1000,85 @@ def _update_status_tab():
         else:
             gv.lbl_robot_ip.setText("-")
 
-        mon = getattr(gv, 'robot_status_monitor', None)
-        status = mon.get_current_status() if mon else None
+        gv.lbl_poll_rate.setText(_poll_rate_text(getattr(gv, 'robot_status_monitor', None)))
+        _update_rpc_metrics_table()
+
+        # Only queues the fields whose cached value expired, never waits for the robot
+        fetcher = getattr(gv, 'robot_info_fetcher', None)
+        if fetcher is not None:
+            fetcher.request()
+    except Exception as e:
+        logger.error(f"Failed to update Status tab: {e}")
+
+def _poll_rate_text(monitor) -> str:
+    """Describe how often the status monitor reads the robot state.
+
+    Args:
+        monitor (RobotStatusMonitor | None): The running monitor.
+
+    Returns:
+        str: The effective rate and the reason for the current interval.
+    """
+    if monitor is None:
+        return "-"
+    if monitor.rtde_stream is not None:
+        return f"RTDE stream, {monitor.rtde_stream.frequency:g} Hz"
+    return f"{monitor.effective_rate:.2f} Hz, every {monitor.poll_interval:.1f} s ({monitor.poll_reason})"
 
+def _show_robot_status(status: RobotStatus | None):
+    """Show a robot status on the Status tab. Connected to the status publisher, runs on transitions only.
+
+    Args:
+        status (RobotStatus | None): The published status, None if the monitor is not running.
+    """
+    try:
+        from utils.system.core import global_vars as gv
         if status:
             _set_label_state(gv.lbl_connection, "Connected" if status.is_connected else (status.connection_error or "Disconnected"), status.is_connected)
             gv.lbl_robot_mode.setText(status.robot_mode.name)
             gv.lbl_safety_status.setText(status.safety_status.name)
             gv.lbl_program_state.setText(status.program_state.name)
-            gv.lbl_last_update.setText(status.last_update.strftime('%Y-%m-%d %H:%M:%S') if status.last_update else "-")
+            gv.lbl_last_change.setText(status.last_update.strftime('%Y-%m-%d %H:%M:%S') if status.last_update else "-")
         else:
             _set_label_state(gv.lbl_connection, "Monitor not running", False)
             gv.lbl_robot_mode.setText("-")
             gv.lbl_safety_status.setText("-")
             gv.lbl_program_state.setText("-")
-            gv.lbl_last_update.setText("-")
-
-        # Polyscope version (query occasionally to avoid spam). Here we fetch once if unknown
-        if gv.lbl_polyscope_version.text() in ("-", ""):
-            resp, success, _ = get_polyscope_version()
-            if success:
-                gv.lbl_polyscope_version.setText(resp)
-            else:
-                gv.lbl_polyscope_version.setText("Unknown")
-
-        # Serial number (fetch once and cache)
-        if gv.lbl_serial_number.text() in ("-", ""):
-            resp, success, _ = get_serial_number()
-            gv.lbl_serial_number.setText(resp if success else "Unknown")
-
-        # Refresh loaded program and program list occasionally
-        gv._programs_counter = getattr(gv, '_programs_counter', 0) + 1
-        if gv._programs_counter % 5 == 0:
-            _refresh_programs()
+            gv.lbl_last_change.setText("-")
     except Exception as e:
-        logger.error(f"Failed to update Status tab: {e}")
+        logger.error(f"Failed to show robot status: {e}")
 
 def _refresh_programs():
-    """Fetch and update loaded program and available programs list."""
-    try:
-        from utils.system.core import global_vars as gv
-        from utils.robot.robot_status_monitor import get_loaded_program, list_available_programs
+    """Fetch the loaded program and available programs list again, ignoring the cache."""
+    from utils.system.core import global_vars as gv
+    fetcher = getattr(gv, 'robot_info_fetcher', None)
+    if fetcher is not None:
+        fetcher.request("loaded_program", "programs", force=True)
 
-        # Loaded program
-        resp, success, _ = get_loaded_program()
-        gv.lbl_loaded_program.setText(resp if success else "Unknown")
+def _apply_robot_info(name: str, result: FieldValue):
+    """Show a robot detail fetched by the RobotInfoFetcher. Runs in the GUI thread.
 
-        # Programs list
-        programs, success, err = list_available_programs()
-        gv.list_programs.clear()
-        if success and programs:
-            gv.list_programs.addItems(programs)
-        else:
-            # Show helpful message instead of leaving it empty
-            msg = err or "Program listing not supported on this controller/version"
-            gv.list_programs.addItem(msg)
+    Args:
+        name (str): The fetched field.
+        result (FieldValue): The fetched value.
+    """
+    from utils.system.core import global_vars as gv
+    try:
+        if name == "programs":
+            gv.list_programs.clear()
+            if result.value:
+                gv.list_programs.addItems(result.value)
+            else:
+                # Show helpful message instead of leaving it empty
+                gv.list_programs.addItem(result.error or "Program listing not supported on this controller/version")
+            return
+        label = {
+            "polyscope_version": gv.lbl_polyscope_version,
+            "serial_number": gv.lbl_serial_number,
+            "loaded_program": gv.lbl_loaded_program,
+        }.get(name)
+        if label is not None:
+            # A failed fetch keeps the last known value
+            label.setText(result.value or "Unknown")
     except Exception as e:
-        logger.error(f"Failed to refresh programs: {e}")
\ No newline at end of file
+        logger.error(f"Failed to show {name}: {e}")